@@ -0,0 +1 @@
+"""Load benchmarks for the agent service, run against stubbed backends."""
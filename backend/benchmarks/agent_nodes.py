@@ -0,0 +1,258 @@
+"""
+Measure each agent graph node on synthetic MultiQC data.
+
+Every node of one turn runs in graph order against a throwaway test
+database, with S3 and Bedrock replaced by the local stand-ins in
+``stubs``. Wall time is the median over ``--repeat`` cold turns; peak
+memory (tracemalloc) and allocated blocks come from one more turn, as
+tracing allocations slows everything down. ``load_multiqc`` always
+starts cold, so it includes the download, parse and database write;
+``warm ms`` is a follow-up turn on the same run, served from the cached
+run context.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.agent_nodes --samples 10 1000 20000
+    python -m benchmarks.agent_nodes --save-baseline benchmarks/baseline.json
+    python -m benchmarks.agent_nodes --baseline benchmarks/baseline.json
+
+With ``--baseline`` the exit status is 1 if any node's wall time or
+peak memory grew past the baseline by more than ``--tolerance``.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from .multiqc_data import generate_multiqc_data
+from .stubs import FakeS3, setup_django, stub_aws
+
+QUESTION = 'Which samples failed QC because of high duplication?'
+NODES = [
+    'load_multiqc',
+    'ensure_index',
+    'lookup_samples',
+    'lookup_metric',
+    'rag',
+    'make_table',
+    'plot_metric',
+    'synthesize',
+]
+# Measures checked against the baseline, with the difference below which
+# a change is noise whatever the ratio; block counts are only reported
+NOISE_FLOOR = {'wall_ms': 10, 'peak_kib': 256}
+
+
+def _new_run(s3, body, name):
+    from singlecell_ai_insights.models import Run
+    from singlecell_ai_insights.services.agent.config import REPORTS_BUCKET
+
+    run = Run.objects.create(run_id=name, name=name, status='COMPLETED')
+    s3.objects[(REPORTS_BUCKET, run.get_multiqc_data_s3_key())] = body
+    return run
+
+
+def _turn_state(run_id):
+    from singlecell_ai_insights.services.agent.agent import _initial_state
+    from singlecell_ai_insights.services.agent.degradation import MODE_FULL
+
+    state = _initial_state(run_id, QUESTION, None, None, '')
+    # Measure the full answer path, however long it takes
+    state['mode'] = MODE_FULL
+    state['deadline'] = None
+    return state
+
+
+def _node_functions():
+    from singlecell_ai_insights.services.agent import nodes
+
+    return [(name, getattr(nodes, name)) for name in NODES]
+
+
+def time_turn(run_id):
+    """Wall time of each node, in milliseconds."""
+    state = _turn_state(run_id)
+    timings = {}
+    for name, func in _node_functions():
+        started = time.perf_counter()
+        update = func(state)
+        timings[name] = (time.perf_counter() - started) * 1000
+        state.update(update or {})
+    return timings
+
+
+def trace_turn(run_id):
+    """Peak memory (KiB) and net allocated blocks of each node."""
+    state = _turn_state(run_id)
+    results = {}
+    tracemalloc.start()
+    try:
+        for name, func in _node_functions():
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            blocks = sys.getallocatedblocks()
+            update = func(state)
+            _, peak = tracemalloc.get_traced_memory()
+            state.update(update or {})
+            results[name] = {
+                'peak_kib': round((peak - baseline) / 1024, 1),
+                'alloc_blocks': sys.getallocatedblocks() - blocks,
+            }
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def benchmark_size(s3, samples, args):
+    data = generate_multiqc_data(samples, args.metrics, args.raw_bytes)
+    body = json.dumps(data).encode()
+    del data
+
+    walls = {name: [] for name in NODES}
+    for repeat in range(args.repeat):
+        run = _new_run(s3, body, f'bench-{samples}-{repeat}')
+        for name, wall_ms in time_turn(run.run_id).items():
+            walls[name].append(wall_ms)
+    # A follow-up question reuses the cached run context and index
+    warm = time_turn(run.run_id)
+    run = _new_run(s3, body, f'bench-{samples}-traced')
+    traced = trace_turn(run.run_id)
+
+    return {
+        'document_bytes': len(body),
+        'nodes': {
+            name: {
+                'wall_ms': round(statistics.median(walls[name]), 2),
+                'warm_wall_ms': round(warm[name], 2),
+                **traced[name],
+            }
+            for name in NODES
+        },
+    }
+
+
+def run_benchmarks(args):
+    from django.db import connection
+
+    results = {
+        'params': {
+            'metrics': args.metrics,
+            'raw_bytes': args.raw_bytes,
+            'repeat': args.repeat,
+            's3_latency': args.s3_latency,
+            'llm_latency': args.llm_latency,
+            'embed_latency': args.embed_latency,
+        },
+        'sizes': {},
+    }
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        s3 = FakeS3(latency=args.s3_latency)
+        with stub_aws(s3, args.llm_latency, args.embed_latency):
+            for samples in args.samples:
+                results['sizes'][str(samples)] = benchmark_size(
+                    s3, samples, args
+                )
+                print_size(samples, results['sizes'][str(samples)])
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return results
+
+
+def print_size(samples, result):
+    print(f'\n{samples} samples ({result["document_bytes"] / 1e6:.1f} MB)')
+    print(
+        f'  {"node":<16} {"wall ms":>10} {"warm ms":>10} {"peak KiB":>11} '
+        f'{"blocks":>10}'
+    )
+    for name, values in result['nodes'].items():
+        print(
+            f'  {name:<16} {values["wall_ms"]:>10.1f} '
+            f'{values.get("warm_wall_ms", 0):>10.1f} '
+            f'{values["peak_kib"]:>11.1f} {values["alloc_blocks"]:>10}'
+        )
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline produced by ``--save-baseline``.
+
+    Returns:
+        list: ``(samples, node, measure, baseline, current)`` regressions
+    """
+    regressions = []
+    for samples, result in results['sizes'].items():
+        base_nodes = baseline.get('sizes', {}).get(samples, {}).get('nodes')
+        if not base_nodes:
+            continue
+        for name, values in result['nodes'].items():
+            for measure, floor in NOISE_FLOOR.items():
+                before = base_nodes.get(name, {}).get(measure)
+                if before is None:
+                    continue
+                after = values[measure]
+                if after > before * (1 + tolerance) and after - before > floor:
+                    regressions.append((samples, name, measure, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--samples', type=int, nargs='+', default=[10, 1000, 20000]
+    )
+    parser.add_argument('--metrics', type=int, default=8)
+    parser.add_argument(
+        '--raw-bytes',
+        type=int,
+        default=0,
+        help='Approximate size of filler raw data per document',
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--s3-latency', type=float, default=0)
+    parser.add_argument('--llm-latency', type=float, default=0)
+    parser.add_argument(
+        '--embed-latency',
+        type=float,
+        default=0,
+        help='Seconds per embedded text',
+    )
+    parser.add_argument('--baseline', help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', help='Write results here')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.5,
+        help='Allowed relative increase over the baseline',
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    results = run_benchmarks(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as handle:
+            json.dump(results, handle, indent=2)
+            handle.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get('params') != results['params']:
+            print('\nWarning: baseline was recorded with other parameters')
+        regressions = compare(results, baseline, args.tolerance)
+        for samples, name, measure, before, after in regressions:
+            print(
+                f'REGRESSION {samples} samples {name} {measure}: '
+                f'{before} -> {after}'
+            )
+        if regressions:
+            sys.exit(1)
+        print('\nNo regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Compare concurrent chat throughput of the sync and async agent paths.
+
+The sync path is driven by a thread pool sized like one gthread worker;
+the async path runs every conversation on one event loop. Backends are
+stubbed, so only the service's own concurrency limits are measured.
+
+``--asgi`` also posts every conversation to ``/api/runs/<id>/chat/``
+through the production ASGI application (middleware, authentication,
+admission, database), in this process and on the same event loop, with
+one user per conversation and the admission caps raised to fit them.
+It uses ``benchmarks.loadtest_settings`` with ``SERVER_MODE=asgi`` and a
+scratch SQLite file. The peak thread count is reported too: Django
+parks one idle thread per request in flight for its thread-sensitive
+sync work (request signals, ORM calls), next to the agent's bounded
+pools; the turns themselves run on the loop.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.async_chat --conversations 200 --latency 0.5 --asgi
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .stubs import setup_django, stub_backends
+
+QUESTION = 'Explain the overall quality of this run'
+
+
+def run_sync(agent, conversations, threads):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(agent.chat, f'run-{i}', QUESTION)
+            for i in range(conversations)
+        ]
+        return [future.result() for future in futures]
+
+
+async def run_async(agent, conversations):
+    return await asyncio.gather(
+        *(agent.achat(f'run-{i}', QUESTION) for i in range(conversations))
+    )
+
+
+def prepare_asgi(conversations):
+    """Fresh schema with one run and a user and access token per turn."""
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from singlecell_ai_insights.models import Run, User
+
+    call_command('migrate', verbosity=0)
+    run = Run.objects.create(
+        run_id='run-asgi', name='ASGI run', status=Run.STATUS_COMPLETED
+    )
+    # No password hashing: users only authenticate with their token
+    users = User.objects.bulk_create(
+        User(username=f'asgi-user-{index}') for index in range(conversations)
+    )
+    return run.pk, [str(AccessToken.for_user(user)) for user in users]
+
+
+async def asgi_post(application, path, cookie, payload):
+    """POST through an ASGI application; returns the response status."""
+    body = json.dumps(payload).encode()
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'POST',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'cookie', cookie.encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    requests = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    statuses = []
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client never disconnects; Django cancels this when done
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+async def run_asgi(application, run_pk, tokens):
+    """Post one turn per token at once; returns statuses and peak threads."""
+    from django.conf import settings
+
+    cookie_name = settings.SIMPLE_JWT['AUTH_COOKIE']
+    peak = threading.active_count()
+    done = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, threading.active_count())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample_threads())
+    statuses = await asyncio.gather(
+        *(
+            asgi_post(
+                application,
+                f'/api/runs/{run_pk}/chat/',
+                f'{cookie_name}={token}',
+                {'question': QUESTION},
+            )
+            for token in tokens
+        )
+    )
+    done.set()
+    await sampler
+    return statuses, peak
+
+
+def report(label, conversations, elapsed):
+    print(
+        f'{label:<28} {conversations:>5} turns  {elapsed:>7.2f}s  '
+        f'{conversations / elapsed:>7.1f} turns/s'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=0.5,
+        help='Seconds each stubbed Bedrock/S3 call blocks for',
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=8,
+        help='Sync request threads (gthread: 2 workers x 4 threads)',
+    )
+    parser.add_argument('--skip-sync', action='store_true')
+    parser.add_argument(
+        '--asgi',
+        action='store_true',
+        help='Also post the turns through the ASGI application',
+    )
+    args = parser.parse_args()
+
+    if args.asgi:
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.loadtest_settings'
+        os.environ['SERVER_MODE'] = 'asgi'
+        os.environ['LOADTEST_SQLITE_PATH'] = os.path.join(
+            tempfile.mkdtemp(), 'async-chat.sqlite3'
+        )
+    setup_django()
+    from singlecell_ai_insights.services import agent
+
+    with stub_backends(args.latency):
+        if not args.skip_sync:
+            start = time.perf_counter()
+            run_sync(agent, args.conversations, args.threads)
+            report(
+                f'sync ({args.threads} threads)',
+                args.conversations,
+                time.perf_counter() - start,
+            )
+
+        start = time.perf_counter()
+        asyncio.run(run_async(agent, args.conversations))
+        report(
+            'async (one event loop)',
+            args.conversations,
+            time.perf_counter() - start,
+        )
+
+        if args.asgi:
+            run_asgi_benchmark(args)
+
+
+def run_asgi_benchmark(args):
+    from django.test import override_settings
+    from singlecell_ai_insights.asgi import application
+
+    run_pk, tokens = prepare_asgi(args.conversations)
+    threads_before = threading.active_count()
+    with override_settings(
+        AGENT_MAX_IN_FLIGHT=args.conversations,
+        AGENT_MAX_TURNS_PER_USER=1,
+    ):
+        start = time.perf_counter()
+        statuses, peak = asyncio.run(run_asgi(application, run_pk, tokens))
+        elapsed = time.perf_counter() - start
+    report('async (ASGI application)', args.conversations, elapsed)
+    failed = sum(status != 200 for status in statuses)
+    print(
+        f'{"":<28} {failed} failed, threads {threads_before} before, '
+        f'{peak} at peak'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,450 @@
+"""
+Drive concurrent users against the API served the way production is.
+
+The app is started under gunicorn with the production config
+(``singlecell_ai_insights.gunicorn_conf``: preload, warmup, recycling)
+and gthread WSGI or uvicorn ASGI workers, using
+``benchmarks.loadtest_settings``: S3, HealthOmics and Bedrock are local
+stand-ins with configurable latency, and the database is a fresh SQLite
+file (or PostgreSQL when ``DB_HOST`` is set). Each simulated user logs
+in once, then repeatedly lists runs, fetches a run's metrics and chat
+history, and asks a question over the SSE stream endpoint.
+
+Reported per endpoint: throughput, p50/p95/p99 latency and error rate,
+plus time to the first SSE event for the stream, and the memory of the
+master and workers once warmed up and again after the load. Compare
+``--no-preload`` to see what sharing the preloaded app saves.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.http_load --mode wsgi asgi --users 32 --duration 60
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+
+from singlecell_ai_insights.services.warmup import process_memory
+
+PASSWORD = 'load-test-password'
+QUESTION = 'Which samples have high duplication?'
+ENDPOINTS = ['login', 'runs', 'metrics', 'history', 'stream']
+
+
+def _server_env(args, mode):
+    env = {
+        **os.environ,
+        'AWS_REGION': os.getenv('AWS_REGION', 'eu-west-1'),
+        'AWS_S3_PRESIGN_TTL': os.getenv('AWS_S3_PRESIGN_TTL', '3600'),
+        'REPORTS_BUCKET': os.getenv('REPORTS_BUCKET', 'benchmark'),
+        'DJANGO_SETTINGS_MODULE': 'benchmarks.loadtest_settings',
+        'LOADTEST_SQLITE_PATH': args.sqlite_path,
+        'LOADTEST_SAMPLES': str(args.samples),
+        'LOADTEST_S3_LATENCY': str(args.s3_latency),
+        'LOADTEST_LLM_LATENCY': str(args.llm_latency),
+        'JWT_COOKIE_SECURE': 'false',
+        'GUNICORN_PRELOAD': str(args.preload).lower(),
+    }
+    if mode is not None:
+        env['SERVER_MODE'] = mode
+    return env
+
+
+def prepare_database(args):
+    """Create a fresh schema with load-test users and completed runs."""
+    if not os.getenv('DB_HOST') and os.path.exists(args.sqlite_path):
+        os.remove(args.sqlite_path)
+    os.environ.update(_server_env(args, None))
+
+    from .stubs import setup_django
+
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connections
+    from singlecell_ai_insights.models import Run, User
+
+    call_command('migrate', verbosity=0)
+    call_command('flush', interactive=False, verbosity=0)
+    for index in range(args.users):
+        User.objects.create_user(
+            username=f'load-user-{index}', password=PASSWORD
+        )
+    runs = [
+        Run.objects.create(
+            run_id=f'load-run-{index}',
+            name=f'Load run {index}',
+            status=Run.STATUS_COMPLETED,
+            output_dir_bucket='benchmark',
+            output_dir_key=f'load-run-{index}/',
+        )
+        for index in range(args.runs)
+    ]
+    connections.close_all()
+    return [run.pk for run in runs]
+
+
+def gunicorn_command(args, mode):
+    """The ``entrypoint.sh`` gunicorn command line for a server mode."""
+    command = [
+        sys.executable,
+        '-m',
+        'gunicorn',
+        '--config',
+        'python:singlecell_ai_insights.gunicorn_conf',
+        '--access-logfile',
+        os.devnull,
+        '--bind',
+        f'127.0.0.1:{args.port}',
+        '--workers',
+        str(args.workers),
+        '--log-level',
+        'warning',
+    ]
+    if mode == 'asgi':
+        return [
+            *command,
+            '--worker-class',
+            'uvicorn.workers.UvicornWorker',
+            'benchmarks.loadtest_app:asgi',
+        ]
+    return [
+        *command,
+        '--threads',
+        str(args.threads),
+        '--worker-class',
+        'gthread',
+        'benchmarks.loadtest_app:wsgi',
+    ]
+
+
+def start_server(args, mode):
+    server = subprocess.Popen(
+        gunicorn_command(args, mode), env=_server_env(args, mode)
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(
+                f'{mode} server exited with {server.returncode}'
+            )
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', args.port)
+            connection.request('GET', '/api/health/')
+            # Measure memory only once every worker has booted
+            if (
+                connection.getresponse().status == 200
+                and len(_children(server.pid)) >= args.workers
+            ):
+                return server
+        except OSError:
+            pass
+        time.sleep(0.5)
+    stop_server(server)
+    raise RuntimeError(f'{mode} server did not become healthy')
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as handle:
+                # The command name may contain spaces; fields follow ")"
+                fields = handle.read().rpartition(')')[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def server_memory(server):
+    """Master and per-worker memory in MiB (empty without ``/proc``)."""
+    master = process_memory(server.pid)
+    if not master:
+        return {}
+    workers = [
+        usage for usage in map(process_memory, _children(server.pid)) if usage
+    ]
+    mib = 1024 * 1024
+
+    def rounded(usage):
+        return {key: round(value / mib, 1) for key, value in usage.items()}
+
+    return {
+        'master': rounded(master),
+        'workers': [rounded(usage) for usage in workers],
+        'total_pss': round(
+            sum(usage['pss'] for usage in [master, *workers]) / mib, 1
+        ),
+    }
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+class User:
+    """One simulated browser session on its own keep-alive connection."""
+
+    def __init__(self, index, port, run_pks, results, seed):
+        self.username = f'load-user-{index}'
+        self.port = port
+        self.run_pks = run_pks
+        self.results = results
+        self.random = random.Random(seed + index)
+        self.connection = None
+        self.cookies = ''
+
+    def _connect(self):
+        self.connection = http.client.HTTPConnection(
+            '127.0.0.1', self.port, timeout=300
+        )
+
+    def _request(self, method, path, body=None):
+        headers = {'Cookie': self.cookies}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        self.connection.request(method, path, body=body, headers=headers)
+        return self.connection.getresponse()
+
+    def _record(self, endpoint, started, ok, first_event=None):
+        self.results[endpoint].append(
+            (time.perf_counter() - started, ok, first_event)
+        )
+
+    def _call(self, endpoint, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            response = self._request(method, path, body)
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._record(endpoint, started, False)
+            self._connect()
+            return None
+        self._record(endpoint, started, response.status < 400)
+        return response
+
+    def login(self):
+        self._connect()
+        response = self._call(
+            'login',
+            'POST',
+            '/api/auth/login/',
+            {'username': self.username, 'password': PASSWORD},
+        )
+        cookies = SimpleCookie()
+        if response is not None:
+            for header in response.headers.get_all('Set-Cookie') or []:
+                cookies.load(header)
+        self.cookies = '; '.join(
+            f'{name}={morsel.value}' for name, morsel in cookies.items()
+        )
+
+    def stream(self, pk):
+        started = time.perf_counter()
+        first_event = None
+        try:
+            response = self._request(
+                'POST', f'/api/runs/{pk}/chat/stream/', {'question': QUESTION}
+            )
+            ok = response.status < 400
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                if line.startswith(b'data:') and first_event is None:
+                    first_event = time.perf_counter() - started
+                if line.startswith(b'data: {"type": "error"'):
+                    ok = False
+            response.read()
+        except (OSError, http.client.HTTPException):
+            ok = False
+            self._connect()
+        self._record('stream', started, ok, first_event)
+
+    def iteration(self):
+        pk = self.random.choice(self.run_pks)
+        self._call('runs', 'GET', '/api/runs/')
+        self._call('metrics', 'GET', f'/api/runs/{pk}/metrics/')
+        self._call('history', 'GET', f'/api/runs/{pk}/chat/')
+        self.stream(pk)
+
+
+def drive(args, run_pks):
+    """Run every user until the duration is up; returns raw samples."""
+    results = defaultdict(list)
+    stop_at = time.monotonic() + args.duration
+    lock = threading.Lock()
+
+    def user_loop(index):
+        local = defaultdict(list)
+        user = User(index, args.port, run_pks, local, args.seed)
+        user.login()
+        while time.monotonic() < stop_at:
+            user.iteration()
+            time.sleep(args.think)
+        with lock:
+            for endpoint, samples in local.items():
+                results[endpoint].extend(samples)
+
+    threads = [
+        threading.Thread(target=user_loop, args=(index,), daemon=True)
+        for index in range(args.users)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - started
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    if len(values) == 1:
+        value = round(values[0] * 1000, 1)
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {
+        'p50': round(cuts[49] * 1000, 1),
+        'p95': round(cuts[94] * 1000, 1),
+        'p99': round(cuts[98] * 1000, 1),
+    }
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for endpoint in ENDPOINTS:
+        samples = results.get(endpoint, [])
+        if not samples:
+            continue
+        errors = sum(1 for _, ok, _ in samples if not ok)
+        row = {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 2),
+            'error_rate': round(errors / len(samples), 4),
+            'latency_ms': _percentiles([latency for latency, _, _ in samples]),
+        }
+        first_events = [first for _, _, first in samples if first is not None]
+        if endpoint == 'stream':
+            row['first_event_ms'] = _percentiles(first_events)
+        summary[endpoint] = row
+    return summary
+
+
+def print_summary(mode, summary):
+    print(f'\n{mode}')
+    print(
+        f'  {"endpoint":<9} {"reqs":>6} {"req/s":>7} {"err %":>6} '
+        f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}'
+    )
+    for endpoint, row in summary.items():
+        if endpoint == 'memory':
+            continue
+        rows = [(endpoint, row['latency_ms'])]
+        if 'first_event_ms' in row:
+            rows.append(('  first', row['first_event_ms']))
+        for index, (label, latency) in enumerate(rows):
+            counts = (
+                f'{row["requests"]:>6} {row["rps"]:>7.2f} '
+                f'{row["error_rate"] * 100:>6.1f}'
+                if index == 0
+                else ' ' * 21
+            )
+            print(
+                f'  {label:<9} {counts} {latency["p50"]:>8} '
+                f'{latency["p95"]:>8} {latency["p99"]:>8}'
+            )
+    for label, memory in summary.get('memory', {}).items():
+        if not memory:
+            continue
+        workers = memory['workers']
+        print(
+            f'  memory {label:<6} master rss {memory["master"]["rss"]} MiB, '
+            f'{len(workers)} workers rss/uss '
+            + ', '.join(f'{w["rss"]}/{w["uss"]}' for w in workers)
+            + f' MiB, total pss {memory["total_pss"]} MiB'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--mode', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi']
+    )
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument(
+        '--duration', type=float, default=60, help='Seconds per mode'
+    )
+    parser.add_argument(
+        '--think', type=float, default=0, help='Pause between iterations'
+    )
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument(
+        '--samples', type=int, default=200, help='Samples per run document'
+    )
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument(
+        '--threads', type=int, default=4, help='gthread threads per worker'
+    )
+    parser.add_argument('--s3-latency', type=float, default=0.05)
+    parser.add_argument('--llm-latency', type=float, default=1.0)
+    parser.add_argument(
+        '--preload',
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help='Preload and warm up the app in the gunicorn master',
+    )
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--sqlite-path', default='/tmp/singlecell-loadtest.sqlite3'
+    )
+    parser.add_argument('--json', help='Also write the summary here')
+    args = parser.parse_args()
+
+    report = {'params': vars(args).copy(), 'modes': {}}
+    for mode in args.mode:
+        # Every mode starts from the same data and a cold cache
+        run_pks = prepare_database(args)
+        server = start_server(args, mode)
+        try:
+            memory_before = server_memory(server)
+            results, elapsed = drive(args, run_pks)
+            memory_after = server_memory(server)
+        finally:
+            stop_server(server)
+        report['modes'][mode] = summarize(results, elapsed)
+        report['modes'][mode]['memory'] = {
+            'before': memory_before,
+            'after': memory_after,
+        }
+        print_summary(mode, report['modes'][mode])
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+            handle.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+WSGI and ASGI entry points for load tests, with Bedrock stubbed.
+
+Serve ``benchmarks.loadtest_app:wsgi`` or ``benchmarks.loadtest_app:asgi``
+with gunicorn; ``benchmarks.http_load`` does this for you.
+"""
+
+import os
+from contextlib import ExitStack
+
+from .stubs import setup_django, stub_bedrock
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.loadtest_settings')
+setup_django()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+# S3 and HealthOmics are stubbed in the settings; Bedrock clients are
+# module globals, patched here for the life of the worker process
+_stubs = ExitStack()
+_stubs.enter_context(
+    stub_bedrock(
+        float(os.getenv('LOADTEST_LLM_LATENCY', '1')),
+        float(os.getenv('LOADTEST_EMBED_LATENCY', '0')),
+    )
+)
+
+wsgi = get_wsgi_application()
+# The production ASGI application, static file handler included
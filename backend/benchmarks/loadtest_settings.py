@@ -0,0 +1,39 @@
+"""
+Django settings for HTTP load tests.
+
+The application's own settings, with S3 and HealthOmics replaced by the
+local stand-ins and SQLite moved to a scratch file unless ``DB_HOST``
+selects PostgreSQL. Bedrock is stubbed by ``benchmarks.loadtest_app``.
+"""
+
+import os
+
+import django
+from singlecell_ai_insights.settings import *  # noqa: F403
+
+from .stubs import FakeHealthOmics, SyntheticS3
+
+if not os.getenv('DB_HOST'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                'LOADTEST_SQLITE_PATH', '/tmp/singlecell-loadtest.sqlite3'
+            ),
+            # Concurrent workers wait for the write lock instead of failing
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+    if django.VERSION >= (5, 1):
+        # Deferred transactions that later write fail at once with
+        # "database is locked" rather than waiting for the lock
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+AWS_HEALTHOMICS_CLIENT = FakeHealthOmics()
+AWS_S3_CLIENT = SyntheticS3(
+    samples=int(os.getenv('LOADTEST_SAMPLES', '200')),
+    latency=float(os.getenv('LOADTEST_S3_LATENCY', '0.05')),
+)
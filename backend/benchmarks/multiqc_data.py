@@ -0,0 +1,125 @@
+"""
+Generate synthetic ``multiqc_data.json`` documents of a chosen size.
+
+The output has the sections the agent reads: general stats headers and
+values, FastQC module statuses, plus filler raw data so documents can be
+sized like real runs. Values come from a seeded generator, so the same
+arguments always give the same document.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.multiqc_data --samples 1000 --out data.json
+"""
+
+import argparse
+import json
+import random
+
+# Realistic leading metrics; more are named metric_<n>
+BASE_METRICS = [
+    ('percent_duplicates', '% Dups', 0, 100),
+    ('percent_gc', '% GC', 30, 60),
+    ('total_sequences', 'Seqs', 1e5, 5e7),
+    ('avg_sequence_length', 'Length', 28, 151),
+    ('percent_fails', '% Failed', 0, 40),
+]
+FASTQC_MODULES = [
+    'basic_statistics',
+    'per_base_sequence_quality',
+    'per_sequence_quality_scores',
+    'per_base_sequence_content',
+    'per_sequence_gc_content',
+    'per_base_n_content',
+    'sequence_length_distribution',
+    'sequence_duplication_levels',
+    'overrepresented_sequences',
+    'adapter_content',
+]
+STATUSES = ['pass', 'warn', 'fail']
+STATUS_WEIGHTS = [0.8, 0.15, 0.05]
+# Rough JSON size of one filler value, used to hit ``raw_bytes``
+_BYTES_PER_RAW_VALUE = 8
+
+
+def _metrics(count):
+    metrics = BASE_METRICS[:count]
+    for index in range(len(metrics), count):
+        metrics.append((f'metric_{index}', f'Metric {index}', 0, 1000))
+    return metrics
+
+
+def generate_multiqc_data(samples, metrics=8, raw_bytes=0, seed=0):
+    """
+    Build a synthetic MultiQC data document.
+
+    Args:
+        samples: Number of samples
+        metrics: General stats metrics per sample
+        raw_bytes: Approximate size of the filler raw data, in bytes
+        seed: Seed for the value generator
+
+    Returns:
+        dict: A document shaped like ``multiqc_data.json``
+    """
+    rng = random.Random(seed)
+    names = [f'sample_{index:05d}' for index in range(samples)]
+    metric_specs = _metrics(metrics)
+
+    headers = {
+        name: {'title': title, 'namespace': 'FastQC', 'min': low, 'max': high}
+        for name, title, low, high in metric_specs
+    }
+    general_stats = {
+        sample: {
+            name: round(rng.uniform(low, high), 3)
+            for name, _, low, high in metric_specs
+        }
+        for sample in names
+    }
+    fastqc = {
+        sample: {
+            module: rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+            for module in FASTQC_MODULES
+        }
+        for sample in names
+    }
+
+    raw_data = {'multiqc_fastqc': fastqc}
+    per_sample = raw_bytes // max(samples, 1) // _BYTES_PER_RAW_VALUE
+    if per_sample:
+        raw_data['multiqc_synthetic_raw'] = {
+            sample: [round(rng.random(), 4) for _ in range(per_sample)]
+            for sample in names
+        }
+
+    return {
+        'config_title': f'Synthetic run ({samples} samples)',
+        'report_general_stats_headers': [headers],
+        'report_general_stats_data': [general_stats],
+        'report_saved_raw_data': raw_data,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--samples', type=int, default=100)
+    parser.add_argument('--metrics', type=int, default=8)
+    parser.add_argument(
+        '--raw-bytes',
+        type=int,
+        default=0,
+        help='Approximate size of filler raw data',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='multiqc_data.json')
+    args = parser.parse_args()
+
+    data = generate_multiqc_data(
+        args.samples, args.metrics, args.raw_bytes, args.seed
+    )
+    with open(args.out, 'w') as handle:
+        json.dump(data, handle)
+
+
+if __name__ == '__main__':
+    main()
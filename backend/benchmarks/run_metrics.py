@@ -0,0 +1,99 @@
+"""
+Compare the memory held by parsed run metrics as dicts and as RunMetrics.
+
+Synthetic MultiQC data is parsed the way ingestion does, then round
+tripped through JSON as loading ``RunData`` does, so the dicts own their
+keys like the ones cached in a run context. Memory is what tracemalloc
+still sees allocated once each representation is built; ``build ms`` is
+the time ``RunMetrics.from_dicts`` takes on top of the dicts, measured
+separately as tracing slows it down.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.run_metrics --samples 1000 20000 --metrics 8 40
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from .multiqc_data import generate_multiqc_data
+from .stubs import setup_django
+
+MIB = 1024 * 1024
+
+
+def _retained(build):
+    """Build something and return it with the bytes it keeps allocated."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, retained
+
+
+def benchmark_size(samples, metrics):
+    from singlecell_ai_insights.services.agent.tools import (
+        extract_fastqc_module_statuses,
+        extract_general_stats_samples,
+    )
+    from singlecell_ai_insights.services.agent.tools.run_metrics import (
+        RunMetrics,
+    )
+
+    data = generate_multiqc_data(samples, metrics)
+    parsed = json.dumps(
+        [
+            extract_general_stats_samples(data)[0],
+            extract_fastqc_module_statuses(data),
+        ]
+    )
+    del data
+
+    dicts, dict_bytes = _retained(lambda: json.loads(parsed))
+    compact, compact_bytes = _retained(lambda: RunMetrics.from_dicts(*dicts))
+    started = time.perf_counter()
+    RunMetrics.from_dicts(*dicts)
+    build_ms = (time.perf_counter() - started) * 1000
+    return {
+        'dict_mib': round(dict_bytes / MIB, 2),
+        'compact_mib': round(compact_bytes / MIB, 2),
+        'array_mib': round(compact.nbytes() / MIB, 2),
+        'ratio': round(dict_bytes / max(compact_bytes, 1), 1),
+        'build_ms': round(build_ms, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--samples', type=int, nargs='+', default=[1000, 20000]
+    )
+    parser.add_argument('--metrics', type=int, nargs='+', default=[8])
+    args = parser.parse_args()
+
+    setup_django()
+    print(
+        f'{"samples":>8} {"metrics":>8} {"dicts MiB":>10} '
+        f'{"compact MiB":>12} {"arrays MiB":>11} {"ratio":>6} '
+        f'{"build ms":>9}'
+    )
+    for samples in args.samples:
+        for metrics in args.metrics:
+            result = benchmark_size(samples, metrics)
+            print(
+                f'{samples:>8} {metrics:>8} {result["dict_mib"]:>10.2f} '
+                f'{result["compact_mib"]:>12.2f} '
+                f'{result["array_mib"]:>11.2f} {result["ratio"]:>6.1f} '
+                f'{result["build_ms"]:>9.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Stand-ins for Bedrock, S3 and parsed run data with realistic latency.
+
+Every stand-in is deterministic, so repeated benchmark runs do the same
+work, and blocks for a configurable latency like the real service.
+"""
+
+import asyncio
+import io
+import json
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def setup_django():
+    """Configure Django with throwaway values for required settings."""
+    os.environ.setdefault('AWS_REGION', 'eu-west-1')
+    os.environ.setdefault('AWS_S3_PRESIGN_TTL', '3600')
+    os.environ.setdefault('REPORTS_BUCKET', 'benchmark')
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE', 'singlecell_ai_insights.settings'
+    )
+
+    import django
+
+    django.setup()
+
+
+class FakeLLM:
+    """Chat model stub whose ``invoke`` blocks like a Bedrock call."""
+
+    content = 'PLOTS: 0,1\nTABLES: 0\nStub answer.'
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def _message(self, prompt, content):
+        return SimpleNamespace(
+            content=content,
+            usage_metadata={
+                'input_tokens': len(prompt) // 4,
+                'output_tokens': len(content) // 4,
+            },
+        )
+
+    def invoke(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        return self._message(prompt, self.content)
+
+    def stream(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        for line in self.content.splitlines(keepends=True):
+            yield self._message(prompt, line)
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """Embedding stub that blocks per text, as Titan embeds one per call."""
+
+    latency: float = 0.0
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency * len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+class FakeS3:
+    """
+    S3 client stub serving objects from memory.
+
+    Args:
+        objects: ``{(bucket, key): bytes}`` to serve
+        latency: Seconds each request blocks for
+    """
+
+    def __init__(self, objects=None, latency=0):
+        self.objects = dict(objects or {})
+        self.latency = latency
+
+    def get_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        try:
+            body = self.objects[(Bucket, Key)]
+        except KeyError:
+            raise ClientError(
+                {'Error': {'Code': 'NoSuchKey', 'Message': Key}}, 'GetObject'
+            ) from None
+        return {'Body': io.BytesIO(body), 'ContentLength': len(body)}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        time.sleep(self.latency)
+        self.objects[(Bucket, Key)] = Body
+        return {}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        # Signing is local in boto3 too; no latency
+        return f'https://{Params["Bucket"]}.s3.local/{Params["Key"]}'
+
+
+class SyntheticS3(FakeS3):
+    """
+    :class:`FakeS3` that serves a synthetic ``multiqc_data.json`` for any run.
+
+    Every process builds the same document, so each web worker serves
+    identical data without sharing memory.
+
+    Args:
+        samples: Samples in the generated document
+        latency: Seconds each request blocks for
+    """
+
+    def __init__(self, samples=200, latency=0):
+        super().__init__(latency=latency)
+        self.samples = samples
+        self._document = None
+
+    def get_object(self, Bucket, Key):
+        if Key.endswith('/multiqc_data.json') and (Bucket, Key) not in (
+            self.objects
+        ):
+            if self._document is None:
+                from .multiqc_data import generate_multiqc_data
+
+                self._document = json.dumps(
+                    generate_multiqc_data(self.samples)
+                ).encode()
+            self.objects[(Bucket, Key)] = self._document
+        return super().get_object(Bucket, Key)
+
+
+class FakeHealthOmics:
+    """HealthOmics client stub that knows no runs."""
+
+    def get_paginator(self, operation):
+        return SimpleNamespace(paginate=lambda **kwargs: iter([{'items': []}]))
+
+
+RUN_DATA_VERSION = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_run_data(samples=24):
+    """Build an in-memory stand-in for a persisted ``RunData`` row."""
+    sample_metrics = {
+        f'sample{i}': {'percent_gc': 40.0 + i % 5, 'percent_duplicates': i}
+        for i in range(samples)
+    }
+    panels = [
+        {
+            'page_content': f'fastqc module summary for sample{i}',
+            'metadata': {'module': 'fastqc', 'sample': f'sample{i}'},
+        }
+        for i in range(samples)
+    ]
+    return SimpleNamespace(
+        updated_at=RUN_DATA_VERSION,
+        samples=sample_metrics,
+        panels=panels,
+        embeddings=None,
+        metric_meta={},
+        module_statuses={},
+        statistics={},
+    )
+
+
+@contextmanager
+def stub_bedrock(llm_latency=0, embed_latency=0):
+    """
+    Replace the Bedrock chat model and embeddings everywhere they are used.
+
+    Args:
+        llm_latency: Seconds each chat model call blocks for
+        embed_latency: Seconds each embedded text blocks for
+    """
+    from singlecell_ai_insights.services import ingestion
+    from singlecell_ai_insights.services.agent import memory
+    from singlecell_ai_insights.services.agent.nodes import (
+        data_loading,
+        synthesis,
+    )
+    from singlecell_ai_insights.services.agent.tools import (
+        artifact_selector,
+    )
+
+    llm = FakeLLM(llm_latency)
+    emb = FakeEmbeddings(size=64, latency=embed_latency)
+
+    with ExitStack() as stack:
+        for module in (synthesis, artifact_selector, memory):
+            stack.enter_context(patch.object(module, 'llm', llm))
+        for module in (data_loading, ingestion):
+            stack.enter_context(patch.object(module, 'emb', emb))
+        yield
+
+
+@contextmanager
+def stub_aws(s3=None, llm_latency=0, embed_latency=0):
+    """
+    Replace S3, the Bedrock chat model and Bedrock embeddings.
+
+    Args:
+        s3: :class:`FakeS3` to serve objects from (default: empty)
+        llm_latency: Seconds each chat model call blocks for
+        embed_latency: Seconds each embedded text blocks for
+
+    Yields:
+        FakeS3: The S3 stand-in in use
+    """
+    from django.test import override_settings
+
+    s3 = s3 if s3 is not None else FakeS3()
+    with (
+        override_settings(AWS_S3_CLIENT=s3),
+        stub_bedrock(llm_latency, embed_latency),
+    ):
+        yield s3
+
+
+@contextmanager
+def stub_backends(latency):
+    """
+    Replace every network dependency of the agent graph.
+
+    Parsed run data is served from memory, so no database is needed.
+
+    Args:
+        latency: Seconds each LLM or S3 call blocks for
+    """
+    from singlecell_ai_insights.services import ingestion
+
+    run_data = make_run_data()
+
+    def get_run_data(run_id):
+        time.sleep(latency)
+        return run_data
+
+    async def aget_run_data(run_id):
+        await asyncio.sleep(latency)
+        return run_data
+
+    async def aget_run_data_version(run_id):
+        return run_data.updated_at
+
+    with ExitStack() as stack:
+        stack.enter_context(stub_aws(FakeS3(latency=latency), latency))
+        stack.enter_context(
+            patch.object(ingestion, 'get_run_data', get_run_data)
+        )
+        stack.enter_context(
+            patch.object(ingestion, 'aget_run_data', aget_run_data)
+        )
+        stack.enter_context(
+            patch.object(
+                ingestion,
+                'get_run_data_version',
+                lambda run_id: run_data.updated_at,
+            )
+        )
+        stack.enter_context(
+            patch.object(
+                ingestion, 'aget_run_data_version', aget_run_data_version
+            )
+        )
+        yield
@@ -1,7 +1,12 @@
+from datetime import datetime, timezone
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
 
-from .models import Conversation, Message, Run, User
+from .models import ChatJob, Conversation, Message, Run, RunData, User
+from .services import profiling
 
 
 class MessageInline(admin.TabularInline):
@@ -26,12 +31,14 @@ class MessageAdmin(admin.ModelAdmin):
         'id',
         'conversation',
         'role',
+        'status',
+        'answer_mode',
         'content_preview',
         'created_at',
     ]
-    list_filter = ['role', 'created_at']
+    list_filter = ['role', 'status', 'answer_mode', 'created_at']
     search_fields = ['content', 'conversation__run__name']
-    readonly_fields = ['created_at']
+    readonly_fields = ['timing', 'created_at']
 
     def content_preview(self, obj):
         if len(obj.content) > 50:
@@ -41,5 +48,71 @@ class MessageAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content'
 
 
+@admin.register(Run)
+class RunAdmin(admin.ModelAdmin):
+    list_display = [
+        'run_id',
+        'name',
+        'status',
+        'ingestion_status',
+        'ingested_at',
+        'created_at',
+    ]
+    list_filter = ['status', 'ingestion_status']
+    search_fields = ['run_id', 'name']
+    readonly_fields = ['updated_at', 'ingested_at', 'ingestion_error']
+
+
+@admin.register(RunData)
+class RunDataAdmin(admin.ModelAdmin):
+    list_display = ['id', 'run', 'created_at', 'updated_at']
+    search_fields = ['run__run_id', 'run__name']
+    readonly_fields = ['created_at', 'updated_at']
+
+
 admin.site.register(User, UserAdmin)
-admin.site.register(Run)
+
+
+@admin.register(ChatJob)
+class ChatJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'conversation',
+        'status',
+        'worker',
+        'created_at',
+        'started_at',
+        'finished_at',
+    ]
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'error']
+
+
+def profile_list(request):
+    """List request profiles recorded by ``ProfilingMiddleware``."""
+    profiles = [
+        {
+            **profile,
+            'created': datetime.fromtimestamp(
+                profile['created_at'], timezone.utc
+            ),
+        }
+        for profile in profiling.list_profiles()
+    ]
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': profiles,
+    }
+    return TemplateResponse(request, 'admin/profiles.html', context)
+
+
+def profile_download(request, profile_id):
+    """Download one stored profile."""
+    found = profiling.get_profile(profile_id)
+    if found is None:
+        raise Http404('No such profile')
+    metadata, path = found
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True, filename=metadata['filename']
+    )
@@ -0,0 +1,267 @@
+"""Async chat endpoints for ASGI deployments.
+
+A chat turn spends most of its time waiting on Bedrock and S3. These views
+await the agent instead of holding a worker thread, so one process can
+keep many conversations in flight. Short DB work goes through
+``sync_to_async``; history reads and deletes reuse the sync views, and
+requests are authenticated and validated by them too.
+"""
+
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.views import View
+from rest_framework.response import Response
+
+from singlecell_ai_insights.services import (
+    admission,
+    agent,
+    conversations,
+    tracing,
+)
+
+from .serializers import MessageSerializer
+from .streaming import (
+    DONE,
+    HEARTBEAT,
+    AsyncClosingStream,
+    awith_heartbeats,
+    sse,
+)
+from .views import (
+    RunAgentChatStreamView,
+    RunAgentChatView,
+    _agent_error_response,
+    _chat_request,
+    _rejected_response,
+    _start_turn,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAgentView(View):
+    """
+    Authenticate and validate a chat request without blocking the loop.
+
+    Authentication, permissions, throttling, parsing and error responses
+    are those of the sync view in ``drf_view``, run off the event loop,
+    so both kinds of view answer a bad request the same way.
+    """
+
+    drf_view = RunAgentChatView
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # DRF applies its own CSRF checks, as in the sync views
+        view.csrf_exempt = True
+        return view
+
+    def _drf(self, request):
+        """The sync view, set up to handle ``request`` as in dispatch."""
+        view = self.drf_view(args=self.args, kwargs=self.kwargs)
+        view.headers = view.default_response_headers
+        view.request = view.initialize_request(request)
+        return view
+
+    @staticmethod
+    def _render(view, response):
+        return view.finalize_response(view.request, response).render()
+
+    def _error_response(self, view, exc):
+        """DRF's response for an exception, as the sync view renders it."""
+        return self._render(view, view.handle_exception(exc))
+
+    def _check_request(self, request):
+        """
+        Run the sync view's checks and validate the payload.
+
+        Returns:
+            tuple of (error response or None, (view, question, metric_key))
+        """
+        view = self._drf(request)
+        try:
+            view.initial(view.request)
+            question, metric_key = _chat_request(view.request)
+        except Exception as exc:
+            return self._error_response(view, exc), None
+        return None, (view, question, metric_key)
+
+    async def prepare_turn(self, request, pk):
+        """
+        Authenticate, validate the payload and start the conversation turn.
+
+        Returns:
+            tuple of (error response or None, turn dict)
+        """
+        error, checked = await sync_to_async(self._check_request)(request)
+        if error:
+            return error, None
+        view, question, metric_key = checked
+        user = view.request.user
+
+        try:
+            # Waiting for a slot blocks, so keep it off the event loop
+            ticket = await sync_to_async(
+                admission.acquire, thread_sensitive=False
+            )(user.pk)
+        except admission.AdmissionRejected as exc:
+            return self._render(view, _rejected_response(exc)), None
+
+        try:
+            (
+                conversation,
+                question_message,
+                history,
+            ) = await sync_to_async(_start_turn)(pk, user, question)
+        except Http404 as exc:
+            ticket.release()
+            return await sync_to_async(self._error_response)(view, exc), None
+        except Exception:
+            ticket.release()
+            raise
+
+        return None, {
+            'view': view,
+            'ticket': ticket,
+            'conversation': conversation,
+            'question_message': question_message,
+            'run': conversation.run,
+            'question': question,
+            'history': history,
+            'metric_key': metric_key,
+        }
+
+    def agent_kwargs(self, turn):
+        return {
+            'conversation_history': turn['history'],
+            'metric_key': turn['metric_key'],
+            'conversation_summary': turn['conversation'].summary,
+        }
+
+
+class AsyncRunAgentChatView(AsyncAgentView):
+    async def get(self, request, pk):
+        return await sync_to_async(RunAgentChatView.as_view())(request, pk=pk)
+
+    async def delete(self, request, pk):
+        return await sync_to_async(RunAgentChatView.as_view())(request, pk=pk)
+
+    async def post(self, request, pk):
+        with tracing.trace('chat', run_pk=pk):
+            return await self._chat(request, pk)
+
+    async def _chat(self, request, pk):
+        error, turn = await self.prepare_turn(request, pk)
+        if error:
+            return error
+        run = turn['run']
+
+        try:
+            result = await agent.achat(
+                run.run_id, turn['question'], **self.agent_kwargs(turn)
+            )
+        except agent.AgentServiceError as exc:
+            logger.warning(
+                'Agent chat failed for run %s: %s',
+                run.pk or run.run_id,
+                exc,
+            )
+            return self._render(turn['view'], _agent_error_response(exc))
+        finally:
+            turn['ticket'].release()
+
+        assistant_message = await sync_to_async(conversations.save_answer)(
+            turn['conversation'], result
+        )
+        return self._render(
+            turn['view'], Response(MessageSerializer(assistant_message).data)
+        )
+
+
+class AsyncRunAgentChatStreamView(AsyncAgentView):
+    """Async streaming chat with progress updates."""
+
+    drf_view = RunAgentChatStreamView
+
+    async def post(self, request, pk):
+        error, turn = await self.prepare_turn(request, pk)
+        if error:
+            return error
+        run = turn['run']
+
+        cancel_event = threading.Event()
+
+        async def event_stream():
+            """Generate Server-Sent Events stream."""
+            answered = False
+            events = agent.achat_stream(
+                run.run_id,
+                turn['question'],
+                cancel_event=cancel_event,
+                **self.agent_kwargs(turn),
+            )
+            try:
+                async for event in awith_heartbeats(
+                    events, settings.AGENT_SSE_HEARTBEAT_SECONDS
+                ):
+                    if event is None:
+                        yield HEARTBEAT
+                        continue
+
+                    yield sse(event)
+
+                    if event.get('type') == 'answer':
+                        assistant_message = await sync_to_async(
+                            conversations.save_answer
+                        )(turn['conversation'], event.get('content', {}))
+                        answered = True
+                        yield sse(
+                            {'type': 'message_id', 'id': assistant_message.id}
+                        )
+
+                yield DONE
+
+            except (asyncio.CancelledError, GeneratorExit):
+                # The client went away; also stop work on the I/O pool
+                cancel_event.set()
+                if not answered:
+                    await sync_to_async(conversations.mark_cancelled)(
+                        turn['question_message']
+                    )
+                raise
+            except agent.AgentServiceError as exc:
+                logger.warning(
+                    'Agent chat failed for run %s: %s',
+                    run.pk or run.run_id,
+                    exc,
+                )
+                yield sse(agent.error_event(exc))
+            except Exception:
+                logger.exception('Unexpected error during streaming chat')
+                yield sse(
+                    {
+                        'type': 'error',
+                        'message': 'An unexpected error occurred.',
+                    }
+                )
+
+        # The slot is held until the response is closed
+        return StreamingHttpResponse(
+            AsyncClosingStream(
+                tracing.atraced_stream(
+                    event_stream, 'chat.stream', run_id=run.run_id
+                ),
+                turn['ticket'].release,
+            ),
+            content_type='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            },
+        )
@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class MessageCursorPagination(CursorPagination):
+    """Newest-first keyset pagination over (created_at, id)."""
+
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                'messages': data,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+            }
+        )
@@ -13,6 +13,12 @@ class AgentChatRequestSerializer(serializers.Serializer):
 
 
 class MessageSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Message
         fields = [
@@ -24,6 +30,8 @@ class MessageSerializer(serializers.ModelSerializer):
             'metric_key',
             'confidence',
             'confidence_explanation',
+            'status',
+            'answer_mode',
             'created_at',
         ]
         read_only_fields = ['id', 'created_at']
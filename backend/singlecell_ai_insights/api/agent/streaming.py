@@ -0,0 +1,155 @@
+"""Server-Sent Events helpers shared by the sync and async chat views."""
+
+import asyncio
+import contextvars
+import json
+import queue
+import threading
+
+from django.db import close_old_connections, connections
+
+from singlecell_ai_insights.services import metrics
+
+# SSE comment line; ignored by EventSource but keeps proxies from idling out
+HEARTBEAT = ': keep-alive\n\n'
+DONE = 'data: [DONE]\n\n'
+
+STREAMS_IN_FLIGHT = metrics.gauge(
+    'agent_sse_streams_in_flight', 'Open chat SSE responses'
+)
+
+_EVENT = 'event'
+_ERROR = 'error'
+_END = 'end'
+
+
+def sse(data, event_id=None):
+    """Format a payload as an SSE message, with an optional ``id`` line."""
+    prefix = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+
+def _pump(events, out):
+    close_old_connections()
+    try:
+        for event in events:
+            out.put((_EVENT, event))
+        out.put((_END, None))
+    except Exception as exc:
+        out.put((_ERROR, exc))
+    finally:
+        # The producer thread owns its DB connections; never leak them
+        connections.close_all()
+
+
+def with_heartbeats(events, interval):
+    """
+    Iterate ``events`` on a helper thread, yielding ``None`` when idle.
+
+    The request thread keeps writing to the client while a node runs, so
+    a closed connection is noticed within ``interval`` seconds instead of
+    after the whole turn.
+
+    Args:
+        events: Iterator producing agent events
+        interval: Seconds without events before yielding ``None``
+
+    Yields:
+        Events from ``events``, or ``None`` as a heartbeat tick
+
+    Raises:
+        Exception: Whatever ``events`` raised
+    """
+    out = queue.Queue()
+    # Run in a copy of this context so the active trace span carries over
+    context = contextvars.copy_context()
+    threading.Thread(
+        target=context.run,
+        args=(_pump, events, out),
+        name='agent-stream',
+        daemon=True,
+    ).start()
+    while True:
+        try:
+            kind, item = out.get(timeout=interval)
+        except queue.Empty:
+            yield None
+            continue
+        if kind == _END:
+            return
+        if kind == _ERROR:
+            raise item
+        yield item
+
+
+async def awith_heartbeats(events, interval):
+    """Async :func:`with_heartbeats` for an async iterator of events."""
+    out = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for event in events:
+                await out.put((_EVENT, event))
+            await out.put((_END, None))
+        except Exception as exc:
+            await out.put((_ERROR, exc))
+
+    task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            try:
+                kind, item = await asyncio.wait_for(out.get(), interval)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if kind == _END:
+                return
+            if kind == _ERROR:
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+class _TrackedStream:
+    def __init__(self, stream, on_close=None):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+        STREAMS_IN_FLIGHT.inc()
+
+    def _finish(self):
+        if self._closed:
+            return
+        self._closed = True
+        STREAMS_IN_FLIGHT.dec()
+        if self._on_close is not None:
+            self._on_close()
+
+
+class ClosingStream(_TrackedStream):
+    """Streaming content that runs ``on_close`` when Django closes it.
+
+    Django closes the response even if the stream was never iterated,
+    unlike a generator's ``finally`` block. Open streams are counted in
+    the ``agent_sse_streams_in_flight`` gauge.
+    """
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._finish()
+
+
+class AsyncClosingStream(_TrackedStream):
+    """Async :class:`ClosingStream`; the generator handles its own cleanup."""
+
+    def __aiter__(self):
+        return self._stream.__aiter__()
+
+    def close(self):
+        self._finish()
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.db.models import Avg, Count, FloatField, Max, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from singlecell_ai_insights.models import Message
+from singlecell_ai_insights.services.agent.progress import NODE_STATUS
+
+GROUPS = {
+    'run': 'conversation__run__run_id',
+    'user': 'conversation__user__username',
+    'day': 'day',
+}
+COUNTERS = [
+    's3_bytes',
+    'embeddings',
+    'llm_calls',
+    'input_tokens',
+    'output_tokens',
+    'cache_hits',
+    'cache_misses',
+]
+MAX_DAYS = 90
+
+
+def _number(path):
+    return Cast(KT(f'timing__{path}'), FloatField())
+
+
+class AgentTimingView(APIView):
+    """Aggregate per-turn timing of agent answers by run, user or day."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        group_by = request.query_params.get('group_by', 'day')
+        if group_by not in GROUPS:
+            return Response(
+                {'detail': f'group_by must be one of {sorted(GROUPS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            days = int(request.query_params.get('days', '7'))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= MAX_DAYS:
+            return Response(
+                {'detail': f'days must be between 1 and {MAX_DAYS}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = (
+            Message.objects.filter(
+                role=Message.ROLE_ASSISTANT,
+                created_at__gte=timezone.now() - timedelta(days=days),
+                timing__has_key='total_ms',
+            )
+            .annotate(day=TruncDate('created_at'))
+            .values(GROUPS[group_by])
+        )
+        aggregates = {
+            'turns': Count('id'),
+            'avg_total_ms': Avg(_number('total_ms')),
+            'max_total_ms': Max(_number('total_ms')),
+        }
+        for node in NODE_STATUS:
+            aggregates[f'avg_{node}_ms'] = Avg(_number(f'nodes__{node}'))
+        for counter in COUNTERS:
+            aggregates[counter] = Sum(_number(counter))
+
+        rows = queryset.annotate(**aggregates).order_by(GROUPS[group_by])
+        return Response(
+            {
+                'group_by': group_by,
+                'days': days,
+                'results': [
+                    _row(row, GROUPS[group_by], group_by) for row in rows
+                ],
+            }
+        )
+
+
+def _row(row, field, group_by):
+    result = {group_by: row.pop(field)}
+    result['turns'] = row.pop('turns')
+    result['nodes'] = {}
+    for node in NODE_STATUS:
+        value = row.pop(f'avg_{node}_ms')
+        if value is not None:
+            result['nodes'][node] = round(value)
+    for name, value in row.items():
+        result[name] = round(value) if value is not None else None
+    return result
@@ -1,6 +1,9 @@
-import json
 import logging
+import threading
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
 from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
@@ -8,95 +11,246 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from singlecell_ai_insights.models import Conversation, Message
+from singlecell_ai_insights.models import ChatJob, Conversation, Message
 from singlecell_ai_insights.models.run import Run
-from singlecell_ai_insights.services import agent
-
+from singlecell_ai_insights.services import (
+    admission,
+    agent,
+    conversations,
+    jobs,
+    tracing,
+)
+
+from ..conditional import (
+    build_etag,
+    not_modified_response,
+    set_validators,
+)
+from .pagination import MessageCursorPagination
 from .serializers import AgentChatRequestSerializer, MessageSerializer
+from .streaming import (
+    DONE,
+    HEARTBEAT,
+    ClosingStream,
+    sse,
+    with_heartbeats,
+)
 
 logger = logging.getLogger(__name__)
 
+HISTORY_LIMIT = 10
 
-class RunAgentChatView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request, pk):
-        """Retrieve conversation history for a run."""
-        run = get_object_or_404(Run, pk=pk)
+def _start_turn(run_pk, user, question):
+    """
+    Save the user's question and load recent history in one transaction.
+
+    An existing conversation is fetched together with its run, so a turn
+    costs one lookup, one indexed history read and one insert.
+
+    Returns:
+        tuple of (conversation, question message, history) where history
+        holds the messages not yet folded into the conversation summary
+        and ends with the question
+    """
+    with transaction.atomic():
         conversation = (
-            Conversation.objects.filter(run=run, user=request.user)
-            .prefetch_related('messages')
+            Conversation.objects.select_related('run')
+            .filter(run_id=run_pk, user=user)
             .first()
         )
+        created = False
+        if conversation is None:
+            run = get_object_or_404(Run, pk=run_pk)
+            conversation, created = Conversation.objects.get_or_create(
+                run=run, user=user
+            )
 
-        if not conversation:
-            return Response({'messages': []}, status=status.HTTP_200_OK)
+        # Read prior turns before inserting, so the new row needs no re-read
+        history = []
+        if not created:
+            recent = Message.objects.filter(conversation=conversation)
+            if conversation.summarized_until is not None:
+                # Folded turns reach the prompt through the summary only
+                recent = recent.filter(pk__gt=conversation.summarized_until)
+            history = list(
+                recent.order_by('-created_at', '-pk').values(
+                    'role', 'content'
+                )[: HISTORY_LIMIT - 1]
+            )
+        question_message = Message.objects.create(
+            conversation=conversation, role=Message.ROLE_USER, content=question
+        )
 
-        messages = conversation.messages.all()
-        serializer = MessageSerializer(messages, many=True)
-        return Response(
-            {'messages': serializer.data}, status=status.HTTP_200_OK
+    history.reverse()
+    history.append({'role': Message.ROLE_USER, 'content': question})
+    return conversation, question_message, history
+
+
+def _job_event_stream(job, after=0, cancel_on_close=False):
+    """Relay a queued job's events as SSE, resumable via event ids."""
+    failed_reported = False
+    for event in jobs.tail_events(job, after, cancel_on_close):
+        if event is None:
+            yield HEARTBEAT
+            continue
+        if event.payload.get('type') == 'error':
+            failed_reported = True
+        yield sse(event.payload, event_id=event.pk)
+
+    job.refresh_from_db(fields=['status'])
+    if job.status != ChatJob.STATUS_SUCCEEDED and not failed_reported:
+        yield sse(
+            {'type': 'error', 'message': 'Unable to complete agent request.'}
         )
+    yield DONE
 
-    def post(self, request, pk):
-        run = get_object_or_404(Run, pk=pk)
-        serializer = AgentChatRequestSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
 
-        question = serializer.validated_data['question']
-        metric_key = serializer.validated_data.get('metric_key')
-        if metric_key == '':
-            metric_key = None
+def _chat_request(request):
+    """
+    Validated question and metric key of a chat request.
 
-        # Get or create conversation
-        conversation, _ = Conversation.objects.get_or_create(
-            run=run, user=request.user
+    Raises:
+        ValidationError: If the payload is invalid
+    """
+    serializer = AgentChatRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return (
+        serializer.validated_data['question'],
+        serializer.validated_data.get('metric_key') or None,
+    )
+
+
+def _agent_error_response(exc):
+    response = Response({'detail': exc.public_message}, status=exc.status_code)
+    if getattr(exc, 'retry_after', None) is not None:
+        response['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+def _rejected_response(exc):
+    response = Response({'detail': exc.detail}, status=exc.status_code)
+    response['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+def _sse_response(stream, on_close=None):
+    return StreamingHttpResponse(
+        ClosingStream(stream, on_close),
+        content_type='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
+class RunAgentChatView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """
+        Retrieve conversation history for a run.
+
+        Passing ``limit`` or ``cursor`` switches to newest-first cursor
+        pages; ``fields`` restricts each message to a subset of fields.
+        """
+        run = get_object_or_404(Run, pk=pk)
+        messages = Message.objects.filter(
+            conversation__run=run, conversation__user=request.user
         )
 
-        # Save user message
-        Message.objects.create(
-            conversation=conversation, role=Message.ROLE_USER, content=question
+        params = request.query_params
+        fields = [
+            name
+            for name in params.get('fields', '').split(',')
+            if name in MessageSerializer.Meta.fields
+        ] or None
+        paginated = 'limit' in params or 'cursor' in params
+
+        # Count + last id catch new messages, the latest update time catches
+        # messages changed in place (e.g. a question being cancelled)
+        state = messages.aggregate(
+            count=Count('pk'), last_id=Max('pk'), latest=Max('updated_at')
+        )
+        etag = build_etag(
+            'run-chat',
+            run.pk,
+            state['count'],
+            state['last_id'],
+            state['latest'].isoformat() if state['latest'] else '',
+            # Each field subset and page is a representation of its own
+            ','.join(sorted(fields or ())),
+            paginated and params.get('limit', ''),
+            paginated and params.get('cursor', ''),
         )
+        not_modified = not_modified_response(request, etag, state['latest'])
+        if not_modified:
+            return not_modified
+
+        if fields:
+            # Skip loading large columns (content, citations) not asked for
+            messages = messages.only('id', 'created_at', *fields)
+
+        if paginated:
+            paginator = MessageCursorPagination()
+            page = paginator.paginate_queryset(messages, request, view=self)
+            serializer = MessageSerializer(page, many=True, fields=fields)
+            response = paginator.get_paginated_response(serializer.data)
+        else:
+            serializer = MessageSerializer(messages, many=True, fields=fields)
+            response = Response(
+                {'messages': serializer.data}, status=status.HTTP_200_OK
+            )
+        return set_validators(response, etag, state['latest'])
 
-        # Get conversation history (last 10 messages for context)
-        messages_qs = conversation.messages.values('role', 'content').order_by(
-            '-created_at'
-        )[:10]
-        history = list(reversed(list(messages_qs)))
+    def post(self, request, pk):
+        question, metric_key = _chat_request(request)
 
-        try:
-            result = agent.chat(
-                run.run_id,
-                question,
-                conversation_history=history,
-                metric_key=metric_key,
+        if settings.AGENT_JOB_QUEUE:
+            conversation, question_message, history = _start_turn(
+                pk, request.user, question
             )
-        except agent.AgentServiceError as exc:
-            logger.warning(
-                'Agent chat failed for run %s: %s',
-                run.pk or run.run_id,
-                exc,
+            job = jobs.enqueue_turn(
+                conversation, question_message, history, metric_key
             )
             return Response(
-                {'detail': 'Unable to complete agent request.'},
-                status=status.HTTP_502_BAD_GATEWAY,
+                {'job_id': job.pk, 'status': job.status},
+                status=status.HTTP_202_ACCEPTED,
             )
 
-        # Save assistant message
-        assistant_message = Message.objects.create(
-            conversation=conversation,
-            role=Message.ROLE_ASSISTANT,
-            content=result.get('answer', ''),
-            citations=result.get('citations', []),
-            notes=result.get('notes', []),
-            metric_key=result.get('metric_key'),
-            confidence=result.get('confidence'),
-            confidence_explanation=result.get('confidence_explanation', ''),
-        )
-
-        # Return the saved message instead of raw result
-        serializer = MessageSerializer(assistant_message)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        try:
+            ticket = admission.acquire(request.user.pk)
+        except admission.AdmissionRejected as exc:
+            return _rejected_response(exc)
+
+        with tracing.trace('chat', run_pk=pk, user_id=request.user.pk):
+            with ticket:
+                conversation, _, history = _start_turn(
+                    pk, request.user, question
+                )
+                run = conversation.run
+                try:
+                    result = agent.chat(
+                        run.run_id,
+                        question,
+                        conversation_history=history,
+                        metric_key=metric_key,
+                        conversation_summary=conversation.summary,
+                    )
+                except agent.AgentServiceError as exc:
+                    logger.warning(
+                        'Agent chat failed for run %s: %s',
+                        run.pk or run.run_id,
+                        exc,
+                    )
+                    return _agent_error_response(exc)
+
+            assistant_message = conversations.save_answer(conversation, result)
+
+            # Return the saved message instead of raw result
+            serializer = MessageSerializer(assistant_message)
+            return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
         """Delete conversation history for a run."""
@@ -122,96 +276,122 @@ class RunAgentChatStreamView(APIView):
 
     def post(self, request, pk):
         """Stream agent chat responses with real-time progress."""
-        run = get_object_or_404(Run, pk=pk)
-        serializer = AgentChatRequestSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        question = serializer.validated_data['question']
-        metric_key = serializer.validated_data.get('metric_key')
-        if metric_key == '':
-            metric_key = None
+        question, metric_key = _chat_request(request)
 
-        # Get or create conversation
-        conversation, _ = Conversation.objects.get_or_create(
-            run=run, user=request.user
-        )
+        if settings.AGENT_JOB_QUEUE:
+            conversation, question_message, history = _start_turn(
+                pk, request.user, question
+            )
+            job = jobs.enqueue_turn(
+                conversation, question_message, history, metric_key
+            )
+            return _sse_response(_job_event_stream(job, cancel_on_close=True))
 
-        # Save user message
-        Message.objects.create(
-            conversation=conversation, role=Message.ROLE_USER, content=question
-        )
+        try:
+            ticket = admission.acquire(request.user.pk)
+        except admission.AdmissionRejected as exc:
+            return _rejected_response(exc)
 
-        # Get conversation history
-        messages_qs = conversation.messages.values('role', 'content').order_by(
-            '-created_at'
-        )[:10]
-        history = list(reversed(list(messages_qs)))
+        try:
+            conversation, question_message, history = _start_turn(
+                pk, request.user, question
+            )
+        except Exception:
+            ticket.release()
+            raise
+        run = conversation.run
+        cancel_event = threading.Event()
 
         def event_stream():
             """Generate Server-Sent Events stream."""
+            answered = False
+            events = agent.chat_stream(
+                run.run_id,
+                question,
+                conversation_history=history,
+                metric_key=metric_key,
+                conversation_summary=conversation.summary,
+                cancel_event=cancel_event,
+            )
             try:
-                # Stream progress updates from agent
-                for event in agent.chat_stream(
-                    run.run_id,
-                    question,
-                    conversation_history=history,
-                    metric_key=metric_key,
+                for event in with_heartbeats(
+                    events, settings.AGENT_SSE_HEARTBEAT_SECONDS
                 ):
-                    # Format as SSE
-                    yield f'data: {json.dumps(event)}\n\n'
+                    if event is None:
+                        yield HEARTBEAT
+                        continue
+
+                    yield sse(event)
 
                     # If this is the final answer, save it
                     if event.get('type') == 'answer':
-                        result = event.get('content', {})
-
-                        # Save assistant message
-                        assistant_message = Message.objects.create(
-                            conversation=conversation,
-                            role=Message.ROLE_ASSISTANT,
-                            content=result.get('answer', ''),
-                            citations=result.get('citations', []),
-                            notes=result.get('notes', []),
-                            metric_key=result.get('metric_key'),
-                            confidence=result.get('confidence'),
-                            confidence_explanation=result.get(
-                                'confidence_explanation', ''
-                            ),
+                        assistant_message = conversations.save_answer(
+                            conversation, event.get('content', {})
                         )
+                        answered = True
 
                         # Send message ID for frontend to update
-                        msg_id_event = {
-                            'type': 'message_id',
-                            'id': assistant_message.id,
-                        }
-                        yield f'data: {json.dumps(msg_id_event)}\n\n'
+                        yield sse(
+                            {'type': 'message_id', 'id': assistant_message.id}
+                        )
 
                 # Signal completion
-                yield 'data: [DONE]\n\n'
-
+                yield DONE
+
+            except GeneratorExit:
+                # The client went away; stop the graph at its next check
+                cancel_event.set()
+                if not answered:
+                    conversations.mark_cancelled(question_message)
+                raise
             except agent.AgentServiceError as exc:
                 logger.warning(
                     'Agent chat failed for run %s: %s',
                     run.pk or run.run_id,
                     exc,
                 )
-                error_event = {
-                    'type': 'error',
-                    'message': 'Unable to complete agent request.',
-                }
-                yield f'data: {json.dumps(error_event)}\n\n'
+                yield sse(agent.error_event(exc))
             except Exception:
                 logger.exception('Unexpected error during streaming chat')
-                error_event = {
-                    'type': 'error',
-                    'message': 'An unexpected error occurred.',
-                }
-                yield f'data: {json.dumps(error_event)}\n\n'
-
-        return StreamingHttpResponse(
-            event_stream(),
-            content_type='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'X-Accel-Buffering': 'no',
-            },
+                yield sse(
+                    {
+                        'type': 'error',
+                        'message': 'An unexpected error occurred.',
+                    }
+                )
+
+        # The slot is held until the response is closed
+        return _sse_response(
+            tracing.traced_stream(
+                event_stream,
+                'chat.stream',
+                run_id=run.run_id,
+                user_id=request.user.pk,
+            ),
+            ticket.release,
         )
+
+
+class RunAgentChatJobEventsView(APIView):
+    """Follow (or resume following) a queued chat turn's progress."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, job_pk):
+        job = get_object_or_404(
+            ChatJob.objects.select_related('question_message'),
+            pk=job_pk,
+            conversation__run_id=pk,
+            conversation__user=request.user,
+        )
+        after = request.headers.get(
+            'Last-Event-ID'
+        ) or request.query_params.get('after', 0)
+        try:
+            after = int(after)
+        except ValueError:
+            return Response(
+                {'detail': 'Invalid event id.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return _sse_response(_job_event_stream(job, after))
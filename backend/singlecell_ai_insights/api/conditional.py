@@ -0,0 +1,31 @@
+"""Helpers for conditional GET responses (ETag / Last-Modified)."""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def build_etag(*parts):
+    """Build a quoted ETag from cheap, DB-derived validator parts."""
+    raw = ':'.join(str(part) for part in parts)
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:32]
+    return quote_etag(digest)
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """Return a 304 response when the client copy is fresh, else None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified headers so clients can revalidate."""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Polled endpoints must be revalidated instead of served from cache
+    response['Cache-Control'] = 'private, no-cache'
+    return response
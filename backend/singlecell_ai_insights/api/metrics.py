@@ -0,0 +1,31 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission, IsAdminUser
+
+from singlecell_ai_insights.services import metrics
+
+
+class IsAdminOrMetricsScraper(BasePermission):
+    """Staff users, or a scraper presenting ``METRICS_TOKEN`` as a bearer."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        header = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(
+            header.encode(), f'Bearer {token}'.encode()
+        ):
+            return True
+        return IsAdminUser().has_permission(request, view)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrMetricsScraper])
+def metrics_view(request):
+    """Expose in-process metrics in the Prometheus text format."""
+    return HttpResponse(
+        metrics.REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
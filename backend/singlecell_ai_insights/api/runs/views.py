@@ -1,5 +1,12 @@
+import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -8,13 +15,93 @@ from rest_framework.response import Response
 
 from singlecell_ai_insights.aws import healthomics
 from singlecell_ai_insights.models.run import Run
-from singlecell_ai_insights.services.agent.config import REPORTS_BUCKET
-from singlecell_ai_insights.services.agent.tools import load_json_from_s3
+from singlecell_ai_insights.services import ingestion, metrics
+from singlecell_ai_insights.services.agent import AgentBusy, AgentServiceError
 
+from ..conditional import (
+    build_etag,
+    not_modified_response,
+    set_validators,
+)
 from .serializers import RunSerializer, RunSummarySerializer
 
 logger = logging.getLogger(__name__)
 
+HEALTHOMICS_SYNC_SECONDS = metrics.histogram(
+    'healthomics_sync_duration_seconds',
+    'Time to list HealthOmics runs and store them',
+    ['outcome'],
+)
+
+
+# Shared by the single and bulk metrics endpoints
+METRICS_UNAVAILABLE = 'MultiQC data not available for this run.'
+METRICS_EMPTY = 'No sample metrics found in MultiQC data.'
+METRICS_FAILED = 'Unable to load metrics from MultiQC data.'
+METRICS_PENDING = 'Metrics are still being loaded; retry shortly.'
+INGESTION_IN_PROGRESS = (Run.INGESTION_PENDING, Run.INGESTION_RUNNING)
+
+
+def _parse_pks(raw):
+    try:
+        return [int(value) for value in raw.split(',') if value.strip()]
+    except ValueError:
+        return None
+
+
+def _sync_runs(runs):
+    """
+    Store runs listed by HealthOmics, saving only those that changed.
+
+    Unchanged rows keep their ``updated_at``, so the list and metrics
+    validators survive a refresh that found nothing new.
+
+    Returns:
+        list of Run: The stored runs, in the order given
+    """
+    existing = Run.objects.in_bulk(
+        [run['run_id'] for run in runs], field_name='run_id'
+    )
+    synced = []
+    for run in runs:
+        fields = {
+            'name': run.get('name') or '',
+            'status': run.get('status') or '',
+            'pipeline': run.get('pipeline') or '',
+            'created_at': run.get('created_at'),
+            'started_at': run.get('started_at'),
+            'completed_at': run.get('completed_at'),
+            'output_dir_bucket': run.get('output_dir_bucket') or '',
+            'output_dir_key': run.get('output_dir_key') or '',
+        }
+        obj = existing.get(run['run_id'])
+        if obj is None:
+            fields['created_at'] = fields['created_at'] or timezone.now()
+            obj = Run.objects.create(run_id=run['run_id'], **fields)
+        else:
+            if fields['created_at'] is None:
+                del fields['created_at']
+            changed = [
+                name
+                for name, value in fields.items()
+                if getattr(obj, name) != value
+            ]
+            if changed:
+                for name in changed:
+                    setattr(obj, name, fields[name])
+                obj.save(update_fields=[*changed, 'updated_at'])
+        synced.append(obj)
+    return synced
+
+
+def _metrics_row(run, metrics=None, detail=None, pending=False):
+    row = {'pk': run.pk, 'run_id': run.run_id, 'metrics': metrics}
+    if detail:
+        row['detail'] = detail
+    if pending:
+        row['pending'] = True
+    return json.dumps(row)
+
 
 class RunViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Run.objects.all()
@@ -33,34 +120,37 @@ class RunViewSet(viewsets.ReadOnlyModelViewSet):
         )
 
         if should_refresh:
+            started = time.monotonic()
             try:
-                for run in healthomics.list_runs():
-                    Run.objects.update_or_create(
-                        run_id=run['run_id'],
-                        defaults={
-                            'name': run.get('name') or '',
-                            'status': run.get('status') or '',
-                            'pipeline': run.get('pipeline') or '',
-                            'created_at': run.get('created_at')
-                            or timezone.now(),
-                            'started_at': run.get('started_at'),
-                            'completed_at': run.get('completed_at'),
-                            'output_dir_bucket': (
-                                run.get('output_dir_bucket') or ''
-                            ),
-                            'output_dir_key': run.get('output_dir_key') or '',
-                        },
-                    )
+                for obj in _sync_runs(healthomics.list_runs()):
+                    # Warm parsed data once, as soon as a run completes
+                    if (
+                        obj.status == Run.STATUS_COMPLETED
+                        and not obj.ingestion_status
+                    ):
+                        ingestion.schedule_ingestion(obj)
             except healthomics.HealthOmicsClientError as exc:
+                HEALTHOMICS_SYNC_SECONDS.observe(
+                    time.monotonic() - started, outcome='error'
+                )
                 logger.warning('HealthOmics runs refresh failed: %s', exc)
                 return Response(
                     {'detail': 'Unable to retrieve runs from HealthOmics.'},
                     status=status.HTTP_502_BAD_GATEWAY,
                 )
+            HEALTHOMICS_SYNC_SECONDS.observe(
+                time.monotonic() - started, outcome='success'
+            )
 
         queryset = self.filter_queryset(self.get_queryset())
+        state = queryset.aggregate(count=Count('pk'), latest=Max('updated_at'))
+        etag = build_etag('runs', state['count'], state['latest'])
+        not_modified = not_modified_response(request, etag, state['latest'])
+        if not_modified:
+            return not_modified
+
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, state['latest'])
 
     @action(detail=True, methods=['get'], url_path='multiqc-report')
     def multiqc_report(self, request, pk=None):
@@ -77,73 +167,134 @@ class RunViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['get'])
     def metrics(self, request, pk=None):
         """Get summary metrics for a run (cached in DB)."""
-        run = self.get_object()
+        # Defer the JSON payload so revalidation never has to decode it
+        run = get_object_or_404(self.get_queryset().defer('metrics'), pk=pk)
+        etag = build_etag('run-metrics', run.pk, run.updated_at)
+        not_modified = not_modified_response(request, etag, run.updated_at)
+        if not_modified:
+            return not_modified
 
         # Return cached metrics if available
         if run.metrics:
-            return Response(run.metrics)
+            return set_validators(Response(run.metrics), etag, run.updated_at)
 
         # Check if run has MultiQC data
         if not run.output_dir_bucket or not run.output_dir_key:
             return Response(
-                {'detail': 'MultiQC data not available for this run.'},
+                {'detail': METRICS_UNAVAILABLE},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # Fetch and parse MultiQC data
-        try:
-            key = f'{run.run_id}/pubdir/multiqc/multiqc_data/multiqc_data.json'
-            data = load_json_from_s3(REPORTS_BUCKET, key)
-
-            # Extract key metrics
-            general_stats = data.get('report_general_stats_data', [])
-            if not general_stats:
+        # Ingest on a cold cache; the parsed data is reused by chat turns
+        if run.ingestion_status != Run.INGESTION_SUCCEEDED:
+            try:
+                ingestion.ingest_run(run.pk, attempts=1)
+            except AgentBusy as exc:
+                # Another worker is still ingesting it
+                response = Response(
+                    {'detail': METRICS_PENDING},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+                response['Retry-After'] = str(exc.retry_after)
+                return response
+            except AgentServiceError:
+                logger.exception(
+                    'Failed to load metrics for run %s', run.run_id
+                )
                 return Response(
-                    {'detail': 'No metrics found in MultiQC data.'},
-                    status=status.HTTP_404_NOT_FOUND,
+                    {'detail': METRICS_FAILED},
+                    status=status.HTTP_502_BAD_GATEWAY,
                 )
+            run.refresh_from_db(fields=['metrics', 'updated_at'])
+
+        if not run.metrics:
+            return Response(
+                {'detail': METRICS_EMPTY}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        return set_validators(
+            Response(run.metrics),
+            build_etag('run-metrics', run.pk, run.updated_at),
+            run.updated_at,
+        )
 
-            # Merge all dictionaries and filter out 'multiqc' entries
-            samples = {}
-            for stats_dict in general_stats:
-                for sample_name, sample_data in stats_dict.items():
-                    if sample_name.lower() != 'multiqc':
-                        samples[sample_name] = sample_data
+    @action(detail=False, methods=['get'], url_path='metrics')
+    def bulk_metrics(self, request):
+        """Stream cached metrics for many runs, fetching missing ones."""
+        queryset = self.filter_queryset(self.get_queryset())
 
-            if not samples:
+        raw_pks = request.query_params.get('pks')
+        if raw_pks:
+            pks = _parse_pks(raw_pks)
+            if pks is None:
                 return Response(
-                    {'detail': 'No sample metrics found in MultiQC data.'},
-                    status=status.HTTP_404_NOT_FOUND,
+                    {'detail': 'pks must be a comma-separated list of ids.'},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
+            queryset = queryset.filter(pk__in=pks)
+        run_status = request.query_params.get('status')
+        if run_status:
+            queryset = queryset.filter(status=run_status)
 
-            # Extract common metrics (adjust based on your MultiQC data)
-            metrics_summary = {
-                'total_samples': len(samples),
-                'samples': [],
-            }
-
-            # Add per-sample metrics
-            for sample_name, sample_data in samples.items():
-                metrics_summary['samples'].append(
-                    {
-                        'name': sample_name,
-                        'duplication_rate': sample_data.get(
-                            'percent_duplicates'
-                        ),
-                        'gc_content': sample_data.get('percent_gc'),
-                        'total_sequences': sample_data.get('total_sequences'),
-                    }
-                )
+        runs = list(queryset[: settings.BULK_METRICS_MAX_RUNS])
+
+        def stream():
+            yield '{"results": ['
+            separator = ''
+            missing = []
+            # Cached summaries come straight from the single query above
+            for run in runs:
+                if run.metrics:
+                    row = _metrics_row(run, run.metrics)
+                elif not run.output_dir_bucket or not run.output_dir_key:
+                    row = _metrics_row(run, detail=METRICS_UNAVAILABLE)
+                elif run.ingestion_status in INGESTION_IN_PROGRESS:
+                    # Background ingestion is downloading it already
+                    row = _metrics_row(
+                        run, detail=METRICS_PENDING, pending=True
+                    )
+                elif run.ingestion_status == Run.INGESTION_SUCCEEDED:
+                    row = _metrics_row(run, detail=METRICS_EMPTY)
+                else:
+                    missing.append(run)
+                    continue
+                yield separator + row
+                separator = ','
 
-            # Cache in database
-            run.metrics = metrics_summary
-            run.save(update_fields=['metrics'])
+            if missing:
+                # Workers only download and parse; rows are persisted here
+                # so DB access stays on the request thread
+                executor = ThreadPoolExecutor(
+                    max_workers=settings.BULK_METRICS_WORKERS,
+                    thread_name_prefix='bulk-metrics',
+                )
+                futures = {
+                    executor.submit(ingestion.fetch_parsed, run): run
+                    for run in missing
+                }
+                try:
+                    for future in as_completed(futures):
+                        run = futures[future]
+                        try:
+                            parsed, summary = future.result()
+                            ingestion.store_parsed(run, parsed, summary)
+                        except Exception:
+                            logger.exception(
+                                'Failed to load metrics for run %s',
+                                run.run_id,
+                            )
+                            row = _metrics_row(run, detail=METRICS_FAILED)
+                        else:
+                            row = _metrics_row(
+                                run,
+                                run.metrics,
+                                detail=None if run.metrics else METRICS_EMPTY,
+                            )
+                        yield separator + row
+                        separator = ','
+                finally:
+                    executor.shutdown(wait=False, cancel_futures=True)
 
-            return Response(metrics_summary)
+            yield ']}'
 
-        except Exception:
-            logger.exception('Failed to load metrics for run %s', run.run_id)
-            return Response(
-                {'detail': 'Unable to load metrics from MultiQC data.'},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
+        return StreamingHttpResponse(stream(), content_type='application/json')
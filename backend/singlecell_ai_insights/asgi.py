@@ -15,4 +15,12 @@ os.environ.setdefault(
     'DJANGO_SETTINGS_MODULE', 'singlecell_ai_insights.settings'
 )
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from singlecell_ai_insights.static import (  # noqa: E402
+    CollectedStaticFilesHandler,
+)
+
+# Static files are served before the (async-capable) middleware chain
+application = CollectedStaticFilesHandler(django_application)
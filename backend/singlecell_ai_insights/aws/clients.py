@@ -0,0 +1,52 @@
+"""Lazily created AWS and LangChain clients.
+
+boto3 and the LangChain Bedrock models are slow to import and build, and
+most processes (management commands, health checks, non-chat requests)
+never use them. :func:`lazy` returns a stand-in that builds the real
+object on first use, once, even when several threads race for it.
+"""
+
+import threading
+
+from django.utils.functional import LazyObject, SimpleLazyObject, empty
+
+
+class ThreadSafeLazyObject(SimpleLazyObject):
+    """:class:`SimpleLazyObject` whose factory runs at most once."""
+
+    def __init__(self, func):
+        # Set directly; LazyObject forwards other attribute writes
+        self.__dict__['_lock'] = threading.Lock()
+        super().__init__(func)
+
+    def _setup(self):
+        with self._lock:
+            if self._wrapped is empty:
+                super()._setup()
+
+
+def lazy(factory):
+    """
+    Wrap ``factory()`` so it runs on first attribute access.
+
+    The wrapper passes ``isinstance`` checks for the built object's type.
+    """
+    return ThreadSafeLazyObject(factory)
+
+
+def lazy_client(service_name, **kwargs):
+    """A boto3 client for ``service_name``, created on first use."""
+
+    def create():
+        import boto3
+
+        return boto3.session.Session().client(service_name, **kwargs)
+
+    return lazy(create)
+
+
+def build(*objects):
+    """Create lazily wrapped objects now, e.g. before forking workers."""
+    for obj in objects:
+        if isinstance(obj, LazyObject) and obj._wrapped is empty:
+            obj._setup()
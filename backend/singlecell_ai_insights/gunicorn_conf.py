@@ -0,0 +1,145 @@
+"""
+Gunicorn configuration for the web container.
+
+Usage: ``gunicorn --config python:singlecell_ai_insights.gunicorn_conf``
+
+The app is preloaded in the master, which then warms it up (graph,
+FAISS, LangChain, AWS clients) and freezes the heap before forking, so
+workers share those pages copy-on-write. Workers are sized from the CPU
+and memory the container may use and recycled after a jittered number
+of requests to contain FAISS and heap growth.
+
+Environment:
+    SERVER_MODE: ``wsgi`` (gthread workers) or ``asgi`` (uvicorn workers)
+    WEB_CONCURRENCY: Fixed worker count, instead of sizing
+    GUNICORN_THREADS: Threads per gthread worker
+    GUNICORN_PRELOAD: Preload and warm up in the master (default on)
+    GUNICORN_WARM_RUNS: Recent runs whose context warmup also loads
+    GUNICORN_WORKER_MEMORY_MIB: Memory to budget per worker
+    GUNICORN_MASTER_MEMORY_MIB: Memory kept back for the master
+    GUNICORN_MAX_REQUESTS: Requests before a worker is recycled
+    GUNICORN_MAX_REQUESTS_JITTER: Random extra requests per worker
+    GUNICORN_GRACEFUL_TIMEOUT: Seconds a recycled worker may finish in
+"""
+
+import gc
+import math
+import os
+
+MIB = 1024 * 1024
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def cpu_limit():
+    """CPUs available to the container, honouring a cgroup quota."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as handle:
+            quota, period = handle.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0))
+
+
+def memory_limit():
+    """Bytes of memory available to the container."""
+    for path in (
+        '/sys/fs/cgroup/memory.max',
+        '/sys/fs/cgroup/memory/memory.limit_in_bytes',
+    ):
+        try:
+            with open(path) as handle:
+                value = handle.read().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+
+def worker_count(cpus, memory_bytes, worker_mib, master_mib):
+    """
+    Workers that fit both the CPUs and the memory.
+
+    Workers mostly wait on S3 and Bedrock, so two per CPU keeps the CPUs
+    busy; each must also fit its memory budget next to the master.
+    """
+    by_cpu = 2 * cpus
+    by_memory = (memory_bytes // MIB - master_mib) // worker_mib
+    return max(1, min(by_cpu, by_memory))
+
+
+mode = os.getenv('SERVER_MODE', 'wsgi')
+
+bind = '0.0.0.0:8000'
+if mode == 'asgi':
+    wsgi_app = 'singlecell_ai_insights.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'singlecell_ai_insights.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+workers = int(
+    os.getenv('WEB_CONCURRENCY')
+    or worker_count(
+        cpu_limit(),
+        memory_limit(),
+        int(os.getenv('GUNICORN_WORKER_MEMORY_MIB', '384')),
+        int(os.getenv('GUNICORN_MASTER_MEMORY_MIB', '512')),
+    )
+)
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+WARM_RUNS = int(os.getenv('GUNICORN_WARM_RUNS', '0'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(
+    os.getenv('GUNICORN_MAX_REQUESTS_JITTER', str(max_requests // 10))
+)
+# Chat streams can run for minutes; let a recycled worker finish them
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '120'))
+worker_tmp_dir = '/dev/shm'
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+
+
+def _log_memory(log, message, *args):
+    from singlecell_ai_insights.services.warmup import process_memory
+
+    usage = process_memory()
+    if usage:
+        log.info(
+            message + ': rss %.0f MiB, pss %.0f MiB, uss %.0f MiB',
+            *args,
+            usage['rss'] / MIB,
+            usage['pss'] / MIB,
+            usage['uss'] / MIB,
+        )
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from singlecell_ai_insights.services.warmup import warm_up
+
+    warm_up(WARM_RUNS)
+    # Keep the collector from touching (and so copying) inherited objects
+    gc.freeze()
+    _log_memory(server.log, 'Master warmed up')
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        from singlecell_ai_insights.services.warmup import warm_up
+
+        warm_up(WARM_RUNS)
+    _log_memory(worker.log, 'Worker %s ready', worker.pid)
+
+
+def worker_exit(server, worker):
+    _log_memory(server.log, 'Worker %s exiting', worker.pid)
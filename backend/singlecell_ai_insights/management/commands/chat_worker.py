@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _run_threads(threads, poll_interval):
+    """Run ``threads`` job loops in this process until SIGTERM/SIGINT."""
+    import django
+
+    django.setup()
+    from singlecell_ai_insights.services import jobs
+
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    prefix = f'{socket.gethostname()}:{os.getpid()}'
+    workers = [
+        threading.Thread(
+            target=jobs.work,
+            args=(f'{prefix}:{index}', stop_event, poll_interval),
+            name=f'chat-worker-{index}',
+        )
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    # Wait in the main thread so signal handlers keep running
+    while any(worker.is_alive() for worker in workers):
+        stop_event.wait(1)
+    for worker in workers:
+        worker.join()
+
+
+class Command(BaseCommand):
+    help = 'Run agent workers that execute queued chat turns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.CHAT_WORKER_PROCESSES,
+            help='Worker processes to start',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=settings.CHAT_WORKER_THREADS,
+            help='Concurrent chat turns per process',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.AGENT_JOB_POLL_SECONDS,
+            help='Seconds to wait when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        threads = options['threads']
+        poll_interval = options['poll_interval']
+        self.stdout.write(
+            f'Starting {processes} chat worker process(es) '
+            f'x {threads} thread(s)'
+        )
+
+        if processes <= 1:
+            _run_threads(threads, poll_interval)
+            return
+
+        # Children open their own DB connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        children = [
+            context.Process(
+                target=_run_threads,
+                args=(threads, poll_interval),
+                name=f'chat-worker-process-{index}',
+            )
+            for index in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for child in children:
+            child.join()
+        self.stdout.write('Chat workers stopped')
@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import CookieJWTAuthentication
+from .services import profiling
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+
+def _requested_mode(request):
+    value = request.headers.get(PROFILE_HEADER) or request.GET.get(
+        PROFILE_PARAM
+    )
+    if not value or value.lower() in ('0', 'false'):
+        return None
+    value = value.lower()
+    return value if value in profiling.MODES else profiling.MODE_SAMPLING
+
+
+def _staff_user(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        # API clients authenticate with the JWT cookie, not the session
+        try:
+            result = CookieJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = result[0] if result else None
+    if user is None or not user.is_staff:
+        return None
+    return user
+
+
+class _ProfiledStream:
+    def __init__(self, stream, profiler, on_finish):
+        self._stream = stream
+        self._profiler = profiler
+        self._on_finish = on_finish
+
+    def __iter__(self):
+        iterator = iter(self._stream)
+        try:
+            while True:
+                with self._profiler.step():
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            self._on_finish()
+
+    def close(self):
+        self._on_finish()
+
+
+class _AsyncProfiledStream(_ProfiledStream):
+    def __aiter__(self):
+        return self._aiterate()
+
+    async def _aiterate(self):
+        iterator = self._stream.__aiter__()
+        try:
+            while True:
+                with self._profiler.step():
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                yield item
+        finally:
+            self._on_finish()
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when a staff user asks for it.
+
+    Send ``X-Profile: sampling`` (or ``deterministic``), or add
+    ``?profile=sampling``, to profile the request. Streaming responses
+    are profiled until the stream closes. The response carries
+    ``X-Profile-Id``; stored profiles are listed at ``/admin/profiles/``.
+
+    The middleware is hybrid, so async views keep running on the event
+    loop under ASGI; the deterministic profiler then records the loop
+    thread, other requests it serves meanwhile included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = self._mode(request)
+        profile = self._start(request, mode) if mode else None
+        if profile is None:
+            return self.get_response(request)
+
+        profiler, finish = profile
+        try:
+            with profiler.step():
+                response = self.get_response(request)
+        except BaseException:
+            finish()
+            raise
+        return self._attach(response, profiler, finish)
+
+    async def __acall__(self, request):
+        mode = self._mode(request)
+        profile = None
+        if mode:
+            # Identifying the user may query the database
+            profile = await sync_to_async(self._start)(request, mode)
+        if profile is None:
+            return await self.get_response(request)
+
+        profiler, finish = profile
+        try:
+            # The view runs on this (the loop) thread, so profile it here
+            with profiler.step():
+                response = await self.get_response(request)
+        except BaseException:
+            await sync_to_async(finish)()
+            raise
+        if response.streaming:
+            return self._attach(response, profiler, finish)
+        self._attach(response, profiler, None)
+        # Storing the profile writes files
+        await sync_to_async(finish)()
+        return response
+
+    @staticmethod
+    def _mode(request):
+        if not settings.PROFILING_ENABLED:
+            return None
+        return _requested_mode(request)
+
+    def _start(self, request, mode):
+        """
+        Start a profile for a staff user's request.
+
+        Returns:
+            tuple: ``(profiler, finish)``, or ``None`` if the request is
+            not profiled
+        """
+        user = _staff_user(request)
+        if user is None:
+            return None
+        profiler = profiling.start(mode)
+        if profiler is None:
+            return None
+
+        started = time.monotonic()
+        profiler.metadata = {
+            'method': request.method,
+            'path': request.path,
+            'user': user.get_username(),
+            'mode': mode,
+        }
+        lock = threading.Lock()
+        finished = []
+
+        def finish():
+            with lock:
+                if finished:
+                    return
+                finished.append(True)
+            profiler.metadata['duration_ms'] = round(
+                (time.monotonic() - started) * 1000, 1
+            )
+            try:
+                profiling.finish(profiler, profiler.metadata)
+            except OSError:
+                logger.exception('Unable to store profile')
+
+        return profiler, finish
+
+    def _attach(self, response, profiler, finish):
+        """
+        Record the response and finish the profile with its stream.
+
+        ``finish`` is called here for a regular response; pass ``None``
+        to finish it separately.
+        """
+        profiler.metadata['status'] = response.status_code
+        profiler.metadata['streaming'] = response.streaming
+        response[PROFILE_ID_HEADER] = profiler.profile_id
+        if not response.streaming:
+            if finish is not None:
+                finish()
+        elif response.is_async:
+            response.streaming_content = _AsyncProfiledStream(
+                response.streaming_content, profiler, finish
+            )
+        else:
+            response.streaming_content = _ProfiledStream(
+                response.streaming_content, profiler, finish
+            )
+        return response
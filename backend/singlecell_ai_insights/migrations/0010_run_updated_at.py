@@ -0,0 +1,22 @@
+# Generated by Django 4.2.24 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0009_add_message_confidence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
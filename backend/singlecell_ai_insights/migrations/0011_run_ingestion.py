@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0010_run_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='ingested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='ingestion_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='ingestion_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], max_length=16),
+        ),
+        migrations.CreateModel(
+            name='RunData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('samples', models.JSONField(default=dict)),
+                ('metric_meta', models.JSONField(default=dict)),
+                ('module_statuses', models.JSONField(default=dict)),
+                ('statistics', models.JSONField(default=dict)),
+                ('panels', models.JSONField(default=list)),
+                ('embeddings', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='parsed_data', to='singlecell_ai_insights.run')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0011_run_ingestion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='message_conversation_created'),
+        ),
+    ]
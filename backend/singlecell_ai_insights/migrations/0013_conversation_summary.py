@@ -0,0 +1,23 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0012_message_conversation_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='summarized_until',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='summary',
+            field=models.TextField(blank=True),
+        ),
+    ]
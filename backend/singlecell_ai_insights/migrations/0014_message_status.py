@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0013_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='status',
+            field=models.CharField(choices=[('complete', 'Complete'), ('cancelled', 'Cancelled')], default='complete', max_length=10),
+        ),
+    ]
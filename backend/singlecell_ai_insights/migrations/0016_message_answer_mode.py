@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0015_chat_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='answer_mode',
+            field=models.CharField(blank=True, choices=[('full', 'Full'), ('degraded', 'Degraded')], max_length=10),
+        ),
+    ]
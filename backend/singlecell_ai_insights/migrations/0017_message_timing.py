@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('singlecell_ai_insights', '0016_message_answer_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='timing',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
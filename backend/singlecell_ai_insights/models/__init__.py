@@ -1,5 +1,14 @@
+from .chat_job import ChatJob, ChatJobEvent
 from .conversation import Conversation, Message
-from .run import Run
+from .run import Run, RunData
 from .user import User
 
-__all__ = ['Conversation', 'Message', 'Run', 'User']
+__all__ = [
+    'ChatJob',
+    'ChatJobEvent',
+    'Conversation',
+    'Message',
+    'Run',
+    'RunData',
+    'User',
+]
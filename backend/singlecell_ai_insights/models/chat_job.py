@@ -0,0 +1,66 @@
+from django.db import models
+
+
+class ChatJob(models.Model):
+    """A chat turn queued for an agent worker process."""
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    FINISHED_STATUSES = [STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED]
+
+    conversation = models.ForeignKey(
+        'Conversation', on_delete=models.CASCADE, related_name='jobs'
+    )
+    question_message = models.ForeignKey(
+        'Message', on_delete=models.CASCADE, related_name='+'
+    )
+    # Snapshot taken at enqueue time, so the worker needs no history read
+    history = models.JSONField(default=list)
+    metric_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    worker = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'created_at'],
+                name='chatjob_status_created',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Chat job {self.pk} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+
+class ChatJobEvent(models.Model):
+    """A progress event published by a worker; its id is the SSE cursor."""
+
+    job = models.ForeignKey(
+        ChatJob, on_delete=models.CASCADE, related_name='events'
+    )
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
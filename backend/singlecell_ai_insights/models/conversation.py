@@ -11,6 +11,8 @@ class Conversation(models.Model):
         on_delete=models.CASCADE,
         related_name='conversations',
     )
+    summary = models.TextField(blank=True)
+    summarized_until = models.BigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -33,6 +35,20 @@ class Message(models.Model):
         (ROLE_ASSISTANT, 'Assistant'),
     ]
 
+    STATUS_COMPLETE = 'complete'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+
+    MODE_FULL = 'full'
+    MODE_DEGRADED = 'degraded'
+    MODE_CHOICES = [
+        (MODE_FULL, 'Full'),
+        (MODE_DEGRADED, 'Degraded'),
+    ]
+
     conversation = models.ForeignKey(
         Conversation, on_delete=models.CASCADE, related_name='messages'
     )
@@ -43,10 +59,30 @@ class Message(models.Model):
     metric_key = models.CharField(max_length=255, null=True, blank=True)
     confidence = models.IntegerField(null=True, blank=True)
     confidence_explanation = models.TextField(blank=True)
+    # A question whose answer was abandoned by the client is ``cancelled``
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_COMPLETE
+    )
+    # How the agent produced an answer; empty for questions
+    answer_mode = models.CharField(
+        max_length=10, choices=MODE_CHOICES, blank=True
+    )
+    # Per-turn accounting for answers: node wall times (ms), S3 bytes,
+    # embeddings, LLM calls and tokens, cache hits and misses
+    timing = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped when a message changes in place (e.g. cancelled), so history
+    # validators notice edits as well as new messages
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['conversation', 'created_at'],
+                name='message_conversation_created',
+            ),
+        ]
 
     def __str__(self):
         preview = self.content[:50]
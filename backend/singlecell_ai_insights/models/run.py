@@ -9,6 +9,19 @@ logger = logging.getLogger(__name__)
 
 
 class Run(models.Model):
+    STATUS_COMPLETED = 'COMPLETED'
+
+    INGESTION_PENDING = 'pending'
+    INGESTION_RUNNING = 'running'
+    INGESTION_SUCCEEDED = 'succeeded'
+    INGESTION_FAILED = 'failed'
+    INGESTION_CHOICES = [
+        (INGESTION_PENDING, 'Pending'),
+        (INGESTION_RUNNING, 'Running'),
+        (INGESTION_SUCCEEDED, 'Succeeded'),
+        (INGESTION_FAILED, 'Failed'),
+    ]
+
     run_id = models.CharField(max_length=128, unique=True)
     name = models.CharField(max_length=255, blank=True)
     status = models.CharField(max_length=64, blank=True)
@@ -19,6 +32,12 @@ class Run(models.Model):
     output_dir_bucket = models.CharField(max_length=255, blank=True)
     output_dir_key = models.CharField(max_length=512, blank=True)
     metrics = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    ingestion_status = models.CharField(
+        max_length=16, choices=INGESTION_CHOICES, blank=True
+    )
+    ingestion_error = models.TextField(blank=True)
+    ingested_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -26,6 +45,9 @@ class Run(models.Model):
     def __str__(self) -> str:
         return self.name or self.run_id
 
+    def get_multiqc_data_s3_key(self):
+        return f'{self.run_id}/pubdir/multiqc/multiqc_data/multiqc_data.json'
+
     def get_multiqc_report_s3_key(self):
         if not self.output_dir_key:
             return None
@@ -57,3 +79,20 @@ class Run(models.Model):
                 exc,
             )
             return None
+
+
+class RunData(models.Model):
+    run = models.OneToOneField(
+        Run, on_delete=models.CASCADE, related_name='parsed_data'
+    )
+    samples = models.JSONField(default=dict)
+    metric_meta = models.JSONField(default=dict)
+    module_statuses = models.JSONField(default=dict)
+    statistics = models.JSONField(default=dict)
+    panels = models.JSONField(default=list)
+    embeddings = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Parsed data for {self.run}'
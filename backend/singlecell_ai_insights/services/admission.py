@@ -0,0 +1,168 @@
+"""Admission control for agent turns run inside this process.
+
+Each chat turn holds a Bedrock-bound worker for tens of seconds. Limits
+are checked before the turn is stored: a user over their concurrent-turn
+limit is rejected at once (429), and once the process-wide in-flight cap
+is reached a bounded number of requests wait briefly for a slot before
+being turned away (503). Both carry ``Retry-After``.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+REASON_USER_LIMIT = 'user_limit'
+REASON_QUEUE_FULL = 'queue_full'
+REASON_QUEUE_TIMEOUT = 'queue_timeout'
+
+IN_FLIGHT = metrics.gauge(
+    'agent_admission_in_flight', 'Agent turns currently running'
+)
+QUEUE_DEPTH = metrics.gauge(
+    'agent_admission_queue_depth', 'Agent turns waiting for a slot'
+)
+ADMITTED = metrics.counter(
+    'agent_admission_admitted_total', 'Agent turns admitted'
+)
+REJECTED = metrics.counter(
+    'agent_admission_rejected_total',
+    'Agent turns rejected by admission control',
+    ['reason'],
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn may not start now."""
+
+    def __init__(self, reason, status_code, retry_after, detail):
+        super().__init__(detail)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class Ticket:
+    """A held agent slot; release it exactly once when the turn ends."""
+
+    def __init__(self, controller, user_id):
+        self._controller = controller
+        self._user_id = user_id
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._controller._release(self._user_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """Process-wide turn limits; reads its limits from settings per call."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._per_user = Counter()
+
+    def _reject(self, reason, status_code, detail):
+        REJECTED.inc(reason=reason)
+        logger.info('Rejected agent turn: %s', reason)
+        raise AdmissionRejected(
+            reason, status_code, settings.AGENT_RETRY_AFTER_SECONDS, detail
+        )
+
+    def _update_gauges(self):
+        IN_FLIGHT.set(self._in_flight)
+        QUEUE_DEPTH.set(self._waiting)
+
+    def acquire(self, user_id):
+        """
+        Claim a slot for a user's turn, waiting briefly if the process is full.
+
+        Args:
+            user_id: Key for the per-user limit
+
+        Returns:
+            Ticket: Release it when the turn finishes
+
+        Raises:
+            AdmissionRejected: If the turn may not start now
+        """
+        limit = settings.AGENT_MAX_IN_FLIGHT
+        with self._condition:
+            if self._per_user[user_id] >= settings.AGENT_MAX_TURNS_PER_USER:
+                self._reject(
+                    REASON_USER_LIMIT,
+                    429,
+                    'Too many chat requests in progress; '
+                    'wait for one to finish.',
+                )
+
+            if self._in_flight >= limit:
+                if self._waiting >= settings.AGENT_ADMISSION_QUEUE_SIZE:
+                    self._reject(
+                        REASON_QUEUE_FULL,
+                        503,
+                        'The assistant is busy; please retry shortly.',
+                    )
+                self._waiting += 1
+                self._per_user[user_id] += 1
+                self._update_gauges()
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._in_flight < limit,
+                        settings.AGENT_ADMISSION_WAIT_SECONDS,
+                    )
+                finally:
+                    self._waiting -= 1
+                if not admitted:
+                    self._drop_user(user_id)
+                    self._update_gauges()
+                    self._reject(
+                        REASON_QUEUE_TIMEOUT,
+                        503,
+                        'The assistant is busy; please retry shortly.',
+                    )
+            else:
+                self._per_user[user_id] += 1
+
+            self._in_flight += 1
+            self._update_gauges()
+        ADMITTED.inc()
+        return Ticket(self, user_id)
+
+    def _drop_user(self, user_id):
+        self._per_user[user_id] -= 1
+        if self._per_user[user_id] <= 0:
+            del self._per_user[user_id]
+
+    def _release(self, user_id):
+        with self._condition:
+            self._in_flight -= 1
+            self._drop_user(user_id)
+            self._update_gauges()
+            self._condition.notify()
+
+
+controller = AdmissionController()
+
+
+def acquire(user_id):
+    """Claim a slot on the process-wide controller."""
+    return controller.acquire(user_id)
@@ -1,6 +1,37 @@
 """Agent service for MultiQC chat functionality."""
 
-from .agent import chat, chat_stream
-from .exceptions import AgentServiceError
+import importlib
 
-__all__ = ['AgentServiceError', 'chat', 'chat_stream']
+from .exceptions import (
+    AgentBusy,
+    AgentCancelled,
+    AgentServiceError,
+    AgentTimeout,
+    AgentUnavailable,
+    error_event,
+)
+
+__all__ = [
+    'AgentBusy',
+    'AgentCancelled',
+    'AgentServiceError',
+    'AgentTimeout',
+    'AgentUnavailable',
+    'achat',
+    'achat_stream',
+    'chat',
+    'chat_stream',
+    'error_event',
+]
+
+# The entry points pull in LangGraph, LangChain and the node modules, so
+# they are only imported when first used
+_LAZY = {'achat', 'achat_stream', 'chat', 'chat_stream'}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module('.agent', __name__), name)
+    globals()[name] = value
+    return value
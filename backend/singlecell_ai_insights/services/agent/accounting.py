@@ -0,0 +1,114 @@
+"""Per-turn accounting: node wall time, S3 bytes, embeddings and tokens.
+
+A turn's :class:`TurnStats` lives in the graph state. Each node makes it
+the current stats object while it runs, so helpers deep in the call
+stack (S3 reads, Bedrock calls) can record into it without threading it
+through every signature; the context is copied onto the I/O pools.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from .. import metrics
+
+_current = contextvars.ContextVar('agent_turn_stats', default=None)
+
+CACHE_REQUESTS = metrics.counter(
+    'agent_cache_requests_total',
+    'Lookups of cached run data and embeddings, by result',
+    ['cache', 'result'],
+)
+
+_COUNTERS = (
+    's3_bytes',
+    'embeddings',
+    'llm_calls',
+    'input_tokens',
+    'output_tokens',
+    'cache_hits',
+    'cache_misses',
+)
+
+
+class TurnStats:
+    """Mutable, thread-safe accounting for a single chat turn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._nodes = {}
+        self._counters = dict.fromkeys(_COUNTERS, 0)
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def add_node(self, name, seconds):
+        with self._lock:
+            self._nodes[name] = self._nodes.get(name, 0) + seconds
+
+    def as_dict(self):
+        """
+        Compact summary stored on the answer ``Message``.
+
+        Returns:
+            dict: ``total_ms``, per-node ``nodes`` in milliseconds, and
+            the counters
+        """
+        with self._lock:
+            return {
+                'total_ms': round((time.monotonic() - self._started) * 1000),
+                'nodes': {
+                    name: round(seconds * 1000)
+                    for name, seconds in self._nodes.items()
+                },
+                **self._counters,
+            }
+
+
+def _record(name, amount=1):
+    stats = _current.get()
+    if stats is not None:
+        stats.add(name, amount)
+
+
+@contextmanager
+def node(state, name):
+    """Make the turn's stats current and time the enclosed node."""
+    stats = state.get('stats')
+    if stats is None:
+        yield
+        return
+    token = _current.set(stats)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        stats.add_node(name, time.monotonic() - started)
+        _current.reset(token)
+
+
+def record_s3_bytes(count):
+    _record('s3_bytes', count)
+
+
+def record_embeddings(count):
+    _record('embeddings', count)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+    _record('cache_hits' if hit else 'cache_misses')
+
+
+def record_llm_usage(message):
+    """Count a Bedrock call (or streamed chunk) and its reported tokens."""
+    usage = getattr(message, 'usage_metadata', None) or {}
+    _record('input_tokens', usage.get('input_tokens', 0))
+    _record('output_tokens', usage.get('output_tokens', 0))
+
+
+def record_llm_call():
+    _record('llm_calls')
@@ -1,16 +1,104 @@
 """Main agent interface."""
 
 import logging
+from contextlib import asynccontextmanager, contextmanager
 
 from botocore.exceptions import BotoCoreError, ClientError
 
+from .accounting import TurnStats
+from .degradation import MODE_FULL, current_mode
 from .exceptions import AgentServiceError
 from .graph import APP_GRAPH, build_streaming_graph
+from .progress import NODE_STATUS
+from .resilience import new_deadline
 
 logger = logging.getLogger(__name__)
 
 
-def chat(run_id, question, conversation_history=None, metric_key=None):
+def _initial_state(
+    run_id,
+    question,
+    conversation_history,
+    metric_key,
+    conversation_summary,
+    cancel_event=None,
+):
+    state = {
+        'run_id': run_id,
+        'question': question,
+        'conversation_history': conversation_history or [],
+        'conversation_summary': conversation_summary or '',
+        'mode': current_mode(),
+        'deadline': new_deadline(),
+        'stats': TurnStats(),
+    }
+    if metric_key:
+        state['metric_key'] = metric_key
+    if cancel_event is not None:
+        state['cancel_event'] = cancel_event
+    return state
+
+
+def _build_result(final_state):
+    stats = final_state.get('stats')
+    return {
+        'answer': final_state.get('answer', ''),
+        'citations': final_state.get('citations', []),
+        'metric_key': final_state.get('metric_key'),
+        'notes': final_state.get('notes', []),
+        'confidence': final_state.get('confidence'),
+        'confidence_explanation': final_state.get(
+            'confidence_explanation', ''
+        ),
+        'mode': final_state.get('mode', MODE_FULL),
+        'timing': stats.as_dict() if stats else {},
+    }
+
+
+def _status_event(node_name):
+    status = NODE_STATUS.get(node_name)
+    if status is None:
+        return None
+    step, message = status
+    return {'type': 'status', 'step': step, 'message': message}
+
+
+def _wrap_error(exc):
+    """Translate unexpected failures into ``AgentServiceError``."""
+    if isinstance(exc, (BotoCoreError, ClientError)):
+        logger.exception('AWS error while running MultiQC chat')
+        return AgentServiceError('AWS request failed during MultiQC chat')
+    logger.exception('Unexpected error during MultiQC chat')
+    return AgentServiceError('Unexpected error during MultiQC chat')
+
+
+@contextmanager
+def _agent_errors():
+    try:
+        yield
+    except AgentServiceError:
+        raise
+    except Exception as exc:
+        raise _wrap_error(exc) from exc
+
+
+@asynccontextmanager
+async def _async_agent_errors():
+    try:
+        yield
+    except AgentServiceError:
+        raise
+    except Exception as exc:
+        raise _wrap_error(exc) from exc
+
+
+def chat(
+    run_id,
+    question,
+    conversation_history=None,
+    metric_key=None,
+    conversation_summary='',
+):
     """
     Chat with the agent about a MultiQC run.
 
@@ -19,45 +107,36 @@ def chat(run_id, question, conversation_history=None, metric_key=None):
         question: User's question
         conversation_history: Optional list of previous messages
         metric_key: Optional metric key to focus on
+        conversation_summary: Rolling summary of older turns
 
     Returns:
-        dict with answer, citations, metric_key, notes
+        dict with answer, citations, metric_key, notes, and the ``mode``
+        (full or degraded) that produced the answer
 
     Raises:
         AgentServiceError: If any error occurs during processing
     """
-    try:
-        state = {
-            'run_id': run_id,
-            'question': question,
-            'conversation_history': conversation_history or [],
-        }
-        if metric_key:
-            state['metric_key'] = metric_key
-
+    with _agent_errors():
+        state = _initial_state(
+            run_id,
+            question,
+            conversation_history,
+            metric_key,
+            conversation_summary,
+        )
         result = APP_GRAPH.invoke(state)
-    except AgentServiceError:
-        raise
-    except (BotoCoreError, ClientError) as exc:
-        logger.exception('AWS error while running MultiQC chat')
-        raise AgentServiceError(
-            'AWS request failed during MultiQC chat'
-        ) from exc
-    except Exception as exc:
-        logger.exception('Unexpected error during MultiQC chat')
-        raise AgentServiceError(
-            'Unexpected error during MultiQC chat'
-        ) from exc
 
-    return {
-        'answer': result.get('answer', ''),
-        'citations': result.get('citations', []),
-        'metric_key': result.get('metric_key'),
-        'notes': result.get('notes', []),
-    }
+    return _build_result(result)
 
 
-def chat_stream(run_id, question, conversation_history=None, metric_key=None):
+def chat_stream(
+    run_id,
+    question,
+    conversation_history=None,
+    metric_key=None,
+    conversation_summary='',
+    cancel_event=None,
+):
     """
     Stream agent chat responses with progress updates.
 
@@ -66,92 +145,111 @@ def chat_stream(run_id, question, conversation_history=None, metric_key=None):
         question: User's question
         conversation_history: Optional list of previous messages
         metric_key: Optional metric key to focus on
+        conversation_summary: Rolling summary of older turns
+        cancel_event: Optional ``threading.Event``; once set, the turn
+            stops before the next node or streamed token
 
     Yields:
         dict: Progress updates and final result
 
     Raises:
         AgentServiceError: If any error occurs during processing
+        AgentCancelled: If ``cancel_event`` was set before completion
     """
-    try:
-        state = {
-            'run_id': run_id,
-            'question': question,
-            'conversation_history': conversation_history or [],
-        }
-        if metric_key:
-            state['metric_key'] = metric_key
+    with _agent_errors():
+        state = _initial_state(
+            run_id,
+            question,
+            conversation_history,
+            metric_key,
+            conversation_summary,
+            cancel_event,
+        )
 
         # Build streaming graph that yields progress
         streaming_graph = build_streaming_graph()
 
-        # Stream through each node execution
-        for event in streaming_graph.stream(state):
-            # event is a dict with node name as key
-            node_name = next(iter(event.keys()))
-            node_state = event[node_name]
-
-            # Emit progress based on node
-            if node_name == 'load_multiqc':
-                yield {
-                    'type': 'status',
-                    'step': 'load',
-                    'message': 'Loading MultiQC data from S3...',
-                }
-            elif node_name == 'ensure_index':
-                yield {
-                    'type': 'status',
-                    'step': 'index',
-                    'message': 'Building vector index for semantic search...',
-                }
-            elif node_name in ['lookup_samples', 'lookup_metric', 'rag']:
-                yield {
-                    'type': 'status',
-                    'step': 'analyze',
-                    'message': 'Analyzing question and retrieving context...',
-                }
-            elif node_name == 'make_table':
-                yield {
-                    'type': 'status',
-                    'step': 'table',
-                    'message': 'Selecting relevant data tables...',
-                }
-            elif node_name == 'plot_metric':
-                yield {
-                    'type': 'status',
-                    'step': 'plot',
-                    'message': 'Selecting relevant visualizations...',
-                }
-            elif node_name == 'synthesize':
-                yield {
-                    'type': 'status',
-                    'step': 'synthesize',
-                    'message': 'Generating answer...',
-                }
-
-        # Get final result
-        final_state = node_state
-
-        # Yield final answer
-        yield {
-            'type': 'answer',
-            'content': {
-                'answer': final_state.get('answer', ''),
-                'citations': final_state.get('citations', []),
-                'metric_key': final_state.get('metric_key'),
-                'notes': final_state.get('notes', []),
-            },
-        }
+        # Each event maps the node that ran to the keys it changed
+        final_state = dict(state)
+        for event in streaming_graph.stream(state, stream_mode='updates'):
+            for node_name, update in event.items():
+                final_state.update(update or {})
+                status_event = _status_event(node_name)
+                if status_event:
+                    yield status_event
+
+        result = _build_result(final_state)
+        yield {'type': 'answer', 'content': result}
+        yield {'type': 'timing', 'timing': result['timing']}
+
+
+async def achat(
+    run_id,
+    question,
+    conversation_history=None,
+    metric_key=None,
+    conversation_summary='',
+):
+    """
+    Async variant of :func:`chat` built on the graph's ``ainvoke``.
 
-    except AgentServiceError:
-        raise
-    except (BotoCoreError, ClientError) as exc:
-        logger.exception('AWS error while running MultiQC chat')
-        raise AgentServiceError(
-            'AWS request failed during MultiQC chat'
-        ) from exc
-    except Exception as exc:
-        logger.exception('Unexpected error during MultiQC chat')
-        raise AgentServiceError(
-            'Unexpected error during MultiQC chat'
-        ) from exc
+    Blocking Bedrock/S3 work runs on the agent I/O pool, so the event
+    loop can keep hundreds of conversations in flight.
+
+    Raises:
+        AgentServiceError: If any error occurs during processing
+    """
+    async with _async_agent_errors():
+        state = _initial_state(
+            run_id,
+            question,
+            conversation_history,
+            metric_key,
+            conversation_summary,
+        )
+        result = await APP_GRAPH.ainvoke(state)
+
+    return _build_result(result)
+
+
+async def achat_stream(
+    run_id,
+    question,
+    conversation_history=None,
+    metric_key=None,
+    conversation_summary='',
+    cancel_event=None,
+):
+    """
+    Async variant of :func:`chat_stream` built on the graph's ``astream``.
+
+    Cancelling the consuming task stops the graph; ``cancel_event`` also
+    stops work already running on the I/O pool.
+
+    Yields:
+        dict: Progress updates and final result
+
+    Raises:
+        AgentServiceError: If any error occurs during processing
+    """
+    async with _async_agent_errors():
+        state = _initial_state(
+            run_id,
+            question,
+            conversation_history,
+            metric_key,
+            conversation_summary,
+            cancel_event,
+        )
+
+        final_state = dict(state)
+        async for event in APP_GRAPH.astream(state, stream_mode='updates'):
+            for node_name, update in event.items():
+                final_state.update(update or {})
+                status_event = _status_event(node_name)
+                if status_event:
+                    yield status_event
+
+        result = _build_result(final_state)
+        yield {'type': 'answer', 'content': result}
+        yield {'type': 'timing', 'timing': result['timing']}
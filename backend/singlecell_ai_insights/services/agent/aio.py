@@ -0,0 +1,56 @@
+"""Helpers for running the blocking agent steps from async code."""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import ASYNC_IO_THREADS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=ASYNC_IO_THREADS,
+                    thread_name_prefix='agent-io',
+                )
+    return _executor
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Run a blocking call on the agent I/O pool without blocking the loop.
+
+    botocore has no async transport, so Bedrock and S3 calls still hold a
+    thread while they wait; a dedicated pool keeps them from exhausting
+    the loop's default executor.
+
+    Args:
+        fn: Blocking callable
+        *args: Positional arguments for ``fn``
+        **kwargs: Keyword arguments for ``fn``
+
+    Returns:
+        The return value of ``fn``
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+
+def offloaded(fn):
+    """Wrap a sync graph node so ``ainvoke`` runs it on the I/O pool."""
+
+    @functools.wraps(fn)
+    async def wrapper(state):
+        return await run_blocking(fn, state)
+
+    return wrapper
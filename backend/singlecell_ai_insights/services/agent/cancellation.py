@@ -0,0 +1,18 @@
+"""Cooperative cancellation for agent turns abandoned by the client."""
+
+from .exceptions import AgentCancelled
+
+
+def check_cancelled(state):
+    """
+    Stop the turn if its ``cancel_event`` has been set.
+
+    Checked before every graph node and between streamed LLM tokens, so an
+    abandoned turn stops spending Bedrock calls at the next safe point.
+
+    Raises:
+        AgentCancelled: If the turn was cancelled
+    """
+    cancel_event = state.get('cancel_event')
+    if cancel_event is not None and cancel_event.is_set():
+        raise AgentCancelled('Chat turn cancelled by the client')
@@ -2,9 +2,7 @@
 
 import os
 
-import boto3
-from botocore.config import Config
-from langchain_aws import BedrockEmbeddings, ChatBedrock
+from ...aws.clients import lazy
 
 # Use non-interactive backend for matplotlib
 os.environ.setdefault('MPLBACKEND', 'Agg')
@@ -21,26 +19,96 @@ REPORTS_BUCKET = os.environ['REPORTS_BUCKET']
 DUP_THRESH = 0.7
 MAPPED_MIN = 1e6
 
+# Documents retrieved per turn, after fusing BM25 and vector rankings
+RAG_K = 4
 
-# Configure boto3 client with retry settings
-bedrock_config = Config(
-    retries={'max_attempts': 10, 'mode': 'adaptive'},
-    read_timeout=300,
-)
+# Conversation memory: prompt history stays within this budget
+HISTORY_TOKEN_BUDGET = 600
+SUMMARY_MAX_WORDS = 150
+CHARS_PER_TOKEN = 4
+
+# Runs whose parsed data and search index each process keeps in memory
+CONTEXT_CACHE_SIZE = int(os.getenv('AGENT_CONTEXT_CACHE_SIZE', '8'))
+
+# Threads for blocking Bedrock/S3 calls made from the async chat path
+ASYNC_IO_THREADS = int(os.getenv('AGENT_ASYNC_IO_THREADS', '256'))
 
-bedrock_client = boto3.client(
-    'bedrock-runtime', region_name=AWS_REGION, config=bedrock_config
+# Degraded mode: entered when Bedrock latency or the admission queue is
+# above these, left once both fall below RECOVERY_RATIO of them
+DEGRADE_LATENCY_SECONDS = float(
+    os.getenv('AGENT_DEGRADE_LATENCY_SECONDS', '20')
 )
+DEGRADE_QUEUE_DEPTH = int(os.getenv('AGENT_DEGRADE_QUEUE_DEPTH', '4'))
+DEGRADE_RECOVERY_RATIO = float(
+    os.getenv('AGENT_DEGRADE_RECOVERY_RATIO', '0.5')
+)
+# Weight of the newest sample in the Bedrock latency moving average
+DEGRADE_LATENCY_SMOOTHING = 0.3
+DEGRADED_MAX_TOKENS = int(os.getenv('AGENT_DEGRADED_MAX_TOKENS', '1024'))
+
 
-# LangChain/LangGraph with custom client
-llm = ChatBedrock(
-    model_id=BEDROCK_MODEL_ID,
-    client=bedrock_client,
-    model_kwargs={
-        'max_tokens': 4096,
-        'temperature': 0.7,
-    },
+# Latency budgets (seconds): the whole turn, and each Bedrock-bound step
+TURN_DEADLINE_SECONDS = float(os.getenv('AGENT_TURN_DEADLINE_SECONDS', '120'))
+SELECTION_BUDGET_SECONDS = float(
+    os.getenv('AGENT_SELECTION_BUDGET_SECONDS', '10')
 )
-emb = BedrockEmbeddings(
-    model_id=BEDROCK_EMBED_MODEL_ID, region_name=AWS_REGION
+EMBEDDING_BUDGET_SECONDS = float(
+    os.getenv('AGENT_EMBEDDING_BUDGET_SECONDS', '20')
+)
+SYNTHESIS_BUDGET_SECONDS = float(
+    os.getenv('AGENT_SYNTHESIS_BUDGET_SECONDS', '90')
+)
+# Rolling-summary refreshes run after the turn, outside its deadline
+SUMMARY_BUDGET_SECONDS = float(os.getenv('AGENT_SUMMARY_BUDGET_SECONDS', '30'))
+# Start a second artifact-selection call if the first is this slow (0: off)
+SELECTION_HEDGE_SECONDS = float(
+    os.getenv('AGENT_SELECTION_HEDGE_SECONDS', '0')
+)
+
+# Circuit breaker: fail fast after this many consecutive Bedrock errors
+BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv('AGENT_BREAKER_FAILURE_THRESHOLD', '5')
 )
+BREAKER_RESET_SECONDS = float(os.getenv('AGENT_BREAKER_RESET_SECONDS', '30'))
+
+
+def _make_llm():
+    import boto3
+    from botocore.config import Config
+    from langchain_aws import ChatBedrock
+
+    # Retry settings; the budgets above bound the whole call, so keep
+    # botocore from retrying far past them
+    bedrock_config = Config(
+        retries={
+            'max_attempts': int(os.getenv('BEDROCK_MAX_ATTEMPTS', '3')),
+            'mode': 'adaptive',
+        },
+        connect_timeout=5,
+        read_timeout=int(os.getenv('BEDROCK_READ_TIMEOUT_SECONDS', '60')),
+    )
+    bedrock_client = boto3.session.Session().client(
+        'bedrock-runtime', region_name=AWS_REGION, config=bedrock_config
+    )
+    return ChatBedrock(
+        model_id=BEDROCK_MODEL_ID,
+        client=bedrock_client,
+        model_kwargs={
+            'max_tokens': 4096,
+            'temperature': 0.7,
+        },
+    )
+
+
+def _make_embeddings():
+    from langchain_aws import BedrockEmbeddings
+
+    return BedrockEmbeddings(
+        model_id=BEDROCK_EMBED_MODEL_ID, region_name=AWS_REGION
+    )
+
+
+# LangChain/LangGraph clients, built on first use so that importing the
+# agent package (and starting the web process) stays cheap
+llm = lazy(_make_llm)
+emb = lazy(_make_embeddings)
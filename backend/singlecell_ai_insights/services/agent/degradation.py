@@ -0,0 +1,119 @@
+"""Load-aware switch between full and degraded answering.
+
+Under pressure a turn answers with less: deterministic artifact picks
+instead of an LLM selection call, no vector index for routes that never
+search it, and a smaller synthesis prompt and token limit. The mode is
+chosen once per turn from the Bedrock latency average and the admission
+queue depth, with hysteresis so it does not flap around a threshold.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from .. import admission, metrics
+from .config import (
+    DEGRADE_LATENCY_SECONDS,
+    DEGRADE_LATENCY_SMOOTHING,
+    DEGRADE_QUEUE_DEPTH,
+    DEGRADE_RECOVERY_RATIO,
+)
+
+logger = logging.getLogger(__name__)
+
+MODE_FULL = 'full'
+MODE_DEGRADED = 'degraded'
+
+DEGRADED = metrics.gauge(
+    'agent_degraded',
+    'Whether new turns run in degraded mode (1) or not',
+    multiprocess_mode=metrics.GAUGE_MAX,
+)
+TURNS = metrics.counter(
+    'agent_turns_total', 'Agent turns started, by answer mode', ['mode']
+)
+
+
+class LoadPolicy:
+    """Tracks Bedrock latency and picks the mode for new turns."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = None
+        self._degraded = False
+
+    def record_latency(self, seconds):
+        """Fold one Bedrock call duration into the moving average."""
+        with self._lock:
+            if self._latency is None:
+                self._latency = seconds
+            else:
+                self._latency += DEGRADE_LATENCY_SMOOTHING * (
+                    seconds - self._latency
+                )
+
+    def reset(self):
+        with self._lock:
+            self._latency = None
+            self._degraded = False
+        DEGRADED.set(0)
+
+    def mode(self):
+        """
+        Decide the mode for a turn starting now.
+
+        Returns:
+            str: ``MODE_FULL`` or ``MODE_DEGRADED``
+        """
+        queue_depth = admission.QUEUE_DEPTH.value()
+        with self._lock:
+            latency = self._latency or 0.0
+            if self._degraded:
+                ratio = DEGRADE_RECOVERY_RATIO
+                self._degraded = (
+                    latency >= DEGRADE_LATENCY_SECONDS * ratio
+                    or queue_depth >= DEGRADE_QUEUE_DEPTH * ratio
+                )
+                changed = not self._degraded
+            else:
+                self._degraded = (
+                    latency >= DEGRADE_LATENCY_SECONDS
+                    or queue_depth >= DEGRADE_QUEUE_DEPTH
+                )
+                changed = self._degraded
+            degraded = self._degraded
+
+        if changed:
+            logger.warning(
+                'Agent %s degraded mode (latency %.1fs, queue depth %s)',
+                'entering' if degraded else 'leaving',
+                latency,
+                queue_depth,
+            )
+        DEGRADED.set(int(degraded))
+        mode = MODE_DEGRADED if degraded else MODE_FULL
+        TURNS.inc(mode=mode)
+        return mode
+
+
+policy = LoadPolicy()
+
+
+def current_mode():
+    """Mode for a turn starting now on the process-wide policy."""
+    return policy.mode()
+
+
+def is_degraded(state):
+    return state.get('mode') == MODE_DEGRADED
+
+
+@contextmanager
+def timed_llm_call():
+    """Record how long the enclosed Bedrock call took."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        policy.record_latency(time.monotonic() - started)
@@ -3,3 +3,79 @@
 
 class AgentServiceError(RuntimeError):
     """Domain error raised for agent-related failures."""
+
+    code = 'agent_error'
+    status_code = 502
+    public_message = 'Unable to complete agent request.'
+    retryable = False
+
+
+class AgentCancelled(AgentServiceError):
+    """Raised when the client abandoned the turn before it finished."""
+
+    code = 'cancelled'
+
+
+class AgentTimeout(AgentServiceError):
+    """Raised when a node's latency budget or the turn deadline runs out."""
+
+    code = 'timeout'
+    status_code = 504
+    public_message = 'The assistant took too long to answer; please retry.'
+    retryable = True
+
+    def __init__(self, message, stage=None):
+        super().__init__(message)
+        self.stage = stage
+
+
+class AgentUnavailable(AgentServiceError):
+    """Raised without calling Bedrock while its circuit breaker is open."""
+
+    code = 'unavailable'
+    status_code = 503
+    public_message = (
+        'The assistant is temporarily unavailable; please retry shortly.'
+    )
+    retryable = True
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AgentBusy(AgentServiceError):
+    """Raised when identical work elsewhere did not finish in time."""
+
+    code = 'busy'
+    status_code = 503
+    public_message = 'The run is still being prepared; please retry shortly.'
+    retryable = True
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def error_event(exc):
+    """
+    Build the structured SSE ``error`` event for an agent failure.
+
+    Args:
+        exc: The ``AgentServiceError`` that ended the turn
+
+    Returns:
+        dict: Event with ``code``, ``message`` and ``retryable``, plus the
+        timed-out ``stage`` or ``retry_after`` seconds when known
+    """
+    event = {
+        'type': 'error',
+        'code': exc.code,
+        'message': exc.public_message,
+        'retryable': exc.retryable,
+    }
+    if getattr(exc, 'stage', None):
+        event['stage'] = exc.stage
+    if getattr(exc, 'retry_after', None) is not None:
+        event['retry_after'] = exc.retry_after
+    return event
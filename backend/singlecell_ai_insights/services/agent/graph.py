@@ -1,8 +1,16 @@
 """LangGraph workflow definition."""
 
+import functools
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, START, StateGraph
 
+from .. import metrics, tracing
+from . import accounting
+from .aio import offloaded
+from .cancellation import check_cancelled
 from .nodes import (
+    aload_multiqc,
     ensure_index,
     load_multiqc,
     lookup_metric,
@@ -13,19 +21,69 @@ from .nodes import (
     route_intent,
     synthesize,
 )
+from .resilience import check_deadline
+from .state import AgentState
+
+NODE_SECONDS = metrics.histogram(
+    'agent_node_duration_seconds', 'Wall time of agent graph nodes', ['node']
+)
+
+
+def _cancellable(func, name):
+    @functools.wraps(func)
+    def wrapper(state):
+        check_cancelled(state)
+        check_deadline(state, name)
+        with (
+            accounting.node(state, name),
+            NODE_SECONDS.time(node=name),
+            tracing.span(f'node.{name}'),
+        ):
+            return func(state)
+
+    return wrapper
+
+
+def _acancellable(afunc, name):
+    @functools.wraps(afunc)
+    async def wrapper(state):
+        check_cancelled(state)
+        check_deadline(state, name)
+        with (
+            accounting.node(state, name),
+            NODE_SECONDS.time(node=name),
+            tracing.span(f'node.{name}'),
+        ):
+            return await afunc(state)
+
+    return wrapper
+
+
+def _node(func, afunc=None):
+    """
+    Wrap a node so ``invoke`` runs it inline and ``ainvoke`` awaits it.
+
+    Nodes without a native async variant run on the agent I/O pool. Every
+    node first checks whether the turn was cancelled or is out of time,
+    and its wall time is added to the turn's stats.
+    """
+    name = func.__name__
+    func = _cancellable(func, name)
+    afunc = _acancellable(afunc, name) if afunc else offloaded(func)
+    return RunnableLambda(func, afunc=afunc, name=name)
 
 
 def build_graph():
     """Build and compile the agent workflow graph."""
-    graph = StateGraph(dict)
-    graph.add_node('load_multiqc', load_multiqc)
-    graph.add_node('ensure_index', ensure_index)
-    graph.add_node('lookup_samples', lookup_samples)
-    graph.add_node('lookup_metric', lookup_metric)
-    graph.add_node('rag', rag)
-    graph.add_node('make_table', make_table)
-    graph.add_node('plot_metric', plot_metric)
-    graph.add_node('synthesize', synthesize)
+    graph = StateGraph(AgentState)
+    graph.add_node('load_multiqc', _node(load_multiqc, aload_multiqc))
+    graph.add_node('ensure_index', _node(ensure_index))
+    graph.add_node('lookup_samples', _node(lookup_samples))
+    graph.add_node('lookup_metric', _node(lookup_metric))
+    graph.add_node('rag', _node(rag))
+    graph.add_node('make_table', _node(make_table))
+    graph.add_node('plot_metric', _node(plot_metric))
+    graph.add_node('synthesize', _node(synthesize))
 
     graph.add_edge(START, 'load_multiqc')
     graph.add_edge('load_multiqc', 'ensure_index')
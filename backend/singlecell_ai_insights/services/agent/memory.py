@@ -0,0 +1,95 @@
+"""Rolling conversation memory that keeps prompt history bounded."""
+
+from .config import (
+    CHARS_PER_TOKEN,
+    HISTORY_TOKEN_BUDGET,
+    SUMMARY_BUDGET_SECONDS,
+    SUMMARY_MAX_WORDS,
+    llm,
+)
+from .resilience import STAGE_SUMMARY, bedrock_call
+
+
+def _truncate(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    return text[: max(max_chars - 3, 0)] + '...'
+
+
+def build_history_context(summary, history, budget_tokens=None):
+    """
+    Render conversation memory for the prompt within a token budget.
+
+    The rolling summary gets at most half the budget; the rest is filled
+    with the most recent messages, newest first, so the prompt size does
+    not grow with the length of the conversation.
+
+    Args:
+        summary: Rolling summary of older turns (may be empty)
+        history: Messages not yet folded into the summary, the current
+            question last
+        budget_tokens: Approximate token budget (default from config)
+
+    Returns:
+        str: History block for the prompt, empty if there is none
+    """
+    if budget_tokens is None:
+        budget_tokens = HISTORY_TOKEN_BUDGET
+    remaining = budget_tokens * CHARS_PER_TOKEN
+
+    blocks = []
+    if summary:
+        summary_text = _truncate(summary, remaining // 2)
+        blocks.append(f'SUMMARY OF EARLIER CONVERSATION: {summary_text}')
+        remaining -= len(summary_text)
+
+    # The current question is sent separately
+    recent = []
+    for msg in reversed(history[:-1]):
+        if remaining <= 0:
+            break
+        role = msg.get('role', 'unknown').upper()
+        line = _truncate(f'{role}: {msg.get("content", "")}', remaining)
+        recent.append(line)
+        remaining -= len(line)
+
+    blocks.extend(reversed(recent))
+    return '\n'.join(blocks)
+
+
+def summarize_conversation(previous_summary, messages):
+    """
+    Fold older messages into the rolling conversation summary.
+
+    Args:
+        previous_summary: Current summary text (may be empty)
+        messages: Messages not yet covered, oldest first
+
+    Returns:
+        str: Updated summary
+
+    Raises:
+        AgentTimeout: If Bedrock did not answer within the summary budget
+        AgentUnavailable: If the Bedrock breaker is open
+    """
+    transcript = '\n'.join(
+        f'{msg["role"].upper()}: {msg["content"]}' for msg in messages
+    )
+    prompt = f"""You maintain a running summary of a conversation between
+    a user and a genomics QC assistant about one MultiQC run.
+
+    Current summary:
+    {previous_summary or 'None'}
+
+    New messages:
+    {transcript}
+
+    Update the summary so it covers everything above. Keep the samples,
+    metrics, thresholds, conclusions and open questions that matter for
+    follow-up questions. Drop pleasantries and repeated content. Respond
+    with the summary only, at most {SUMMARY_MAX_WORDS} words.
+    """
+    response = bedrock_call(
+        STAGE_SUMMARY, lambda: llm.invoke(prompt), SUMMARY_BUDGET_SECONDS
+    )
+    return response.content.strip()
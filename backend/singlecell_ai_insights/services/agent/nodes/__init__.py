@@ -2,11 +2,12 @@
 
 from .analysis import lookup_metric, lookup_samples, rag
 from .artifacts import make_table, plot_metric
-from .data_loading import ensure_index, load_multiqc
+from .data_loading import aload_multiqc, ensure_index, load_multiqc
 from .routing import route_intent
 from .synthesis import synthesize
 
 __all__ = [
+    'aload_multiqc',
     'ensure_index',
     'load_multiqc',
     'lookup_metric',
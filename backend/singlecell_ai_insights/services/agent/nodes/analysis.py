@@ -1,88 +1,99 @@
 """Analysis nodes for sample lookup, metric lookup, and RAG."""
 
-from ..config import DUP_THRESH, MAPPED_MIN
+from .. import run_context
+from ..accounting import record_embeddings
+from ..config import (
+    DUP_THRESH,
+    EMBEDDING_BUDGET_SECONDS,
+    MAPPED_MIN,
+    RAG_K,
+)
+from ..resilience import STAGE_EMBEDDING, bedrock_call, budget
 from ..tools import (
+    find_named_modules,
+    find_named_samples,
     generate_comparative_summary,
     infer_metric_key_from_question,
 )
+from ..tools.lexical import reciprocal_rank_fusion
+from .data_loading import lexical_index, search_index
 
 
 def lookup_samples(state):
     """Identify flagged samples based on heuristics and FastQC failures."""
     q = state['question'].lower()
     rows = []
-    module_statuses = state.get('module_statuses', {})
+    metrics = run_context.for_state(state).metrics
 
     # simple heuristics; adjust to your lab norms
-    for s, m in state['samples'].items():
-        dup_vals = [
-            v
-            for k, v in m.items()
-            if isinstance(v, (int, float)) and 'dup' in k.lower()
-        ]
-        mapped_tokens = [
-            'mapped',
-            'align',
-            'total_sequences',
-            'read_count',
-            'unique_reads',
-        ]
-        mapped_vals = [
-            v
-            for k, v in m.items()
-            if isinstance(v, (int, float))
-            and any(token in k.lower() for token in mapped_tokens)
-        ]
-        dup = max(dup_vals) if dup_vals else 0.0
-        mapped = max(mapped_vals) if mapped_vals else 0.0
-
-        # Check FastQC module failures
-        sample_modules = module_statuses.get(s, {})
-        failed_modules = [k for k, v in sample_modules.items() if v == 'fail']
-        warned_modules = [k for k, v in sample_modules.items() if v == 'warn']
-
-        flag = (
-            (dup > DUP_THRESH)
-            or (mapped < MAPPED_MIN)
-            or len(failed_modules) > 0
+    mapped_tokens = [
+        'mapped',
+        'align',
+        'total_sequences',
+        'read_count',
+        'unique_reads',
+    ]
+    dup = metrics.row_max(lambda key: 'dup' in key.lower())
+    mapped = metrics.row_max(
+        lambda key: any(token in key.lower() for token in mapped_tokens)
+    )
+
+    # Check FastQC module failures
+    failed = metrics.status_mask('fail')
+    warned = metrics.status_mask('warn')
+
+    if 'failed' in q or 'flag' in q or 'which sample' in q:
+        flagged = metrics.in_general_stats & (
+            (dup > DUP_THRESH) | (mapped < MAPPED_MIN) | failed.any(axis=1)
         )
+        modules = metrics.module_names
+        for index in flagged.nonzero()[0].tolist():
+            row = {
+                'sample': metrics.sample_names[index],
+                'duplication': round(float(dup[index]), 3),
+                'mapped': int(mapped[index]),
+            }
+            failed_modules = [
+                modules[i] for i in failed[index].nonzero()[0].tolist()
+            ]
+            warned_modules = [
+                modules[i] for i in warned[index].nonzero()[0].tolist()
+            ]
+            if failed_modules:
+                row['failed_modules'] = ', '.join(failed_modules)
+            if warned_modules:
+                row['warned_modules'] = ', '.join(warned_modules)
+            row['flag'] = True
+            rows.append(row)
 
-        if 'failed' in q or 'flag' in q or 'which sample' in q:
-            if flag:
-                row = {
-                    'sample': s,
-                    'duplication': round(float(dup), 3),
-                    'mapped': int(mapped),
-                }
-                if failed_modules:
-                    row['failed_modules'] = ', '.join(failed_modules)
-                if warned_modules:
-                    row['warned_modules'] = ', '.join(warned_modules)
-                row['flag'] = True
-                rows.append(row)
-
-    state['tabular'] = rows or None
     notes = [f'Heuristics: dup>{DUP_THRESH} OR mapped<{int(MAPPED_MIN)}']
-    if any(module_statuses.values()):
+    if metrics.statuses.any():
         notes.append('Also flagging samples with FastQC module failures')
-    state['notes'].append(' | '.join(notes))
-    return state
+    return {
+        'tabular': rows or None,
+        'notes': [*state.get('notes', []), ' | '.join(notes)],
+    }
 
 
 def lookup_metric(state):
     """Extract metric values with comparative analysis."""
     q = state['question'].lower()
-    chosen = infer_metric_key_from_question(q, state['samples'])
+    context = run_context.for_state(state)
+    chosen = infer_metric_key_from_question(q, context.samples)
     hits = []
+    notes = list(state.get('notes', []))
     if chosen:
-        for s, m in state['samples'].items():
-            if chosen in m and isinstance(m[chosen], (int, float)):
-                hits.append(
-                    {'sample': s, 'metric': chosen, 'value': m[chosen]}
-                )
+        hits = [
+            {'sample': s, 'metric': chosen, 'value': value}
+            for s, value in context.samples.column(chosen).items()
+        ]
 
         # Add comparative analysis
-        comparative = generate_comparative_summary(state['samples'], chosen)
+        comparative = generate_comparative_summary(
+            context.samples,
+            chosen,
+            stats=context.statistics.get(chosen),
+        )
         if comparative:
             # Add outlier flags to table
             outlier_samples = {
@@ -94,19 +105,49 @@ def lookup_metric(state):
 
             # Add insights to notes
             if comparative['insights']:
-                state['notes'].extend(comparative['insights'])
+                notes.extend(comparative['insights'])
+
+    return {'metric_key': chosen, 'tabular': hits or None, 'notes': notes}
 
-    state['metric_key'] = chosen
-    state['tabular'] = hits or None
-    return state
+
+def _prefilter(context, lexical, question):
+    """Panels of the samples and FastQC modules a question names."""
+    samples = find_named_samples(question, context.metrics.sample_names)
+    modules = find_named_modules(question, context.metrics.module_names)
+    # None (search everything) too when no panel carries those names
+    return lexical.matching(sample=samples, fastqc_module=modules) or None
 
 
 def rag(state):
-    """Retrieve relevant documents from vector store."""
-    vs = state.get('vs')
-    if vs:
-        retr = vs.as_retriever(search_kwargs={'k': 4})
-        state['retrieved'] = retr.invoke(state['question'])
-    else:
-        state['retrieved'] = []
-    return state
+    """
+    Retrieve relevant documents with BM25 and the vector store.
+
+    A question naming samples or FastQC modules is an exact-match
+    lookup: BM25 ranks just those panels and no embedding is made.
+    Otherwise BM25 over every panel is fused with the FAISS hits over
+    the cohort panels by reciprocal rank.
+    """
+    context = run_context.for_state(state)
+    question = state['question']
+    lexical = lexical_index(context)
+    candidates = _prefilter(context, lexical, question)
+    lexical_hits = [
+        document for document, _ in lexical.search(question, RAG_K, candidates)
+    ]
+    if candidates is not None and lexical_hits:
+        return {'retrieved': lexical_hits}
+
+    vs = search_index(state)
+    if not vs:
+        return {'retrieved': lexical_hits}
+    retr = vs.as_retriever(search_kwargs={'k': RAG_K})
+    # Embedding the question is a Bedrock call
+    record_embeddings(1)
+    dense_hits = bedrock_call(
+        STAGE_EMBEDDING,
+        lambda: retr.invoke(question),
+        budget(state, EMBEDDING_BUDGET_SECONDS, STAGE_EMBEDDING),
+    )
+    return {
+        'retrieved': reciprocal_rank_fusion([lexical_hits, dense_hits], RAG_K)
+    }
@@ -1,19 +1,34 @@
 """Artifact generation nodes (tables and plots)."""
 
+from ..config import SELECTION_BUDGET_SECONDS
+from ..degradation import is_degraded
+from ..resilience import STAGE_SELECTION, budget
 from ..tools import (
+    default_artifacts,
     generate_plot_urls_from_indices,
     generate_table_urls_from_indices,
     select_artifacts_with_llm,
 )
 
 
+def _select(state, question, metric_key):
+    # Under load, skip the selection round trip to Bedrock
+    if is_degraded(state):
+        return default_artifacts(question, metric_key)
+    return select_artifacts_with_llm(
+        question,
+        metric_key,
+        timeout=budget(state, SELECTION_BUDGET_SECONDS, STAGE_SELECTION),
+    )
+
+
 def make_table(state):
     """Find and link to existing MultiQC tables using LLM selection."""
     metric_key = state.get('metric_key')
     question = state.get('question')
 
     # Use LLM to intelligently select relevant tables
-    selection = select_artifacts_with_llm(question, metric_key)
+    selection = _select(state, question, metric_key)
     table_indices = selection.get('table_indices', [])
 
     # Generate URLs for selected tables
@@ -21,8 +36,7 @@ def make_table(state):
         state['run_id'], table_indices
     )
 
-    state['table_urls'] = table_urls
-    return state
+    return {'table_urls': table_urls}
 
 
 def plot_metric(state):
@@ -31,14 +45,10 @@ def plot_metric(state):
     question = state.get('question', '')
 
     # Use LLM to intelligently select relevant plots
-    selection = select_artifacts_with_llm(question, metric_key)
+    selection = _select(state, question, metric_key)
     plot_indices = selection.get('plot_indices', [])
 
     # Generate URLs for selected plots
     plot_urls = generate_plot_urls_from_indices(state['run_id'], plot_indices)
 
-    state['plot_urls'] = plot_urls
-    if metric_key:
-        state['metric_key'] = metric_key
-
-    return state
+    return {'plot_urls': plot_urls}
@@ -1,59 +1,112 @@
 """Data loading and indexing nodes."""
 
-import json
-
 from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
 
-from ..config import REPORTS_BUCKET, emb
-from ..exceptions import AgentServiceError
-from ..tools import (
-    build_fastqc_status_panels,
-    build_general_stats_panels,
-    extract_fastqc_module_statuses,
-    extract_general_stats_samples,
-    load_json_from_s3,
-)
+from ...singleflight import SingleFlight
+from .. import run_context
+from ..accounting import record_cache, record_embeddings
+from ..config import EMBEDDING_BUDGET_SECONDS, emb
+from ..degradation import is_degraded
+from ..resilience import STAGE_EMBEDDING, bedrock_call, budget
+from ..tools.lexical import BM25Index
+from .routing import route_intent
+
+# Concurrent turns on the same run share one FAISS (or BM25) build
+_index_flight = SingleFlight('index')
+_lexical_flight = SingleFlight('lexical')
+
+
+def _loaded(context):
+    # Only a reference to the shared context goes into the graph state
+    return {
+        'context_key': context.key,
+        'sample_count': context.metrics.sample_count(),
+        'notes': [],
+    }
 
 
 def load_multiqc(state):
-    """Load MultiQC data from S3 and extract samples/metrics."""
-    key = f'{state["run_id"]}/pubdir/multiqc/multiqc_data/multiqc_data.json'
-    try:
-        data = load_json_from_s3(REPORTS_BUCKET, key)
-    except AgentServiceError as exc:
-        raise AgentServiceError(
-            f'multiqc_data.json not found at s3://{REPORTS_BUCKET}/{key}'
-        ) from exc
-
-    samples, metric_meta = extract_general_stats_samples(data)
-    module_statuses = extract_fastqc_module_statuses(data)
-
-    panels = build_general_stats_panels(samples, metric_meta)
-    panels.extend(build_fastqc_status_panels(module_statuses))
-
-    if not panels and isinstance(data, dict):
-        # Fallback to a generic document for debugging
-        panels.append(
-            Document(
-                page_content=json.dumps(data)[:10000],
-                metadata={'module': 'multiqc_raw'},
-            )
+    """Load parsed MultiQC data, ingesting the run on first use."""
+    return _loaded(run_context.load(state['run_id']))
+
+
+async def aload_multiqc(state):
+    """Async ``load_multiqc`` that keeps DB and S3 work off the loop."""
+    return _loaded(await run_context.aload(state['run_id']))
+
+
+def _build_index(docs, embeddings, timeout):
+    if docs and embeddings and len(embeddings) == len(docs):
+        # Reuse vectors precomputed at ingestion; no Bedrock round trip
+        record_cache('embeddings', hit=True)
+        return FAISS.from_embeddings(
+            [
+                (doc.page_content, vector)
+                for doc, vector in zip(docs, embeddings)
+            ],
+            emb,
+            metadatas=[doc.metadata for doc in docs],
+        )
+    if docs:
+        record_cache('embeddings', hit=False)
+        record_embeddings(len(docs))
+        return bedrock_call(
+            STAGE_EMBEDDING, lambda: FAISS.from_documents(docs, emb), timeout
+        )
+    return None
+
+
+def _with_lexical(context):
+    if context.lexical is None:
+        lexical = _lexical_flight.do(
+            context.key, lambda: BM25Index(context.documents())
         )
+        context = run_context.with_lexical(context, lexical)
+    return context
+
 
-    state['samples'] = samples
-    state['panels'] = panels
-    state['metric_meta'] = metric_meta
-    state['module_statuses'] = module_statuses
-    state['notes'] = []
-    return state
+def warm_index(context):
+    """
+    Build a context's indexes without calling Bedrock.
+
+    The BM25 index is always built; the FAISS index only from vectors
+    precomputed at ingestion; contexts without stored vectors get it on
+    the first turn that needs it.
+    """
+    context = _with_lexical(context)
+    if context.index is None and context.panels and context.embeddings:
+        index = _build_index(context.panels, context.embeddings, None)
+        context = run_context.with_index(context, index)
+    return context
+
+
+def search_index(state):
+    """FAISS store for the turn's run, built once per run version."""
+    context = run_context.for_state(state)
+    if context.index is None and context.panels:
+        timeout = budget(state, EMBEDDING_BUDGET_SECONDS, STAGE_EMBEDDING)
+        index = _index_flight.do(
+            context.key,
+            lambda: _build_index(context.panels, context.embeddings, timeout),
+        )
+        context = run_context.with_index(context, index)
+    return context.index
+
+
+def lexical_index(context):
+    """BM25 index over all of a context's panels, built once per version."""
+    return _with_lexical(context).lexical
 
 
 def ensure_index(state):
-    """Build in-memory FAISS vector store from panels."""
-    docs = state.get('panels', [])
-    if docs:
-        state['vs'] = FAISS.from_documents(docs, emb)
-    else:
-        state['vs'] = None
-    return state
+    """
+    Build the run's BM25 index if it is not built.
+
+    The FAISS store needs Bedrock embeddings, so it is left to ``rag``,
+    which only searches it for questions BM25 alone does not answer.
+    """
+    if is_degraded(state) and route_intent(state) != 'rag':
+        # Only the rag route searches the index
+        return {}
+    lexical_index(run_context.for_state(state))
+    return {}
@@ -1,6 +1,25 @@
 """LLM synthesis node."""
 
-from ..config import llm
+from ..accounting import record_llm_call, record_llm_usage
+from ..cancellation import check_cancelled
+from ..config import (
+    DEGRADED_MAX_TOKENS,
+    HISTORY_TOKEN_BUDGET,
+    SYNTHESIS_BUDGET_SECONDS,
+    llm,
+)
+from ..degradation import is_degraded
+from ..memory import build_history_context
+from ..resilience import (
+    STAGE_SYNTHESIS,
+    bedrock_call,
+    budget,
+    check_deadline,
+)
+
+# Prompt context limits: (table rows, retrieved panels, snippet chars)
+FULL_CONTEXT = (10, 4, 800)
+DEGRADED_CONTEXT = (5, 2, 400)
 
 
 def calculate_confidence(state):
@@ -24,7 +43,7 @@ def calculate_confidence(state):
     if state.get('tabular') and len(state.get('tabular', [])) > 0:
         confidence += 30
         reasons.append('Tabular data available')
-    elif state.get('samples'):
+    elif state.get('sample_count'):
         confidence += 15
         reasons.append('Sample data available')
 
@@ -47,14 +66,47 @@ def calculate_confidence(state):
     return min(confidence, 100), ' • '.join(reasons)
 
 
+def _generate(state, prompt):
+    """Call the LLM, streaming tokens when the turn can be cancelled."""
+    kwargs = {}
+    if is_degraded(state):
+        kwargs['max_tokens'] = DEGRADED_MAX_TOKENS
+
+    def invoke():
+        response = llm.invoke(prompt, **kwargs)
+        record_llm_usage(response)
+        return response.content
+
+    def stream():
+        chunks = []
+        for chunk in llm.stream(prompt, **kwargs):
+            # Also stops the call once the turn has been given up on
+            check_cancelled(state)
+            check_deadline(state, STAGE_SYNTHESIS)
+            record_llm_usage(chunk)
+            chunks.append(chunk.content)
+        return ''.join(chunks)
+
+    record_llm_call()
+    return bedrock_call(
+        STAGE_SYNTHESIS,
+        invoke if state.get('cancel_event') is None else stream,
+        budget(state, SYNTHESIS_BUDGET_SECONDS, STAGE_SYNTHESIS),
+    )
+
+
 def synthesize(state):
     """Synthesize final answer using LLM with context."""
-    # Build compact context
+    # Build compact context; smaller still when the service is degraded
+    degraded = is_degraded(state)
+    max_rows, max_docs, max_snippet = (
+        DEGRADED_CONTEXT if degraded else FULL_CONTEXT
+    )
     context_blocks = []
 
     # Table preview
     if state.get('tabular'):
-        rows = state['tabular'][:10]
+        rows = state['tabular'][:max_rows]
         if rows:
             # Collect all unique keys across all rows
             all_keys = set()
@@ -69,21 +121,17 @@ def synthesize(state):
 
     # Retrieved panels
     if state.get('retrieved'):
-        for d in state['retrieved'][:4]:
+        for d in state['retrieved'][:max_docs]:
             mod = d.metadata.get('module')
-            snippet = d.page_content[:800]
+            snippet = d.page_content[:max_snippet]
             context_blocks.append(f'[{mod}] {snippet}')
 
-    # Format conversation history
-    history_text = ''
-    history = state.get('conversation_history', [])
-    if history:
-        history_lines = []
-        for msg in history[-6:]:  # Last 6 messages (3 exchanges)
-            role = msg.get('role', 'unknown')
-            content = msg.get('content', '')[:200]  # Truncate long messages
-            history_lines.append(f'{role.upper()}: {content}')
-        history_text = '\n'.join(history_lines)
+    # Rolling summary plus the latest exchange, within a fixed budget
+    history_text = build_history_context(
+        state.get('conversation_summary', ''),
+        state.get('conversation_history', []),
+        budget_tokens=HISTORY_TOKEN_BUDGET // 2 if degraded else None,
+    )
 
     # Build artifact instructions (without actual URLs to avoid truncation)
     artifact_instructions = []
@@ -131,13 +179,11 @@ def synthesize(state):
     {chr(10).join(artifact_instructions) if artifact_instructions else ''}
     """
 
-    msg = llm.invoke(prompt)
-
     # Build clean, structured response
     answer_parts = []
 
     # 1. Main explanation first
-    answer_parts.append(msg.content)
+    answer_parts.append(_generate(state, prompt))
 
     # 2. Visualizations section (if any)
     if state.get('plot_urls'):
@@ -162,9 +208,8 @@ def synthesize(state):
                 url = table_data.get('url')
                 answer_parts.append(f'- [{label}]({url})\n')
 
-    state['answer'] = ''.join(answer_parts)
     # naive citations list from retrieved modules
-    state['citations'] = sorted(
+    citations = sorted(
         list(
             {
                 d.metadata.get('module')
@@ -176,14 +221,18 @@ def synthesize(state):
 
     # Calculate confidence score
     confidence, explanation = calculate_confidence(state)
-    state['confidence'] = confidence
-    state['confidence_explanation'] = explanation
+    update = {
+        'answer': ''.join(answer_parts),
+        'citations': citations,
+        'confidence': confidence,
+        'confidence_explanation': explanation,
+    }
 
     # Add warning note for low confidence
     if confidence < 30:
-        state['notes'] = [
+        update['notes'] = [
             *state.get('notes', []),
             '⚠️ Low confidence - answer may be incomplete or uncertain',
         ]
 
-    return state
+    return update
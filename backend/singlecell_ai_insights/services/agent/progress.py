@@ -0,0 +1,19 @@
+"""Progress messages for the agent graph nodes."""
+
+# Progress event emitted after each graph node completes
+NODE_STATUS = {
+    'load_multiqc': ('load', 'Loading MultiQC data from S3...'),
+    'ensure_index': ('index', 'Building vector index for semantic search...'),
+    'lookup_samples': (
+        'analyze',
+        'Analyzing question and retrieving context...',
+    ),
+    'lookup_metric': (
+        'analyze',
+        'Analyzing question and retrieving context...',
+    ),
+    'rag': ('analyze', 'Analyzing question and retrieving context...'),
+    'make_table': ('table', 'Selecting relevant data tables...'),
+    'plot_metric': ('plot', 'Selecting relevant visualizations...'),
+    'synthesize': ('synthesize', 'Generating answer...'),
+}
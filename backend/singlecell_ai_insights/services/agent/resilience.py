@@ -0,0 +1,295 @@
+"""Deadlines, circuit breaking and hedging for Bedrock calls.
+
+Every turn carries an overall deadline in its state. Each Bedrock-bound
+step gets the smaller of its own budget and the time left, and is waited
+for on a helper thread so a hung call cannot outlive it. Consecutive
+failures open a circuit breaker that rejects calls at once until a
+single trial call succeeds again.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .. import metrics, tracing
+from .config import (
+    ASYNC_IO_THREADS,
+    BEDROCK_EMBED_MODEL_ID,
+    BEDROCK_MODEL_ID,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS,
+    TURN_DEADLINE_SECONDS,
+)
+from .degradation import timed_llm_call
+from .exceptions import AgentCancelled, AgentTimeout, AgentUnavailable
+
+logger = logging.getLogger(__name__)
+
+STAGE_SELECTION = 'selection'
+STAGE_EMBEDDING = 'embedding'
+STAGE_SYNTHESIS = 'synthesis'
+STAGE_SUMMARY = 'summary'
+
+_STAGE_MODELS = {STAGE_EMBEDDING: BEDROCK_EMBED_MODEL_ID}
+
+OUTCOME_SUCCESS = 'success'
+OUTCOME_ERROR = 'error'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_SHORT_CIRCUITED = 'short_circuited'
+OUTCOME_ABANDONED = 'abandoned'
+
+CALLS = metrics.counter(
+    'agent_bedrock_calls_total',
+    'Bedrock calls by stage, model and outcome',
+    ['stage', 'model', 'outcome'],
+)
+CALL_SECONDS = metrics.histogram(
+    'agent_bedrock_call_duration_seconds',
+    'Time spent waiting for Bedrock calls',
+    ['stage', 'model'],
+)
+BREAKER_OPEN = metrics.gauge(
+    'agent_bedrock_breaker_open',
+    'Whether the Bedrock breaker is open',
+    multiprocess_mode=metrics.GAUGE_MAX,
+)
+HEDGES = metrics.counter(
+    'agent_bedrock_hedged_total', 'Hedged Bedrock calls started', ['stage']
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Separate from the agent I/O pool: nodes running there wait on these
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=ASYNC_IO_THREADS,
+                    thread_name_prefix='agent-bedrock',
+                )
+    return _executor
+
+
+def new_deadline():
+    """Monotonic deadline for a turn starting now."""
+    return time.monotonic() + TURN_DEADLINE_SECONDS
+
+
+def check_deadline(state, stage=None):
+    """
+    Stop the turn once its deadline has passed.
+
+    Raises:
+        AgentTimeout: If the turn ran out of time
+    """
+    deadline = state.get('deadline')
+    if deadline is not None and time.monotonic() >= deadline:
+        raise AgentTimeout('Chat turn deadline exceeded', stage=stage)
+
+
+def budget(state, seconds, stage=None):
+    """
+    Time allowed for a step: its own budget, capped by the turn deadline.
+
+    Raises:
+        AgentTimeout: If the turn has no time left
+    """
+    check_deadline(state, stage)
+    deadline = state.get('deadline')
+    if deadline is None:
+        return seconds
+    return min(seconds, deadline - time.monotonic())
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker with a single half-open trial call.
+
+    Args:
+        name: Used in log messages
+        failure_threshold: Consecutive failures that open the breaker
+        reset_seconds: How long it stays open before allowing a trial
+    """
+
+    def __init__(self, name, failure_threshold, reset_seconds):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_call(self):
+        """
+        Admit a call, or reject it while the breaker is open.
+
+        Returns:
+            bool: Whether this call is the half-open trial
+
+        Raises:
+            AgentUnavailable: If the call must not be attempted now
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if remaining <= 0 and not self._trial_running:
+                self._trial_running = True
+                return True
+        raise AgentUnavailable(
+            f'{self.name} circuit breaker is open',
+            retry_after=max(1, round(remaining)),
+        )
+
+    def record_success(self, trial=False):
+        with self._lock:
+            if trial:
+                self._trial_running = False
+            was_open = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+        if was_open:
+            logger.info('%s circuit breaker closed', self.name)
+            BREAKER_OPEN.set(0)
+
+    def record_failure(self, trial=False):
+        with self._lock:
+            if trial:
+                self._trial_running = False
+            self._failures += 1
+            # A failed trial re-opens the breaker for another reset period
+            opening = trial or (
+                self._opened_at is None
+                and self._failures >= self.failure_threshold
+            )
+            if opening:
+                self._opened_at = time.monotonic()
+        if opening:
+            logger.warning(
+                '%s circuit breaker opened after %s failure(s)',
+                self.name,
+                self._failures,
+            )
+            BREAKER_OPEN.set(1)
+
+    def release_trial(self, trial):
+        """Give up a trial slot without an outcome (e.g. cancellation)."""
+        if trial:
+            with self._lock:
+                self._trial_running = False
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+        BREAKER_OPEN.set(0)
+
+
+bedrock_breaker = CircuitBreaker(
+    'Bedrock', BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+)
+
+
+def _submit(fn):
+    context = contextvars.copy_context()
+    return _get_executor().submit(functools.partial(context.run, fn))
+
+
+def _first_result(futures, deadline):
+    # Return the first success; raise the last error if every call failed
+    pending = set(futures)
+    error = None
+    while pending:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        done, pending = wait(pending, timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    if error is not None and not pending:
+        raise error
+    raise TimeoutError
+
+
+def _run(stage, fn, timeout, hedge_after):
+    deadline = time.monotonic() + timeout
+    primary = _submit(fn)
+    if hedge_after and hedge_after < timeout:
+        done, _ = wait([primary], hedge_after)
+        if not done:
+            HEDGES.inc(stage=stage)
+            return _first_result([primary, _submit(fn)], deadline)
+    return _first_result([primary], deadline)
+
+
+def bedrock_call(stage, fn, timeout, hedge_after=None):
+    """
+    Run a blocking Bedrock call within a latency budget.
+
+    The call runs on a helper thread; if it outlives ``timeout`` the turn
+    moves on and the thread finishes (or times out in botocore) alone.
+
+    Args:
+        stage: Step name for errors, logs and metrics
+        fn: Zero-argument callable making the Bedrock call
+        timeout: Seconds to wait for the result
+        hedge_after: Optional seconds after which a second identical call
+            is started; the first result to arrive wins
+
+    Returns:
+        The return value of ``fn``
+
+    Raises:
+        AgentTimeout: If no result arrived in time
+        AgentUnavailable: If the breaker is open
+    """
+    model = _STAGE_MODELS.get(stage, BEDROCK_MODEL_ID)
+    try:
+        trial = bedrock_breaker.before_call()
+    except AgentUnavailable:
+        CALLS.inc(stage=stage, model=model, outcome=OUTCOME_SHORT_CIRCUITED)
+        raise
+
+    try:
+        with (
+            tracing.span(f'bedrock.{stage}', model=model),
+            timed_llm_call(),
+            CALL_SECONDS.time(stage=stage, model=model),
+        ):
+            result = _run(stage, fn, timeout, hedge_after)
+    except TimeoutError:
+        CALLS.inc(stage=stage, model=model, outcome=OUTCOME_TIMEOUT)
+        bedrock_breaker.record_failure(trial)
+        logger.warning('Bedrock %s call timed out after %.1fs', stage, timeout)
+        raise AgentTimeout(
+            f'Bedrock {stage} call timed out', stage=stage
+        ) from None
+    except (AgentCancelled, AgentTimeout):
+        # Cancelled, or the turn deadline passed inside the call; Bedrock
+        # is not at fault
+        CALLS.inc(stage=stage, model=model, outcome=OUTCOME_ABANDONED)
+        bedrock_breaker.release_trial(trial)
+        raise
+    except Exception:
+        CALLS.inc(stage=stage, model=model, outcome=OUTCOME_ERROR)
+        bedrock_breaker.record_failure(trial)
+        raise
+    CALLS.inc(stage=stage, model=model, outcome=OUTCOME_SUCCESS)
+    bedrock_breaker.record_success(trial)
+    return result
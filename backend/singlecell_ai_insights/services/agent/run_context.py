@@ -0,0 +1,225 @@
+"""
+Parsed run data shared by every chat turn on a run.
+
+A run's samples, panels and FAISS index are large and the same for every
+turn, so rather than rebuilding them per turn and carrying them through
+the graph state, each process keeps a :class:`RunContext` per run in a
+small LRU cache. The graph state only holds the context's ``key``, which
+changes whenever the run's ``RunData`` is rewritten.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+from langchain_core.documents import Document
+
+from .. import ingestion
+from ..singleflight import SingleFlight
+from .accounting import record_cache
+from .aio import run_blocking
+from .config import CONTEXT_CACHE_SIZE
+from .tools import is_sample_panel
+from .tools.run_metrics import RunMetrics
+
+# One load per run, however many turns miss the cache at once
+_load_flight = SingleFlight('run-context')
+
+
+class RunContext(
+    namedtuple(
+        'RunContext',
+        [
+            'run_id',
+            'version',
+            'metrics',
+            'metric_meta',
+            'statistics',
+            'panels',
+            'sample_panels',
+            'embeddings',
+            'index',
+            'lexical',
+        ],
+        defaults=[None, None],
+    )
+):
+    """
+    Immutable snapshot of one version of a run's parsed data.
+
+    ``metrics`` is the compact :class:`RunMetrics` table. ``panels``
+    holds the indexed (cohort) ``Document`` objects, ``sample_panels``
+    the per-sample ones by sample name. ``index`` (the FAISS store) and
+    ``lexical`` (the BM25 index over all panels) are set once a turn has
+    built them. Everything is shared between turns and must be treated
+    as read-only.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_run_data(cls, run_id, run_data):
+        panels = []
+        sample_panels = {}
+        for panel in run_data.panels:
+            document = Document(**panel)
+            if is_sample_panel(document.metadata):
+                sample_panels.setdefault(
+                    document.metadata['sample'], []
+                ).append(document)
+            else:
+                # Includes every panel of data ingested before cohort
+                # panels, whose stored vectors cover them all
+                panels.append(document)
+        return cls(
+            run_id=run_id,
+            version=_version(run_data.updated_at),
+            metrics=RunMetrics.from_dicts(
+                run_data.samples, run_data.module_statuses
+            ),
+            metric_meta=run_data.metric_meta,
+            statistics=run_data.statistics,
+            panels=tuple(panels),
+            sample_panels={
+                sample: tuple(documents)
+                for sample, documents in sample_panels.items()
+            },
+            embeddings=run_data.embeddings,
+        )
+
+    @property
+    def samples(self):
+        return self.metrics.samples
+
+    @property
+    def module_statuses(self):
+        return self.metrics.module_statuses
+
+    def documents(self):
+        """Every panel: cohort panels, then each sample's."""
+        documents = list(self.panels)
+        for panels in self.sample_panels.values():
+            documents.extend(panels)
+        return documents
+
+    @property
+    def key(self):
+        return f'{self.run_id}@{self.version}'
+
+
+class ContextCache:
+    """Thread-safe LRU cache of run contexts, one per run."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._contexts = OrderedDict()
+
+    def get(self, run_id):
+        with self._lock:
+            context = self._contexts.get(run_id)
+            if context is not None:
+                self._contexts.move_to_end(run_id)
+            return context
+
+    def put(self, context):
+        with self._lock:
+            self._contexts[context.run_id] = context
+            self._contexts.move_to_end(context.run_id)
+            while len(self._contexts) > self.size:
+                self._contexts.popitem(last=False)
+
+    def update(self, context, **fields):
+        """
+        Copy of ``context`` with ``fields`` set, shared with later turns.
+
+        The copy is stored only if ``context`` is still the run's current
+        version, and starts from the cached copy so that fields set by
+        concurrent turns are kept.
+        """
+        with self._lock:
+            current = self._contexts.get(context.run_id)
+            if current is not None and current.key == context.key:
+                context = current._replace(**fields)
+                self._contexts[context.run_id] = context
+                return context
+        return context._replace(**fields)
+
+    def clear(self):
+        with self._lock:
+            self._contexts.clear()
+
+    def __len__(self):
+        return len(self._contexts)
+
+
+cache = ContextCache(CONTEXT_CACHE_SIZE)
+
+
+def _version(updated_at):
+    return updated_at.isoformat() if updated_at else ''
+
+
+def _cached(run_id, updated_at):
+    context = cache.get(run_id)
+    hit = (
+        context is not None
+        and updated_at is not None
+        and context.version == _version(updated_at)
+    )
+    record_cache('run_context', hit=hit)
+    return context if hit else None
+
+
+def _store(run_id, run_data):
+    context = RunContext.from_run_data(run_id, run_data)
+    cache.put(context)
+    return context
+
+
+def load(run_id):
+    """
+    Current context of a run, loading (and if needed ingesting) it.
+
+    A hit costs one indexed query for the ``RunData`` version.
+
+    Raises:
+        AgentServiceError: If the run is unknown or cannot be ingested
+    """
+    context = _cached(run_id, ingestion.get_run_data_version(run_id))
+    if context is None:
+        context = _load_flight.do(
+            run_id, lambda: _store(run_id, ingestion.get_run_data(run_id))
+        )
+    return context
+
+
+async def aload(run_id):
+    """Async :func:`load`; building the documents runs off the loop."""
+    updated_at = await ingestion.aget_run_data_version(run_id)
+    context = _cached(run_id, updated_at)
+    if context is None:
+
+        async def fetch():
+            run_data = await ingestion.aget_run_data(run_id)
+            return await run_blocking(_store, run_id, run_data)
+
+        context = await _load_flight.ado(run_id, fetch)
+    return context
+
+
+def for_state(state):
+    """The context a turn's state refers to, reloaded if evicted since."""
+    context = cache.get(state['run_id'])
+    if context is None or context.key != state['context_key']:
+        context = load(state['run_id'])
+    return context
+
+
+def with_index(context, index):
+    """Copy of ``context`` holding ``index``, shared with later turns."""
+    return cache.update(context, index=index)
+
+
+def with_lexical(context, lexical):
+    """Copy of ``context`` holding ``lexical``, shared with later turns."""
+    return cache.update(context, lexical=lexical)
@@ -0,0 +1,37 @@
+"""Schema of the agent graph state."""
+
+from typing import TypedDict
+
+
+class AgentState(TypedDict, total=False):
+    """
+    Per-turn state passed between graph nodes.
+
+    Only small per-turn values live here; the run's parsed data and
+    search index are shared through the run context named by
+    ``context_key``. Each node returns just the keys it changes.
+    """
+
+    # Turn inputs and controls
+    run_id: str
+    question: str
+    conversation_history: list
+    conversation_summary: str
+    mode: str
+    deadline: object
+    stats: object
+    cancel_event: object
+    # Set by load_multiqc
+    context_key: str
+    sample_count: int
+    # Analysis and answer
+    metric_key: str
+    notes: list
+    tabular: list
+    retrieved: list
+    table_urls: list
+    plot_urls: list
+    answer: str
+    citations: list
+    confidence: int
+    confidence_explanation: str
@@ -1,6 +1,6 @@
 """Agent tools package."""
 
-from .artifact_selector import select_artifacts_with_llm
+from .artifact_selector import default_artifacts, select_artifacts_with_llm
 from .comparative_analysis import (
     calculate_sample_statistics,
     compare_samples,
@@ -15,6 +15,8 @@ from .multiqc_parser import (
     collect_general_stats_meta,
     extract_fastqc_module_statuses,
     extract_general_stats_samples,
+    find_named_modules,
+    find_named_samples,
     infer_metric_key_from_question,
 )
 from .s3_utils import (
@@ -23,24 +25,31 @@ from .s3_utils import (
     put_s3_bytes_and_presign,
 )
 from .vector_store import (
+    build_cohort_panels,
     build_fastqc_status_panels,
     build_general_stats_panels,
+    is_sample_panel,
 )
 
 __all__ = [
+    'build_cohort_panels',
     'build_fastqc_status_panels',
     'build_general_stats_panels',
     'calculate_sample_statistics',
     'collect_general_stats_meta',
     'compare_samples',
+    'default_artifacts',
     'extract_fastqc_module_statuses',
     'extract_general_stats_samples',
+    'find_named_modules',
+    'find_named_samples',
     'generate_comparative_summary',
     'generate_plot_urls_from_indices',
     'generate_presigned_url',
     'generate_table_urls_from_indices',
     'identify_outliers',
     'infer_metric_key_from_question',
+    'is_sample_panel',
     'load_json_from_s3',
     'put_s3_bytes_and_presign',
     'select_artifacts_with_llm',
@@ -3,22 +3,78 @@
 import logging
 import time
 
-from ..config import llm
+from ...singleflight import SingleFlight
+from ..accounting import record_llm_call, record_llm_usage
+from ..config import SELECTION_BUDGET_SECONDS, SELECTION_HEDGE_SECONDS, llm
+from ..resilience import STAGE_SELECTION, bedrock_call
 
 logger = logging.getLogger(__name__)
 
+# Identical questions asked at the same time share one selection call
+_selection_flight = SingleFlight('artifact-selection')
 
-def select_artifacts_with_llm(question, metric_key=None):
+# Keyword -> (plot indices, table indices) used instead of the LLM when
+# the service is degraded; indices match the lists in _select_artifacts
+_DEFAULT_ARTIFACTS = [
+    (('dup',), [0], [0]),
+    (('quality', 'phred'), [1, 2], [1, 2]),
+    (('gc',), [3], [3, 4]),
+    (('n content', 'n_content'), [4], [5]),
+    (('count', 'depth', 'mapped', 'align', 'reads'), [5], [6]),
+    (('adapter',), [6], []),
+    (('length',), [8], []),
+]
+_FALLBACK_ARTIFACTS = ([0, 1, 2], [0, 1])
+
+
+def default_artifacts(question, metric_key=None):
+    """
+    Pick plots and tables by keyword, without calling the LLM.
+
+    Args:
+        question: User's question
+        metric_key: Optional metric key for context
+
+    Returns:
+        dict with 'plot_indices' and 'table_indices' lists
+    """
+    text = f'{question} {metric_key or ""}'.lower()
+    plots, tables = [], []
+    for keywords, plot_indices, table_indices in _DEFAULT_ARTIFACTS:
+        if any(keyword in text for keyword in keywords):
+            plots.extend(i for i in plot_indices if i not in plots)
+            tables.extend(i for i in table_indices if i not in tables)
+    if not plots and not tables:
+        plots, tables = (list(i) for i in _FALLBACK_ARTIFACTS)
+    return {'plot_indices': plots, 'table_indices': tables}
+
+
+def select_artifacts_with_llm(
+    question, metric_key=None, timeout=SELECTION_BUDGET_SECONDS
+):
     """
     Use LLM to intelligently select relevant plots and tables.
 
+    Falls back to :func:`default_artifacts` if the call fails or takes
+    longer than ``timeout``.
+
     Args:
         question: User's question
         metric_key: Optional metric key for context
+        timeout: Seconds to wait for the selection call
 
     Returns:
         dict with 'plot_indices' and 'table_indices' lists
     """
+    key = (' '.join(question.lower().split()), metric_key)
+    selection = _selection_flight.do(
+        key, lambda: _select_artifacts(question, metric_key, timeout)
+    )
+    # Callers may share the result; hand each its own lists
+    return {name: list(indices) for name, indices in selection.items()}
+
+
+def _select_artifacts(question, metric_key, timeout):
     available_plots = [
         '0: Sequence Duplication Levels',
         '1: Per Base Sequence Quality',
@@ -94,7 +150,14 @@ def select_artifacts_with_llm(question, metric_key=None):
         # Add small delay to avoid rapid-fire requests
         time.sleep(0.5)
 
-        response = llm.invoke(prompt)
+        record_llm_call()
+        response = bedrock_call(
+            STAGE_SELECTION,
+            lambda: llm.invoke(prompt),
+            timeout,
+            hedge_after=SELECTION_HEDGE_SECONDS,
+        )
+        record_llm_usage(response)
         content = response.content.strip()
 
         logger.info(f'LLM artifact selection for question: {question[:50]}...')
@@ -143,4 +206,4 @@ def select_artifacts_with_llm(question, metric_key=None):
 
     except Exception as e:
         logger.error(f'Error in LLM artifact selection: {e}')
-        return {'plot_indices': [0, 1, 2], 'table_indices': [0, 1]}
+        return default_artifacts(question, metric_key)
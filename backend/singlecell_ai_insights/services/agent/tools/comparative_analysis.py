@@ -3,6 +3,16 @@
 import statistics
 
 
+def _metric_values(samples, metric_key):
+    """``(sample, value)`` pairs, read by column from a ``SamplesView``."""
+    if hasattr(samples, 'column'):
+        return samples.column(metric_key).items()
+    return (
+        (sample, metrics.get(metric_key))
+        for sample, metrics in samples.items()
+    )
+
+
 def calculate_sample_statistics(samples, metric_key):
     """
     Calculate statistics for a metric across samples.
@@ -13,8 +23,7 @@ def calculate_sample_statistics(samples, metric_key):
     values = []
     sample_values = {}
 
-    for sample, metrics in samples.items():
-        value = metrics.get(metric_key)
+    for sample, value in _metric_values(samples, metric_key):
         if isinstance(value, (int, float)):
             values.append(float(value))
             sample_values[sample] = float(value)
@@ -62,8 +71,7 @@ def compare_samples(samples, metric_key):
         list of comparison dicts with sample pairs and ratios
     """
     sample_values = {}
-    for sample, metrics in samples.items():
-        value = metrics.get(metric_key)
+    for sample, value in _metric_values(samples, metric_key):
         if isinstance(value, (int, float)) and value > 0:
             sample_values[sample] = float(value)
 
@@ -114,14 +122,20 @@ def identify_outliers(samples, metric_key, threshold=2.0):
     return stats['outliers']
 
 
-def generate_comparative_summary(samples, metric_key):
+def generate_comparative_summary(samples, metric_key, stats=None):
     """
     Generate a human-readable comparative summary.
 
+    Args:
+        samples: Sample metrics dict
+        metric_key: Metric to analyze
+        stats: Optional statistics precomputed at ingestion
+
     Returns:
         dict with summary text and key insights
     """
-    stats = calculate_sample_statistics(samples, metric_key)
+    if stats is None:
+        stats = calculate_sample_statistics(samples, metric_key)
     if not stats:
         return None
 
@@ -0,0 +1,201 @@
+"""
+Local lexical retrieval over run panels.
+
+``BM25Index`` is an inverted index scored with Okapi BM25. It needs no
+embeddings, so it covers every panel, sample panels included, and finds
+exact sample and module names that dense retrieval tends to blur. The
+postings are flat numpy arrays, so a run with tens of thousands of
+panels costs a few MB and a query a handful of vector operations.
+``reciprocal_rank_fusion`` merges its ranking with FAISS results.
+
+Not exported from ``tools``: importing numpy is kept off the startup path.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+# Words, keeping joined names such as ``sample_01.R1`` whole
+_TOKEN = re.compile(r'\w+(?:[.\-]\w+)*')
+_PARTS = re.compile(r'[_.\-]')
+# Metric values: indexing them would mostly grow the vocabulary
+_NUMBER = re.compile(r'[\d_.\-]+')
+
+# Usual Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Reciprocal rank fusion constant; damps the weight of the top ranks
+RRF_K = 60
+
+
+def tokenize(text):
+    """Lowercase terms of a text; joined names also yield their parts."""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if _NUMBER.fullmatch(token):
+            continue
+        terms.append(token)
+        if _PARTS.search(token):
+            terms.extend(
+                part
+                for part in _PARTS.split(token)
+                if part and not part.isdigit()
+            )
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over documents, with a metadata prefilter.
+
+    Args:
+        documents: ``Document`` objects, searched by ``page_content``
+        fields: Metadata fields that can be used to prefilter a search
+    """
+
+    __slots__ = (
+        '_by_field',
+        '_frequencies',
+        '_norms',
+        '_offsets',
+        '_positions',
+        '_terms',
+        'documents',
+    )
+
+    def __init__(self, documents, fields=('sample', 'fastqc_module')):
+        self.documents = tuple(documents)
+        self._terms = {}
+        self._by_field = {field: {} for field in fields}
+        term_ids = []
+        positions = []
+        frequencies = []
+        lengths = np.zeros(len(self.documents), dtype=np.float64)
+        for position, document in enumerate(self.documents):
+            counts = Counter(tokenize(document.page_content))
+            lengths[position] = sum(counts.values())
+            for term, frequency in counts.items():
+                term_ids.append(self._terms.setdefault(term, len(self._terms)))
+                positions.append(position)
+                frequencies.append(frequency)
+            for field, by_value in self._by_field.items():
+                value = document.metadata.get(field)
+                if value is not None:
+                    by_value.setdefault(value, []).append(position)
+
+        # Postings grouped by term: term i owns offsets[i]:offsets[i + 1]
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind='stable')
+        self._positions = np.asarray(positions, dtype=np.int32)[order]
+        self._frequencies = np.asarray(frequencies, dtype=np.float32)[order]
+        self._offsets = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(term_ids, minlength=len(self._terms)),
+            out=self._offsets[1:],
+        )
+        average = lengths.mean() if len(lengths) else 0.0
+        # Length normalisation of each document, fixed once built
+        self._norms = BM25_K1 * (
+            1 - BM25_B + BM25_B * lengths / (average or 1.0)
+        )
+
+    def __len__(self):
+        return len(self.documents)
+
+    def matching(self, **filters):
+        """
+        Positions of the documents whose metadata matches any filter.
+
+        Args:
+            **filters: Field name to the values to accept, e.g.
+                ``sample=['s1', 's2']``
+
+        Returns:
+            set: Document positions
+        """
+        positions = set()
+        for field, values in filters.items():
+            by_value = self._by_field[field]
+            for value in values:
+                positions.update(by_value.get(value, ()))
+        return positions
+
+    def scores(self, query):
+        """BM25 score of every document for a query."""
+        scores = np.zeros(len(self.documents), dtype=np.float64)
+        count = len(self.documents)
+        for term in set(tokenize(query)):
+            term_id = self._terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            positions = self._positions[start:end]
+            frequencies = self._frequencies[start:end]
+            idf = np.log(
+                1 + (count - (end - start) + 0.5) / (end - start + 0.5)
+            )
+            # Each document appears once per term, so += is safe here
+            scores[positions] += (
+                idf
+                * frequencies
+                * (BM25_K1 + 1)
+                / (frequencies + self._norms[positions])
+            )
+        return scores
+
+    def search(self, query, k, candidates=None):
+        """
+        Best ``k`` documents for a query.
+
+        Args:
+            query: Free text
+            k: Number of documents to return
+            candidates: Only rank these positions (from ``matching``)
+
+        Returns:
+            list: ``(document, score)`` pairs, best first; without
+            ``candidates``, documents sharing no term with the query are
+            left out
+        """
+        scores = self.scores(query)
+        if candidates is not None:
+            # Picked by name, so kept even when no query term is indexed
+            # (e.g. numeric sample names)
+            positions = np.fromiter(sorted(candidates), dtype=np.int64)
+        else:
+            positions = np.flatnonzero(scores)
+        if len(positions) > k:
+            top = np.argpartition(-scores[positions], k - 1)[:k]
+            positions = positions[top]
+        ranked = positions[np.argsort(-scores[positions], kind='stable')]
+        return [
+            (self.documents[position], float(scores[position]))
+            for position in ranked.tolist()
+        ]
+
+
+def reciprocal_rank_fusion(rankings, k):
+    """
+    Merge document rankings by reciprocal rank fusion.
+
+    A document scores ``sum(1 / (RRF_K + rank))`` over the rankings it
+    appears in; documents are identified by their text.
+
+    Args:
+        rankings: Lists of ``Document`` objects, best first
+        k: Number of documents to return
+
+    Returns:
+        list: The best ``k`` documents
+    """
+    scores = {}
+    documents = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document.page_content
+            documents.setdefault(key, document)
+            scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank)
+    best = sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+    return [documents[key] for key in best]
@@ -1,5 +1,10 @@
 """MultiQC data parsing utilities."""
 
+import re
+
+# Sample names are matched against whole words of the question
+_WORD = re.compile(r'[\w.\-]+')
+
 
 def collect_general_stats_meta(data):
     """Extract metadata for general stats metrics."""
@@ -85,3 +90,20 @@ def infer_metric_key_from_question(q, samples):
             if isinstance(v, (int, float)):
                 return k
     return None
+
+
+def find_named_samples(q, sample_names):
+    """Sample names that appear as words in the question, in run order."""
+    words = set(_WORD.findall(q.lower()))
+    words.update(word.strip('.-') for word in list(words))
+    return [name for name in sample_names if name.lower() in words]
+
+
+def find_named_modules(q, module_names):
+    """FastQC modules named in the question, e.g. ``adapter content``."""
+    q = q.lower()
+    return [
+        name
+        for name in module_names
+        if name.lower() in q or name.lower().replace('_', ' ') in q
+    ]
@@ -0,0 +1,323 @@
+"""
+Compact in-memory form of a run's general stats and FastQC statuses.
+
+Parsed MultiQC data is a dict per sample holding a float (and a copy of
+each namespaced metric key) per metric, which for runs with tens of
+thousands of samples takes hundreds of MB. :class:`RunMetrics` keeps one
+table of interned sample names and one of metric keys, the values in a
+float64 matrix with a mask of present cells, and FastQC statuses in a
+uint8 matrix. ``samples`` and ``module_statuses`` are read-only mapping
+views shaped like the dicts, so code written against those keeps working.
+
+Not exported from ``tools``: importing numpy is kept off the startup path.
+"""
+
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+# Status codes in ``RunMetrics.statuses``; 0 means not reported
+STATUS_CODES = {'pass': 1, 'warn': 2, 'fail': 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+class RunMetrics:
+    """
+    Samples x metrics value matrix plus samples x modules status matrix.
+
+    Attributes:
+        sample_names: Interned sample names; rows of both matrices
+        metric_keys: Interned metric keys; columns of ``values``
+        module_names: Interned FastQC module names; columns of ``statuses``
+        values: float64 matrix of metric values
+        present: bool matrix, True where a sample reported the metric
+        integer: bool per metric, True if every value was an int
+        in_general_stats: bool per sample, True for general stats samples
+        statuses: uint8 matrix of ``STATUS_CODES`` (0: not reported)
+    """
+
+    __slots__ = (
+        '_metric_index',
+        '_module_index',
+        '_sample_index',
+        'in_general_stats',
+        'integer',
+        'metric_keys',
+        'module_names',
+        'present',
+        'sample_names',
+        'statuses',
+        'values',
+    )
+
+    def __init__(
+        self,
+        sample_names,
+        metric_keys,
+        module_names,
+        values,
+        present,
+        integer,
+        in_general_stats,
+        statuses,
+    ):
+        self.sample_names = tuple(sys.intern(name) for name in sample_names)
+        self.metric_keys = tuple(sys.intern(key) for key in metric_keys)
+        self.module_names = tuple(sys.intern(name) for name in module_names)
+        self.values = values
+        self.present = present
+        self.integer = integer
+        self.in_general_stats = in_general_stats
+        self.statuses = statuses
+        self._sample_index = {
+            name: index for index, name in enumerate(self.sample_names)
+        }
+        self._metric_index = {
+            key: index for index, key in enumerate(self.metric_keys)
+        }
+        self._module_index = {
+            name: index for index, name in enumerate(self.module_names)
+        }
+        for array in (values, present, integer, in_general_stats, statuses):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_dicts(cls, samples, module_statuses):
+        """
+        Build from the parsed dicts stored on ``RunData``.
+
+        Args:
+            samples: ``{sample: {metric_key: number}}``
+            module_statuses: ``{sample: {module: 'pass'|'warn'|'fail'}}``
+        """
+        sample_names = list(samples)
+        sample_names.extend(
+            name for name in module_statuses if name not in samples
+        )
+        sample_index = {name: index for index, name in enumerate(sample_names)}
+        metric_index = {}
+        module_index = {}
+        for metrics in samples.values():
+            for key in metrics:
+                metric_index.setdefault(key, len(metric_index))
+        for statuses in module_statuses.values():
+            for module in statuses:
+                module_index.setdefault(module, len(module_index))
+
+        shape = (len(sample_names), len(metric_index))
+        values = np.zeros(shape, dtype=np.float64)
+        present = np.zeros(shape, dtype=bool)
+        integer = np.ones(len(metric_index), dtype=bool)
+        for row, metrics in enumerate(samples.values()):
+            for key, value in metrics.items():
+                column = metric_index[key]
+                values[row, column] = value
+                present[row, column] = True
+                if type(value) is not int:
+                    integer[column] = False
+
+        in_general_stats = np.zeros(len(sample_names), dtype=bool)
+        in_general_stats[: len(samples)] = True
+
+        statuses = np.zeros(
+            (len(sample_names), len(module_index)), dtype=np.uint8
+        )
+        for name, modules in module_statuses.items():
+            row = sample_index[name]
+            for module, status in modules.items():
+                statuses[row, module_index[module]] = STATUS_CODES[status]
+
+        return cls(
+            sample_names,
+            metric_index,
+            module_index,
+            values,
+            present,
+            integer,
+            in_general_stats,
+            statuses,
+        )
+
+    @property
+    def samples(self):
+        """``{sample: {metric_key: value}}`` view of general stats."""
+        return SamplesView(self)
+
+    @property
+    def module_statuses(self):
+        """``{sample: {module: status}}`` view of FastQC statuses."""
+        return ModuleStatusesView(self)
+
+    def sample_count(self):
+        return int(self.in_general_stats.sum())
+
+    def row_max(self, match, default=0.0):
+        """
+        Largest value per sample over the metrics whose key matches.
+
+        Args:
+            match: Predicate on a metric key
+            default: Value for samples without any matching metric
+
+        Returns:
+            numpy.ndarray: One value per sample
+        """
+        columns = [
+            index for index, key in enumerate(self.metric_keys) if match(key)
+        ]
+        result = np.full(len(self.sample_names), default, dtype=np.float64)
+        if columns:
+            present = self.present[:, columns]
+            masked = np.where(present, self.values[:, columns], -np.inf)
+            reported = present.any(axis=1)
+            result[reported] = masked.max(axis=1)[reported]
+        return result
+
+    def status_mask(self, status):
+        """Samples x modules bool matrix, True where ``status`` was set."""
+        return self.statuses == STATUS_CODES[status]
+
+    def _value(self, value, column):
+        return int(value) if self.integer[column] else value
+
+    def row(self, index):
+        """Present ``(metric_key, value)`` pairs of one sample."""
+        values = self.values[index].tolist()
+        return [
+            (self.metric_keys[column], self._value(values[column], column))
+            for column in np.flatnonzero(self.present[index]).tolist()
+        ]
+
+    def column(self, metric_key):
+        """``{sample: value}`` for the samples reporting ``metric_key``."""
+        column = self._metric_index.get(metric_key)
+        if column is None:
+            return {}
+        rows = np.flatnonzero(self.present[:, column]).tolist()
+        values = self.values[rows, column].tolist()
+        return {
+            self.sample_names[row]: self._value(value, column)
+            for row, value in zip(rows, values)
+        }
+
+    def nbytes(self):
+        """Bytes held by the matrices (not the name tables)."""
+        return sum(
+            array.nbytes
+            for array in (
+                self.values,
+                self.present,
+                self.integer,
+                self.in_general_stats,
+                self.statuses,
+            )
+        )
+
+
+class SamplesView(Mapping):
+    """Read-only ``{sample: {metric_key: value}}`` over :class:`RunMetrics`."""
+
+    __slots__ = ('_metrics',)
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+
+    def __getitem__(self, sample):
+        index = self._metrics._sample_index.get(sample)
+        if index is None or not self._metrics.in_general_stats[index]:
+            raise KeyError(sample)
+        return _MetricRow(self._metrics, index)
+
+    def __iter__(self):
+        names = self._metrics.sample_names
+        for index in np.flatnonzero(self._metrics.in_general_stats).tolist():
+            yield names[index]
+
+    def __len__(self):
+        return self._metrics.sample_count()
+
+    def items(self):
+        names = self._metrics.sample_names
+        for index in np.flatnonzero(self._metrics.in_general_stats).tolist():
+            yield names[index], _MetricRow(self._metrics, index)
+
+    def column(self, metric_key):
+        """``{sample: value}`` for one metric, without building the rows."""
+        return self._metrics.column(metric_key)
+
+
+class _MetricRow(Mapping):
+    __slots__ = ('_index', '_metrics')
+
+    def __init__(self, metrics, index):
+        self._metrics = metrics
+        self._index = index
+
+    def __getitem__(self, metric_key):
+        metrics = self._metrics
+        column = metrics._metric_index.get(metric_key)
+        if column is None or not metrics.present[self._index, column]:
+            raise KeyError(metric_key)
+        value = metrics.values[self._index, column].item()
+        return metrics._value(value, column)
+
+    def __iter__(self):
+        return (key for key, _ in self._metrics.row(self._index))
+
+    def __len__(self):
+        return int(self._metrics.present[self._index].sum())
+
+    def items(self):
+        return self._metrics.row(self._index)
+
+
+class ModuleStatusesView(Mapping):
+    """Read-only ``{sample: {module: status}}`` over :class:`RunMetrics`."""
+
+    __slots__ = ('_metrics', '_rows')
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+        # Like the parsed dict, only samples with a reported status
+        self._rows = np.flatnonzero(metrics.statuses.any(axis=1)).tolist()
+
+    def __getitem__(self, sample):
+        index = self._metrics._sample_index.get(sample)
+        if index is None or not self._metrics.statuses[index].any():
+            raise KeyError(sample)
+        return _StatusRow(self._metrics, index)
+
+    def __iter__(self):
+        names = self._metrics.sample_names
+        return (names[index] for index in self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class _StatusRow(Mapping):
+    __slots__ = ('_index', '_metrics')
+
+    def __init__(self, metrics, index):
+        self._metrics = metrics
+        self._index = index
+
+    def __getitem__(self, module):
+        column = self._metrics._module_index.get(module)
+        code = (
+            0
+            if column is None
+            else self._metrics.statuses[self._index, column]
+        )
+        if not code:
+            raise KeyError(module)
+        return STATUS_NAMES[int(code)]
+
+    def __iter__(self):
+        names = self._metrics.module_names
+        row = self._metrics.statuses[self._index]
+        return (names[column] for column in np.flatnonzero(row).tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self._metrics.statuses[self._index]))
@@ -1,22 +1,41 @@
 """S3 utilities for agent service."""
 
 import json
+import time
 
 from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
 
+from ... import metrics, tracing
+from ..accounting import record_s3_bytes
 from ..exceptions import AgentServiceError
 
+S3_GET_SECONDS = metrics.histogram(
+    's3_get_duration_seconds',
+    'S3 GetObject latency, body included',
+    ['outcome'],
+)
+S3_GET_BYTES = metrics.counter('s3_get_bytes_total', 'Bytes read from S3')
+
 
 def load_json_from_s3(bucket, key):
     """Load and parse JSON from S3."""
+    started = time.monotonic()
     try:
-        obj = settings.AWS_S3_CLIENT.get_object(Bucket=bucket, Key=key)
+        with tracing.span('s3.get_object', bucket=bucket, key=key) as span:
+            obj = settings.AWS_S3_CLIENT.get_object(Bucket=bucket, Key=key)
+            body = obj['Body'].read()
+            if span is not None:
+                span.set_attribute('bytes', len(body))
     except (BotoCoreError, ClientError) as exc:
+        S3_GET_SECONDS.observe(time.monotonic() - started, outcome='error')
         raise AgentServiceError(
             f'Unable to load {key} from bucket {bucket}'
         ) from exc
-    return json.loads(obj['Body'].read())
+    S3_GET_SECONDS.observe(time.monotonic() - started, outcome='success')
+    S3_GET_BYTES.inc(len(body))
+    record_s3_bytes(len(body))
+    return json.loads(body)
 
 
 def put_s3_bytes_and_presign(bucket, key, body, content_type):
@@ -1,10 +1,25 @@
-"""Vector store document builders."""
+"""
+Vector store document builders.
 
-from langchain_core.documents import Document
+Panels come in two levels. Cohort panels summarise the whole run, one
+per metric family and one per FastQC module, and are the only ones
+embedded, so their number grows with the metrics rather than the
+samples. Sample panels hold one sample's values and are looked up by
+name when a question mentions that sample.
+"""
+
+LEVEL_COHORT = 'cohort'
+LEVEL_SAMPLE = 'sample'
+
+# Samples named per outlier list or failing module in a cohort panel
+LISTED_SAMPLES = 10
 
 
 def build_general_stats_panels(samples, key_meta):
     """Build vector store documents from general stats."""
+    # Deferred: LangChain is slow to import and only needed on ingestion
+    from langchain_core.documents import Document
+
     panels = []
     for sample, metrics in samples.items():
         if not metrics:
@@ -23,7 +38,11 @@ def build_general_stats_panels(samples, key_meta):
         panels.append(
             Document(
                 page_content=content,
-                metadata={'module': 'general_stats', 'sample': sample},
+                metadata={
+                    'module': 'general_stats',
+                    'level': LEVEL_SAMPLE,
+                    'sample': sample,
+                },
             )
         )
     return panels
@@ -31,6 +50,8 @@ def build_general_stats_panels(samples, key_meta):
 
 def build_fastqc_status_panels(module_statuses):
     """Build vector store documents from FastQC module statuses."""
+    from langchain_core.documents import Document
+
     panels = []
     for sample, statuses in module_statuses.items():
         if not statuses:
@@ -42,7 +63,7 @@ def build_fastqc_status_panels(module_statuses):
         passed = []
 
         for module_name, status in sorted(statuses.items()):
-            readable_name = module_name.replace('_', ' ').title()
+            readable_name = _readable_module(module_name)
             lines.append(f'{readable_name}: {status}')
 
             if status == 'fail':
@@ -74,6 +95,7 @@ def build_fastqc_status_panels(module_statuses):
                 page_content=content,
                 metadata={
                     'module': 'fastqc_status',
+                    'level': LEVEL_SAMPLE,
                     'sample': sample,
                     'failed_count': len(failed),
                     'warned_count': len(warned),
@@ -82,3 +104,156 @@ def build_fastqc_status_panels(module_statuses):
         )
 
     return panels
+
+
+def is_sample_panel(metadata):
+    """Whether a panel describes one sample rather than the cohort."""
+    return metadata.get('level') == LEVEL_SAMPLE
+
+
+def _listed(names, total):
+    listed = ', '.join(names[:LISTED_SAMPLES])
+    if total > LISTED_SAMPLES:
+        listed += f' and {total - LISTED_SAMPLES} more'
+    return listed
+
+
+def _readable_module(module_name):
+    return module_name.replace('_', ' ').title()
+
+
+def _metric_line(label, stats):
+    line = (
+        f'{label}: {stats["count"]} samples, mean {stats["mean"]}, '
+        f'stdev {stats["stdev"]}, range {stats["min"]} to {stats["max"]}'
+    )
+    outliers = sorted(
+        stats['outliers'], key=lambda o: o['z_score'], reverse=True
+    )
+    if outliers:
+        names = [
+            f'{o["sample"]} ({o["value"]}, {o["deviation"]})' for o in outliers
+        ]
+        line += f'\n  Outliers (>2 stdev): {_listed(names, len(outliers))}'
+    return line
+
+
+def build_cohort_panels(samples, key_meta, module_statuses, statistics):
+    """
+    Build run-level summary documents.
+
+    One overview, one document per metric family (namespace) with each
+    metric's distribution and outliers, and one per FastQC module with
+    its pass/warn/fail counts and failing samples.
+
+    Args:
+        samples: ``{sample: {metric_key: number}}``
+        key_meta: General stats metadata per metric key
+        module_statuses: ``{sample: {module: status}}``
+        statistics: ``calculate_sample_statistics`` results per metric key
+    """
+    from langchain_core.documents import Document
+
+    families = {}
+    metric_keys = {key for metrics in samples.values() for key in metrics}
+    for metric_key in sorted(metric_keys):
+        meta = key_meta.get(metric_key, {})
+        family = meta.get('namespace') or 'General Stats'
+        families.setdefault(family, []).append(metric_key)
+
+    by_module = {}
+    for sample, statuses in module_statuses.items():
+        for module_name, status in statuses.items():
+            counts = by_module.setdefault(
+                module_name, {'pass': [], 'warn': [], 'fail': []}
+            )
+            counts[status].append(sample)
+
+    panels = []
+    for family, keys in sorted(families.items()):
+        lines = []
+        for metric_key in keys:
+            stats = statistics.get(metric_key)
+            if not stats:
+                continue
+            title = key_meta.get(metric_key, {}).get('title') or metric_key
+            lines.append(_metric_line(f'{title} ({metric_key})', stats))
+        if not lines:
+            continue
+        panels.append(
+            Document(
+                page_content=(
+                    f'Cohort summary: {family} metrics across '
+                    f'{len(samples)} samples\n' + '\n'.join(lines)
+                ),
+                metadata={
+                    'module': 'general_stats',
+                    'level': LEVEL_COHORT,
+                    'family': family,
+                },
+            )
+        )
+
+    for module_name, counts in sorted(by_module.items()):
+        readable_name = _readable_module(module_name)
+        lines = [
+            f'FastQC module: {readable_name}',
+            f'Passed: {len(counts["pass"])}, Warned: {len(counts["warn"])}, '
+            f'Failed: {len(counts["fail"])}',
+        ]
+        for status, label in (('fail', 'Failed'), ('warn', 'Warned')):
+            names = sorted(counts[status])
+            if names:
+                lines.append(f'{label} samples: {_listed(names, len(names))}')
+        panels.append(
+            Document(
+                page_content='\n'.join(lines),
+                metadata={
+                    'module': 'fastqc_status',
+                    'level': LEVEL_COHORT,
+                    'fastqc_module': module_name,
+                    'failed_count': len(counts['fail']),
+                    'warned_count': len(counts['warn']),
+                },
+            )
+        )
+
+    if samples or module_statuses:
+        failing = sorted(
+            sample
+            for sample, statuses in module_statuses.items()
+            if 'fail' in statuses.values()
+        )
+        lines = [
+            f'Run overview: {len(samples)} samples, '
+            f'{len(metric_keys)} general stats metrics'
+        ]
+        if families:
+            lines.append(f'Metric families: {", ".join(sorted(families))}')
+        if failing:
+            most_failed = sorted(
+                (
+                    (len(counts['fail']), _readable_module(name))
+                    for name, counts in by_module.items()
+                    if counts['fail']
+                ),
+                key=lambda item: -item[0],
+            )
+            lines.append(
+                'FastQC failures by module: '
+                + ', '.join(f'{name} ({count})' for count, name in most_failed)
+            )
+            lines.append(
+                f'Samples with a failing module ({len(failing)}): '
+                f'{_listed(failing, len(failing))}'
+            )
+        elif by_module:
+            lines.append('FastQC: no failing modules')
+        panels.insert(
+            0,
+            Document(
+                page_content='\n'.join(lines),
+                metadata={'module': 'overview', 'level': LEVEL_COHORT},
+            ),
+        )
+    return panels
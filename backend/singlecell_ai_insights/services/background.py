@@ -0,0 +1,47 @@
+"""Local worker pool for work that must stay off the request path."""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_WORKERS,
+                    thread_name_prefix='background',
+                )
+    return _executor
+
+
+def _run(fn, args, kwargs):
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', fn.__name__)
+        raise
+    finally:
+        # Worker threads own their DB connections; never leak them
+        connections.close_all()
+
+
+def submit(fn, *args, **kwargs):
+    """Run ``fn`` on the local worker pool and return its future."""
+    return _get_executor().submit(_run, fn, args, kwargs)
+
+
+def submit_on_commit(fn, *args, **kwargs):
+    """Schedule ``fn`` once the current transaction commits."""
+    transaction.on_commit(lambda: submit(fn, *args, **kwargs))
@@ -0,0 +1,89 @@
+"""Conversation bookkeeping that runs outside the chat response path."""
+
+import logging
+
+from django.utils import timezone
+
+from ..models import Conversation, Message
+from . import background
+from .agent.exceptions import AgentServiceError
+from .agent.memory import summarize_conversation
+
+logger = logging.getLogger(__name__)
+
+# The latest exchange is sent verbatim, so it is never folded yet
+RECENT_MESSAGES_KEPT = 2
+
+
+def refresh_summary(conversation_id):
+    """Fold messages older than the latest exchange into the summary."""
+    conversation = Conversation.objects.filter(pk=conversation_id).first()
+    if conversation is None:
+        return None
+
+    pending = Message.objects.filter(conversation=conversation)
+    if conversation.summarized_until is not None:
+        pending = pending.filter(pk__gt=conversation.summarized_until)
+    pending = list(
+        pending.order_by('created_at', 'pk').values('pk', 'role', 'content')
+    )
+    to_fold = pending[:-RECENT_MESSAGES_KEPT]
+    if not to_fold:
+        return conversation.summary
+
+    try:
+        summary = summarize_conversation(conversation.summary, to_fold)
+    except AgentServiceError as exc:
+        # The next refresh folds these messages too
+        logger.warning(
+            'Summary refresh failed for conversation %s: %s',
+            conversation.pk,
+            exc,
+        )
+        return conversation.summary
+
+    # Only apply if no concurrent refresh moved the summary meanwhile
+    updated = Conversation.objects.filter(
+        pk=conversation.pk, summarized_until=conversation.summarized_until
+    ).update(summary=summary, summarized_until=to_fold[-1]['pk'])
+    if not updated:
+        logger.info(
+            'Skipped stale summary refresh for conversation %s',
+            conversation.pk,
+        )
+    return summary
+
+
+def schedule_summary_refresh(conversation):
+    """Refresh the rolling summary after the current transaction."""
+    background.submit_on_commit(refresh_summary, conversation.pk)
+
+
+def save_answer(conversation, result):
+    """Store the agent's answer and refresh the summary afterwards."""
+    assistant_message = Message.objects.create(
+        conversation=conversation,
+        role=Message.ROLE_ASSISTANT,
+        content=result.get('answer', ''),
+        citations=result.get('citations', []),
+        notes=result.get('notes', []),
+        metric_key=result.get('metric_key'),
+        confidence=result.get('confidence'),
+        confidence_explanation=result.get('confidence_explanation', ''),
+        answer_mode=result.get('mode') or Message.MODE_FULL,
+        timing=result.get('timing') or {},
+    )
+    schedule_summary_refresh(conversation)
+    return assistant_message
+
+
+def mark_cancelled(question_message):
+    """Mark a question whose answer the client abandoned."""
+    # update() skips auto_now, so bump updated_at for history validators
+    Message.objects.filter(pk=question_message.pk).update(
+        status=Message.STATUS_CANCELLED, updated_at=timezone.now()
+    )
+    logger.info(
+        'Chat turn cancelled by client for conversation %s',
+        question_message.conversation_id,
+    )
@@ -0,0 +1,316 @@
+"""One-shot ingestion of MultiQC data for completed runs."""
+
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Run, RunData
+from . import background
+from .agent.accounting import record_cache
+from .agent.aio import run_blocking
+from .agent.config import REPORTS_BUCKET, emb
+from .agent.exceptions import AgentServiceError
+from .agent.tools import (
+    build_cohort_panels,
+    build_fastqc_status_panels,
+    build_general_stats_panels,
+    calculate_sample_statistics,
+    extract_fastqc_module_statuses,
+    extract_general_stats_samples,
+    is_sample_panel,
+    load_json_from_s3,
+)
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (AgentServiceError, BotoCoreError, ClientError)
+
+# One download and parse per run, however many requests need it
+_ingest_flight = SingleFlight('ingest')
+
+
+def build_metrics_summary(data):
+    """Build the per-sample summary served by the run metrics endpoint."""
+    samples = {}
+    for stats_dict in data.get('report_general_stats_data') or []:
+        for sample_name, sample_data in stats_dict.items():
+            if sample_name.lower() != 'multiqc':
+                samples[sample_name] = sample_data
+
+    if not samples:
+        return None
+
+    return {
+        'total_samples': len(samples),
+        'samples': [
+            {
+                'name': sample_name,
+                'duplication_rate': sample_data.get('percent_duplicates'),
+                'gc_content': sample_data.get('percent_gc'),
+                'total_sequences': sample_data.get('total_sequences'),
+            }
+            for sample_name, sample_data in samples.items()
+        ],
+    }
+
+
+def parse_multiqc(data):
+    """Parse MultiQC data into the fields persisted on ``RunData``."""
+    samples, metric_meta = extract_general_stats_samples(data)
+    module_statuses = extract_fastqc_module_statuses(data)
+
+    statistics = {}
+    metric_keys = {key for metrics in samples.values() for key in metrics}
+    for metric_key in sorted(metric_keys):
+        stats = calculate_sample_statistics(samples, metric_key)
+        if stats:
+            stats.pop('sample_values')
+            statistics[metric_key] = stats
+
+    # Cohort panels first: they are the ones embedded and indexed
+    documents = build_cohort_panels(
+        samples, metric_meta, module_statuses, statistics
+    )
+    documents.extend(build_general_stats_panels(samples, metric_meta))
+    documents.extend(build_fastqc_status_panels(module_statuses))
+    panels = [
+        {'page_content': doc.page_content, 'metadata': doc.metadata}
+        for doc in documents
+    ]
+    if not panels and isinstance(data, dict):
+        # Fallback to a generic document for debugging
+        panels.append(
+            {
+                'page_content': json.dumps(data)[:10000],
+                'metadata': {'module': 'multiqc_raw'},
+            }
+        )
+
+    return {
+        'samples': samples,
+        'metric_meta': metric_meta,
+        'module_statuses': module_statuses,
+        'statistics': statistics,
+        'panels': panels,
+    }
+
+
+def _embed_panels(panels):
+    # Sample panels are looked up by name, never searched by vector
+    return emb.embed_documents(
+        [
+            panel['page_content']
+            for panel in panels
+            if not is_sample_panel(panel['metadata'])
+        ]
+    )
+
+
+def fetch_parsed(run, precompute_embeddings=False):
+    """
+    Download and parse MultiQC data for a run without touching the DB.
+
+    Safe to call from worker threads; persist the result with
+    ``store_parsed`` on a thread that owns a DB connection.
+
+    Returns:
+        tuple of (RunData field values, metrics summary or None)
+    """
+    data = load_json_from_s3(REPORTS_BUCKET, run.get_multiqc_data_s3_key())
+    parsed = parse_multiqc(data)
+    parsed['embeddings'] = None
+    if precompute_embeddings and parsed['panels']:
+        parsed['embeddings'] = _embed_panels(parsed['panels'])
+    return parsed, build_metrics_summary(data)
+
+
+def store_parsed(run, parsed, metrics_summary):
+    """
+    Persist parsed data and mark the run as ingested.
+
+    Embeddings already stored for the same panels are kept when
+    ``parsed`` comes without any.
+    """
+    with transaction.atomic():
+        if parsed.get('embeddings') is None:
+            stored = (
+                RunData.objects.select_for_update()
+                .filter(run=run, embeddings__isnull=False)
+                .values_list('panels', 'embeddings')
+                .first()
+            )
+            if stored and stored[0] == parsed['panels']:
+                parsed = {**parsed, 'embeddings': stored[1]}
+        run_data, _ = RunData.objects.update_or_create(
+            run=run, defaults=parsed
+        )
+        if not run.metrics:
+            run.metrics = metrics_summary
+        run.ingestion_status = Run.INGESTION_SUCCEEDED
+        run.ingestion_error = ''
+        run.ingested_at = timezone.now()
+        run.save(
+            update_fields=[
+                'metrics',
+                'ingestion_status',
+                'ingestion_error',
+                'ingested_at',
+                'updated_at',
+            ]
+        )
+    return run_data
+
+
+def _mark_failed(run, exc):
+    Run.objects.filter(pk=run.pk).update(
+        ingestion_status=Run.INGESTION_FAILED,
+        ingestion_error=str(exc),
+        updated_at=timezone.now(),
+    )
+
+
+def ingest_run(run_pk, attempts=None, precompute_embeddings=None):
+    """
+    Fetch ``multiqc_data.json`` once and persist everything derived from it.
+
+    Concurrent calls for the same run share one download; a caller that
+    finds the data already stored (e.g. by another process) reuses it.
+
+    Args:
+        run_pk: Primary key of the run to ingest
+        attempts: Number of tries before giving up (default from settings)
+        precompute_embeddings: Also embed panels (default from settings)
+
+    Returns:
+        RunData: The persisted parsed data
+
+    Raises:
+        AgentServiceError: If the data could not be loaded
+    """
+    return _ingest_flight.do(
+        run_pk,
+        lambda: _ingest_run(run_pk, attempts, precompute_embeddings),
+        check=lambda: RunData.objects.filter(run_id=run_pk).first(),
+    )
+
+
+def _ingest_run(run_pk, attempts, precompute_embeddings):
+    if attempts is None:
+        attempts = settings.INGESTION_MAX_ATTEMPTS
+    if precompute_embeddings is None:
+        precompute_embeddings = settings.INGESTION_PRECOMPUTE_EMBEDDINGS
+
+    run = Run.objects.get(pk=run_pk)
+    Run.objects.filter(pk=run.pk).update(
+        ingestion_status=Run.INGESTION_RUNNING
+    )
+
+    for attempt in range(1, attempts + 1):
+        try:
+            parsed, metrics_summary = fetch_parsed(run, precompute_embeddings)
+            return store_parsed(run, parsed, metrics_summary)
+        except RETRYABLE_ERRORS as exc:
+            logger.warning(
+                'Ingestion attempt %d/%d failed for run %s: %s',
+                attempt,
+                attempts,
+                run.run_id,
+                exc,
+            )
+            if attempt == attempts:
+                _mark_failed(run, exc)
+                raise AgentServiceError(
+                    f'Unable to ingest MultiQC data for run {run.run_id}'
+                ) from exc
+            time.sleep(settings.INGESTION_RETRY_BACKOFF_SECONDS * attempt)
+        except Exception as exc:
+            # Malformed data will not improve on retry
+            _mark_failed(run, exc)
+            raise AgentServiceError(
+                f'Unable to parse MultiQC data for run {run.run_id}'
+            ) from exc
+
+
+def schedule_ingestion(run):
+    """Queue background ingestion for a run that just completed."""
+    Run.objects.filter(pk=run.pk).update(
+        ingestion_status=Run.INGESTION_PENDING
+    )
+    background.submit_on_commit(ingest_run, run.pk)
+
+
+def get_run_data_version(run_id):
+    """``updated_at`` of a run's parsed data (None if not ingested)."""
+    return (
+        RunData.objects.filter(run__run_id=run_id)
+        .values_list('updated_at', flat=True)
+        .first()
+    )
+
+
+async def aget_run_data_version(run_id):
+    """Async variant of ``get_run_data_version``."""
+    return (
+        await RunData.objects.filter(run__run_id=run_id)
+        .values_list('updated_at', flat=True)
+        .afirst()
+    )
+
+
+def get_run_data(run_id):
+    """Return parsed data for a run, ingesting it inline on a cold cache."""
+    run_data = RunData.objects.filter(run__run_id=run_id).first()
+    record_cache('run_data', hit=run_data is not None)
+    if run_data:
+        return run_data
+
+    run = Run.objects.filter(run_id=run_id).first()
+    if run is None:
+        raise AgentServiceError(f'Run {run_id} not found')
+    return ingest_run(run.pk, attempts=1)
+
+
+async def aget_run_data(run_id):
+    """
+    Async variant of ``get_run_data`` for the ASGI chat path.
+
+    DB work stays on Django's thread-sensitive executor while the S3
+    download and parsing run on the agent I/O pool. A cold cache is
+    ingested with a single attempt, like ``get_run_data``.
+
+    Raises:
+        AgentServiceError: If the run is unknown or cannot be ingested
+    """
+    run_data = await RunData.objects.filter(run__run_id=run_id).afirst()
+    record_cache('run_data', hit=run_data is not None)
+    if run_data:
+        return run_data
+
+    run = await Run.objects.filter(run_id=run_id).afirst()
+    if run is None:
+        raise AgentServiceError(f'Run {run_id} not found')
+    return await _ingest_flight.ado(run.pk, lambda: _aingest_run(run))
+
+
+async def _aingest_run(run):
+    await Run.objects.filter(pk=run.pk).aupdate(
+        ingestion_status=Run.INGESTION_RUNNING
+    )
+
+    try:
+        parsed, metrics_summary = await run_blocking(
+            fetch_parsed, run, settings.INGESTION_PRECOMPUTE_EMBEDDINGS
+        )
+    except Exception as exc:
+        await sync_to_async(_mark_failed)(run, exc)
+        raise AgentServiceError(
+            f'Unable to ingest MultiQC data for run {run.run_id}'
+        ) from exc
+    return await sync_to_async(store_parsed)(run, parsed, metrics_summary)
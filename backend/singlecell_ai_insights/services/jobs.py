@@ -0,0 +1,249 @@
+"""DB-backed queue that runs chat turns in separate agent worker processes.
+
+Web processes only enqueue turns and tail their events, so web capacity and
+LLM concurrency scale independently. Workers claim jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED`` and publish each agent event as a
+``ChatJobEvent`` row.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from ..models import ChatJob, ChatJobEvent
+from . import agent, conversations, tracing
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_turn(conversation, question_message, history, metric_key=None):
+    """Queue a chat turn for an agent worker."""
+    return ChatJob.objects.create(
+        conversation=conversation,
+        question_message=question_message,
+        history=history,
+        metric_key=metric_key,
+    )
+
+
+def publish(job, payload):
+    """Record a progress event for clients tailing the job."""
+    return ChatJobEvent.objects.create(job=job, payload=payload)
+
+
+def claim_job(worker_name):
+    """
+    Claim the oldest queued job, skipping rows other workers hold.
+
+    Returns:
+        ChatJob or None when the queue is empty
+    """
+    with transaction.atomic():
+        job = (
+            ChatJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ChatJob.STATUS_QUEUED)
+            .order_by('created_at', 'pk')
+            .first()
+        )
+        if job is None:
+            return None
+        # Guarded update: backends without row locks still claim once
+        claimed = ChatJob.objects.filter(
+            pk=job.pk, status=ChatJob.STATUS_QUEUED
+        ).update(
+            status=ChatJob.STATUS_RUNNING,
+            worker=worker_name,
+            started_at=timezone.now(),
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def cancel_job(job):
+    """Stop a job that has not finished and record the abandoned turn."""
+    cancelled = ChatJob.objects.filter(
+        pk=job.pk, status__in=[ChatJob.STATUS_QUEUED, ChatJob.STATUS_RUNNING]
+    ).update(status=ChatJob.STATUS_CANCELLED, finished_at=timezone.now())
+    if cancelled:
+        conversations.mark_cancelled(job.question_message)
+    return bool(cancelled)
+
+
+def _finish(job, status, error=''):
+    # Never overwrite a cancellation recorded by the web process
+    ChatJob.objects.filter(pk=job.pk, status=ChatJob.STATUS_RUNNING).update(
+        status=status, error=error, finished_at=timezone.now()
+    )
+
+
+def _watch_cancellation(job, cancel_event, done_event):
+    # Polls from its own thread so a cancel lands mid-node, not per event
+    try:
+        while not done_event.wait(settings.AGENT_JOB_POLL_SECONDS):
+            if ChatJob.objects.filter(
+                pk=job.pk, status=ChatJob.STATUS_CANCELLED
+            ).exists():
+                cancel_event.set()
+                return
+    finally:
+        connections.close_all()
+
+
+def run_job(job):
+    """Run a claimed job through the agent and publish its events."""
+    with tracing.trace('chat.job', job_id=job.pk):
+        _run_job(job)
+
+
+def _run_job(job):
+    conversation = job.conversation
+    run = conversation.run
+    cancel_event = threading.Event()
+    done_event = threading.Event()
+    threading.Thread(
+        target=_watch_cancellation,
+        args=(job, cancel_event, done_event),
+        name=f'chat-job-{job.pk}-watch',
+        daemon=True,
+    ).start()
+
+    try:
+        for event in agent.chat_stream(
+            run.run_id,
+            job.question_message.content,
+            conversation_history=job.history,
+            metric_key=job.metric_key,
+            conversation_summary=conversation.summary,
+            cancel_event=cancel_event,
+        ):
+            publish(job, event)
+            if event.get('type') == 'answer':
+                assistant_message = conversations.save_answer(
+                    conversation, event.get('content', {})
+                )
+                publish(
+                    job, {'type': 'message_id', 'id': assistant_message.id}
+                )
+    except agent.AgentCancelled:
+        logger.info('Chat job %s cancelled', job.pk)
+        return
+    except agent.AgentServiceError as exc:
+        logger.warning(
+            'Chat job %s failed for run %s: %s', job.pk, run.run_id, exc
+        )
+        publish(job, agent.error_event(exc))
+        _finish(job, ChatJob.STATUS_FAILED, str(exc))
+        return
+    except Exception as exc:
+        logger.exception('Unexpected error in chat job %s', job.pk)
+        publish(
+            job, {'type': 'error', 'message': 'An unexpected error occurred.'}
+        )
+        _finish(job, ChatJob.STATUS_FAILED, str(exc))
+        return
+    finally:
+        done_event.set()
+
+    _finish(job, ChatJob.STATUS_SUCCEEDED)
+
+
+def fail_stale_jobs():
+    """Fail running jobs whose worker died before finishing them."""
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.AGENT_JOB_TIMEOUT_SECONDS
+    )
+    return ChatJob.objects.filter(
+        status=ChatJob.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(
+        status=ChatJob.STATUS_FAILED,
+        error='Worker did not finish the job in time',
+        finished_at=timezone.now(),
+    )
+
+
+def work(worker_name, stop_event, poll_interval=None):
+    """
+    Claim and run jobs until ``stop_event`` is set.
+
+    Args:
+        worker_name: Identifier stored on claimed jobs
+        stop_event: ``threading.Event`` that ends the loop
+        poll_interval: Seconds to sleep when the queue is empty
+    """
+    if poll_interval is None:
+        poll_interval = settings.AGENT_JOB_POLL_SECONDS
+
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            job = claim_job(worker_name)
+            if job is None:
+                fail_stale_jobs()
+                stop_event.wait(poll_interval)
+                continue
+            run_job(job)
+        except Exception:
+            logger.exception('Chat worker %s loop failed', worker_name)
+            time.sleep(poll_interval)
+    connections.close_all()
+
+
+def tail_events(job, after=0, cancel_on_close=False):
+    """
+    Yield a job's events as they are published, then stop.
+
+    Yields ``None`` when no event arrived within the poll interval, so
+    callers can send heartbeats. Stops once the job has finished and all
+    of its events were delivered.
+
+    Args:
+        job: The ChatJob to follow
+        after: Only yield events with a greater id (SSE ``Last-Event-ID``)
+        cancel_on_close: Cancel the job if the consumer goes away early
+
+    Yields:
+        ChatJobEvent or None
+    """
+    deadline = time.monotonic() + settings.AGENT_JOB_TIMEOUT_SECONDS
+    heartbeat_at = time.monotonic() + settings.AGENT_SSE_HEARTBEAT_SECONDS
+    finished = False
+    try:
+        while True:
+            # Read status first so no event published before it is missed
+            finished = (
+                ChatJob.objects.filter(
+                    pk=job.pk, status__in=ChatJob.FINISHED_STATUSES
+                ).exists()
+                or time.monotonic() > deadline
+            )
+            events = list(
+                ChatJobEvent.objects.filter(job=job, pk__gt=after).order_by(
+                    'pk'
+                )
+            )
+            for event in events:
+                after = event.pk
+                yield event
+            if finished:
+                return
+            if events:
+                heartbeat_at = (
+                    time.monotonic() + settings.AGENT_SSE_HEARTBEAT_SECONDS
+                )
+            elif time.monotonic() >= heartbeat_at:
+                heartbeat_at = (
+                    time.monotonic() + settings.AGENT_SSE_HEARTBEAT_SECONDS
+                )
+                yield None
+            time.sleep(settings.AGENT_JOB_POLL_SECONDS)
+    except GeneratorExit:
+        if cancel_on_close and not finished:
+            cancel_job(job)
+        raise
@@ -0,0 +1,428 @@
+"""In-process metrics registry rendered in the Prometheus text format.
+
+Under gunicorn each worker process keeps its own values. When
+``METRICS_MULTIPROC_DIR`` is set, every process periodically writes a
+snapshot to that directory and rendering merges all snapshots: counters
+and histograms are summed over every process that ever wrote one, while
+gauges only count processes that are still alive. The counters and
+histograms of exited processes are folded into a single file, so a new
+worker reusing a pid cannot overwrite them.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds; suits S3 reads, graph nodes and Bedrock calls alike
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Counters and histograms of exited processes, summed
+EXITED_SNAPSHOT = 'metrics-exited.json'
+_FOLD_LOCK = 'metrics.lock'
+
+GAUGE_SUM = 'sum'
+GAUGE_MAX = 'max'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for name, value in labels.items()
+    )
+    return f'{{{pairs}}}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f'{self.name} expects labels {self.labelnames}, '
+                f'got {tuple(labels)}'
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels):
+        """Current value for a label combination (0 if never set)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def snapshot(self):
+        """List of ``[label values, value]`` pairs, safe to serialise."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def _reset_after_fork(self):
+        # The lock may have been held by a thread that does not exist here
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _updated(self):
+        REGISTRY.start_flusher()
+
+    def merge(self, snapshots):
+        """Combine per-process snapshots into ``{key: value}``."""
+        merged = {}
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def lines(self, values):
+        for key, value in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            yield f'{self.name}{_format_labels(labels)} {_format_value(value)}'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._updated()
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(
+        self, name, documentation, labelnames=(), multiprocess_mode=GAUGE_SUM
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+        self._updated()
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._updated()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def merge(self, snapshots):
+        if self.multiprocess_mode == GAUGE_SUM:
+            return super().merge(snapshots)
+        merged = {}
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                merged[key] = max(merged.get(key, value), value)
+        return merged
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {
+                    'buckets': [0] * len(self.buckets),
+                    'sum': 0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+        self._updated()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the enclosed block took, in seconds."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def value(self, **labels):
+        """Observation count for a label combination."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry['count'] if entry else 0
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [list(key), {**entry, 'buckets': list(entry['buckets'])}]
+                for key, entry in self._values.items()
+            ]
+
+    def merge(self, snapshots):
+        merged = {}
+        for snapshot in snapshots:
+            for key, entry in snapshot:
+                key = tuple(key)
+                total = merged.setdefault(
+                    key,
+                    {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0},
+                )
+                for index, count in enumerate(entry['buckets']):
+                    total['buckets'][index] += count
+                total['sum'] += entry['sum']
+                total['count'] += entry['count']
+        return merged
+
+    def lines(self, values):
+        for key, entry in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['buckets']):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    {**labels, 'le': _format_value(float(bound))}
+                )
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            inf_labels = _format_labels({**labels, 'le': '+Inf'})
+            yield f'{self.name}_bucket{inf_labels} {entry["count"]}'
+            suffix = _format_labels(labels)
+            yield f'{self.name}_sum{suffix} {_format_value(entry["sum"])}'
+            yield f'{self.name}_count{suffix} {entry["count"]}'
+
+
+def _write_json(path, values):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as handle:
+        json.dump(values, handle)
+    os.replace(temp_path, path)
+
+
+def _read_json(path):
+    """Parsed file, or None if it is missing or being replaced."""
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._flusher = None
+        self._flusher_pid = None
+
+    def register(self, metric):
+        """Add a metric, returning the existing one if already known."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _sorted_metrics(self):
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: m.name)
+
+    def snapshot(self):
+        return {
+            metric.name: metric.snapshot() for metric in self._sorted_metrics()
+        }
+
+    def write_snapshot(self, directory):
+        """Atomically write this process's values into ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        _write_json(path, self.snapshot())
+
+    def _fold_exited(self, directory, pids):
+        """
+        Fold the snapshots of exited processes into ``EXITED_SNAPSHOT``.
+
+        Each snapshot is deleted once folded. Gauges are dropped, as only
+        live processes count for them.
+
+        Returns:
+            dict: Values of every exited process folded so far
+        """
+        path = os.path.join(directory, EXITED_SNAPSHOT)
+        with open(os.path.join(directory, _FOLD_LOCK), 'a') as lock:
+            # Rendering workers must not fold the same snapshot twice
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                exited = _read_json(path) or {}
+                for pid in pids:
+                    snapshot_path = os.path.join(
+                        directory, f'metrics-{pid}.json'
+                    )
+                    values = _read_json(snapshot_path)
+                    # Folded meanwhile, or the pid went to a new worker
+                    if values is None or _pid_alive(pid):
+                        continue
+                    for metric in self._sorted_metrics():
+                        if metric.kind == 'gauge':
+                            continue
+                        merged = metric.merge(
+                            [
+                                exited.get(metric.name, []),
+                                values.get(metric.name, []),
+                            ]
+                        )
+                        exited[metric.name] = [
+                            [list(key), value] for key, value in merged.items()
+                        ]
+                    _write_json(path, exited)
+                    os.remove(snapshot_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return exited
+
+    def _read_snapshots(self, directory):
+        self.write_snapshot(directory)
+        snapshots = []
+        exited_pids = []
+        for filename in os.listdir(directory):
+            if filename == EXITED_SNAPSHOT or not (
+                filename.startswith('metrics-') and filename.endswith('.json')
+            ):
+                continue
+            pid = int(filename[len('metrics-') : -len('.json')])
+            if not _pid_alive(pid):
+                exited_pids.append(pid)
+                continue
+            values = _read_json(os.path.join(directory, filename))
+            if values is None:
+                # Being replaced right now; its next snapshot will count
+                continue
+            snapshots.append((True, values))
+        snapshots.append((False, self._fold_exited(directory, exited_pids)))
+        return snapshots
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        directory = settings.METRICS_MULTIPROC_DIR
+        snapshots = self._read_snapshots(directory) if directory else None
+
+        lines = []
+        for metric in self._sorted_metrics():
+            if snapshots is None:
+                per_process = [metric.snapshot()]
+            else:
+                per_process = [
+                    values.get(metric.name, [])
+                    for alive, values in snapshots
+                    if alive or metric.kind != 'gauge'
+                ]
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.lines(metric.merge(per_process)))
+        return '\n'.join(lines) + '\n'
+
+    def _flush_forever(self, directory, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.write_snapshot(directory)
+            except OSError:
+                logger.exception('Unable to write metrics snapshot')
+
+    def start_flusher(self):
+        """Start writing snapshots in the background, once per process."""
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_forever,
+            args=(directory, settings.METRICS_FLUSH_SECONDS),
+            name='metrics-flush',
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def _reset_after_fork(self):
+        # A forked worker must not report its parent's values as its own
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._reset_after_fork()
+        self._flusher = None
+        self._flusher_pid = None
+
+
+REGISTRY = Registry()
+os.register_at_fork(after_in_child=REGISTRY._reset_after_fork)
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=(), multiprocess_mode=GAUGE_SUM):
+    return REGISTRY.register(
+        Gauge(name, documentation, labelnames, multiprocess_mode)
+    )
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(
+        Histogram(name, documentation, labelnames, buckets)
+    )
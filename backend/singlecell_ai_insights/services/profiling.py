@@ -0,0 +1,254 @@
+"""On-demand profiling of single requests.
+
+Two profilers are available. The sampling profiler walks every thread's
+stack at a fixed interval and writes collapsed stacks (one
+``frame;frame;frame count`` line per distinct stack), which flamegraph
+tools and speedscope read directly. It sees the agent's worker threads,
+so it is the one to use for chat turns. The deterministic profiler is
+:mod:`cProfile` and writes a :mod:`pstats` file, but it only records
+calls made on the thread that serves the request.
+
+Only one request per process is profiled at a time. Profiles are kept in
+``PROFILING_DIR`` next to a JSON metadata file, and the oldest are
+deleted once the directory grows past ``PROFILING_MAX_BYTES``.
+"""
+
+import cProfile
+import json
+import logging
+import marshal
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MODE_SAMPLING = 'sampling'
+MODE_DETERMINISTIC = 'deterministic'
+MODES = (MODE_SAMPLING, MODE_DETERMINISTIC)
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$')
+
+_active = threading.Lock()
+
+
+def _path_prefixes():
+    prefixes = {os.path.abspath(path) for path in sys.path if path}
+    prefixes.add(str(settings.BASE_DIR))
+    return sorted(prefixes, key=len, reverse=True)
+
+
+def _frame_label(code, prefixes):
+    filename = code.co_filename
+    for prefix in prefixes:
+        if filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1 :]
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """Sample the stacks of all threads on a background thread."""
+
+    extension = 'folded'
+
+    def __init__(self, interval, max_seconds):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._sample_forever, name='profile-sampler', daemon=True
+        )
+        self._thread.start()
+
+    def step(self):
+        # Samples are taken from every thread; nothing to do per step
+        return nullcontext()
+
+    def _sample_forever(self):
+        prefixes = _path_prefixes()
+        own = threading.get_ident()
+        stop_at = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= stop_at:
+                logger.warning('Profile hit PROFILING_MAX_SECONDS; stopped')
+                return
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code, prefixes))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        """Stop sampling and return the collapsed stacks as bytes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self._stacks.items()
+        ).encode()
+
+
+class DeterministicProfiler:
+    """:mod:`cProfile` run around each step on the calling thread."""
+
+    extension = 'prof'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        pass
+
+    @contextmanager
+    def step(self):
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def stop(self):
+        """Return the stats in the format :mod:`pstats` loads."""
+        self._profile.create_stats()
+        return marshal.dumps(self._profile.stats)
+
+
+def start(mode):
+    """
+    Start profiling unless another profile is already running.
+
+    Args:
+        mode: One of ``MODES``
+
+    Returns:
+        The started profiler, or ``None`` if one is already running; its
+        ``profile_id`` names the profile it will be stored under
+    """
+    if not _active.acquire(blocking=False):
+        logger.info('Skipping profile; another one is running')
+        return None
+    if mode == MODE_DETERMINISTIC:
+        profiler = DeterministicProfiler()
+    else:
+        profiler = SamplingProfiler(
+            settings.PROFILING_SAMPLE_INTERVAL,
+            settings.PROFILING_MAX_SECONDS,
+        )
+    profiler.profile_id = (
+        f'{time.strftime("%Y%m%dT%H%M%S", time.gmtime())}-'
+        f'{secrets.token_hex(4)}'
+    )
+    profiler.start()
+    return profiler
+
+
+def finish(profiler, metadata):
+    """
+    Stop a profiler started by :func:`start` and store its profile.
+
+    Args:
+        profiler: The running profiler
+        metadata: JSON-serialisable details about the profiled request
+
+    Returns:
+        dict: The stored profile's metadata
+    """
+    try:
+        data = profiler.stop()
+    finally:
+        _active.release()
+    return save(profiler.profile_id, data, profiler.extension, metadata)
+
+
+def save(profile_id, data, extension, metadata):
+    """Write a profile and its metadata, then enforce the size cap."""
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    filename = f'{profile_id}.{extension}'
+    with open(os.path.join(directory, filename), 'wb') as handle:
+        handle.write(data)
+    metadata = {
+        **metadata,
+        'id': profile_id,
+        'filename': filename,
+        'size': len(data),
+        'created_at': time.time(),
+    }
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as handle:
+        json.dump(metadata, handle)
+    prune()
+    return metadata
+
+
+def list_profiles():
+    """Metadata of stored profiles, newest first."""
+    directory = settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as handle:
+                profiles.append(json.load(handle))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda p: p['created_at'], reverse=True)
+
+
+def get_profile(profile_id):
+    """
+    Look up a stored profile.
+
+    Returns:
+        tuple: ``(metadata, path)``, or ``None`` if there is no such profile
+    """
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    directory = settings.PROFILING_DIR
+    try:
+        with open(os.path.join(directory, f'{profile_id}.json')) as handle:
+            metadata = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    path = os.path.join(directory, metadata['filename'])
+    if not os.path.exists(path):
+        return None
+    return metadata, path
+
+
+def prune():
+    """Delete the oldest profiles until the directory fits the size cap."""
+    directory = settings.PROFILING_DIR
+    profiles = list_profiles()
+    total = sum(profile['size'] for profile in profiles)
+    while profiles and total > settings.PROFILING_MAX_BYTES:
+        oldest = profiles.pop()
+        for name in (oldest['filename'], f'{oldest["id"]}.json'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+        total -= oldest['size']
@@ -0,0 +1,238 @@
+"""Coalesce concurrent identical work so it runs once per key.
+
+Within a process, callers that ask for a key already in flight wait for
+the leader and share its result (or exception). Results cannot be shared
+across processes, so with a ``file`` or ``db`` backend the leader also
+holds a cross-process lock for the key and callers pass a ``check`` that
+returns the stored result another process may have produced meanwhile.
+
+Work never runs outside that coordination: a caller that times out
+waiting for the lock or for the leader checks for a stored result once
+more, then gives up with a retryable :class:`AgentBusy`.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from .agent.exceptions import AgentBusy
+
+logger = logging.getLogger(__name__)
+
+BACKEND_LOCAL = 'local'
+BACKEND_FILE = 'file'
+BACKEND_DB = 'db'
+
+_LOCK_POLL_SECONDS = 0.05
+
+
+def _key_digest(key):
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _file_lock(key, timeout):
+    os.makedirs(settings.SINGLE_FLIGHT_LOCK_DIR, exist_ok=True)
+    path = os.path.join(
+        settings.SINGLE_FLIGHT_LOCK_DIR, f'{_key_digest(key)}.lock'
+    )
+    deadline = time.monotonic() + timeout
+    with open(path, 'a') as handle:
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning('Timed out waiting for lock %s', key)
+                    yield False
+                    return
+                time.sleep(_LOCK_POLL_SECONDS)
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _db_lock(key, timeout):
+    if connection.vendor != 'postgresql':
+        raise ImproperlyConfigured(
+            'The db single-flight backend requires PostgreSQL'
+        )
+    # Advisory locks take a signed 64-bit key
+    lock_id = int(_key_digest(key)[:16], 16) - 2**63
+    deadline = time.monotonic() + timeout
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [lock_id])
+            if cursor.fetchone()[0]:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning('Timed out waiting for lock %s', key)
+                yield False
+                return
+            time.sleep(_LOCK_POLL_SECONDS)
+        try:
+            yield True
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [lock_id])
+
+
+def _process_lock(key, timeout):
+    backend = settings.SINGLE_FLIGHT_BACKEND
+    if backend == BACKEND_FILE:
+        return _file_lock(key, timeout)
+    if backend == BACKEND_DB:
+        return _db_lock(key, timeout)
+    if backend == BACKEND_LOCAL:
+        return nullcontext(True)
+    raise ImproperlyConfigured(f'Unknown single-flight backend: {backend}')
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Keyed single-flight group.
+
+    Args:
+        namespace: Prefix that keeps keys of different groups apart
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def do(self, key, fn, check=None):
+        """
+        Run ``fn()`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Identifies identical work
+            fn: Zero-argument callable doing the work
+            check: Optional zero-argument callable returning an already
+                stored result (or None); enables the cross-process lock
+
+        Returns:
+            The shared result of ``fn`` (or ``check``)
+
+        Raises:
+            AgentBusy: If the work is still running elsewhere after
+                waiting ``SINGLE_FLIGHT_TIMEOUT_SECONDS``
+        """
+        return self._do(key, fn, check, rejoin=True)
+
+    def _busy(self, key):
+        logger.warning(
+            'Single-flight %s:%s timed out; giving up', self.namespace, key
+        )
+        return AgentBusy(
+            f'Timed out waiting for {self.namespace}:{key}',
+            settings.AGENT_RETRY_AFTER_SECONDS,
+        )
+
+    def _do(self, key, fn, check, rejoin):
+        timeout = settings.SINGLE_FLIGHT_TIMEOUT_SECONDS
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            if not rejoin:
+                raise self._busy(key)
+            # Join (or lead) whatever call is in flight now, once more
+            return self._do(key, fn, check, rejoin=False)
+
+        try:
+            call.result = self._lead(key, fn, check, timeout)
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _lead(self, key, fn, check, timeout):
+        if check is None:
+            return fn()
+        with _process_lock(f'{self.namespace}:{key}', timeout) as locked:
+            result = check()
+            if result is not None:
+                return result
+            if not locked:
+                # Another process still holds the work; never run it twice
+                raise self._busy(key)
+            return fn()
+
+    async def ado(self, key, afn):
+        """
+        Async :meth:`do` for coroutines sharing one event loop.
+
+        Only callers on the same event loop are coalesced: there is no
+        ``check`` and no cross-process lock, so ``afn`` must itself be
+        safe to run concurrently with other loops, threads and processes
+        (e.g. by going through :meth:`do` for work that must not repeat).
+
+        Args:
+            key: Identifies identical work
+            afn: Zero-argument coroutine function doing the work
+
+        Returns:
+            The shared result of ``afn``
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        while True:
+            future = self._async_calls.get(loop_key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled; retry or lead ourselves
+                if not future.cancelled():
+                    raise
+
+        future = loop.create_future()
+        self._async_calls[loop_key] = future
+        try:
+            result = await afn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved; followers re-raise it through the future
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._async_calls.get(loop_key) is future:
+                del self._async_calls[loop_key]
@@ -0,0 +1,331 @@
+"""Lightweight request tracing for chat turns.
+
+A chat view opens a root span with :func:`trace`; graph nodes, S3 reads,
+Bedrock calls and DB queries open child spans with :func:`span`. The
+active span lives in a context variable, which the agent pools copy onto
+their threads, so children attach to the right parent across threads.
+When the root span ends, the whole trace is handed to the configured
+exporter. Unsampled requests record nothing.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+EXPORTER_JSONL = 'jsonl'
+EXPORTER_OTLP = 'otlp'
+EXPORTER_NONE = 'none'
+
+_current = contextvars.ContextVar('trace_span', default=None)
+
+
+class _Trace:
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.lock = threading.Lock()
+        self.spans = []
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+        with self.trace.lock:
+            self.trace.spans.append(self)
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class JsonLinesExporter:
+    """Append one JSON object per span to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(
+            json.dumps(span.as_dict(), default=str) + '\n' for span in spans
+        )
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as handle:
+                handle.write(lines)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OtlpHttpExporter:
+    """
+    Send traces to an OTLP/HTTP collector using the JSON encoding.
+
+    Export runs on a background thread so requests never wait on the
+    collector; traces are dropped if it falls too far behind.
+    """
+
+    def __init__(self, endpoint, service_name, timeout=5, max_queue=1000):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.service_name = service_name
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        threading.Thread(
+            target=self._send_forever, name='trace-export', daemon=True
+        ).start()
+
+    def export(self, spans):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning('Dropping trace; OTLP exporter is behind')
+
+    def _payload(self, spans):
+        return {
+            'resourceSpans': [
+                {
+                    'resource': {
+                        'attributes': [
+                            {
+                                'key': 'service.name',
+                                'value': _otlp_value(self.service_name),
+                            }
+                        ]
+                    },
+                    'scopeSpans': [
+                        {
+                            'scope': {'name': __name__},
+                            'spans': [self._span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _span(self, span):
+        payload = {
+            'traceId': span.trace.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 1,
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': [
+                {'key': key, 'value': _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            'status': (
+                {'code': 2, 'message': span.error}
+                if span.error
+                else {'code': 1}
+            ),
+        }
+        if span.parent_id:
+            payload['parentSpanId'] = span.parent_id
+        return payload
+
+    def _send_forever(self):
+        while True:
+            spans = self._queue.get()
+            request = urllib.request.Request(
+                self.url,
+                data=json.dumps(self._payload(spans)).encode(),
+                headers={'Content-Type': 'application/json'},
+                method='POST',
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    pass
+            except OSError as exc:
+                logger.warning('Unable to export trace: %s', exc)
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _build_exporter():
+    name = settings.TRACING_EXPORTER
+    if name == EXPORTER_JSONL:
+        return JsonLinesExporter(settings.TRACING_FILE)
+    if name == EXPORTER_OTLP:
+        return OtlpHttpExporter(
+            settings.TRACING_OTLP_ENDPOINT, settings.TRACING_SERVICE_NAME
+        )
+    if name == EXPORTER_NONE:
+        return None
+    # Anything else is a dotted path to a class with ``export(spans)``
+    return import_string(name)()
+
+
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = _build_exporter()
+    return _exporter
+
+
+def _export(trace):
+    exporter = get_exporter()
+    if exporter is None:
+        return
+    try:
+        exporter.export(trace.spans)
+    except Exception:
+        logger.exception('Unable to export trace %s', trace.trace_id)
+
+
+def current_span():
+    """The active recording span, or ``None``."""
+    return _current.get()
+
+
+@contextmanager
+def _activate(span):
+    token = _current.set(span)
+    try:
+        yield span
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. a generator closed late)
+            _current.set(None)
+
+
+@contextmanager
+def trace(name, **attributes):
+    """
+    Open a root span, sampled at ``TRACING_SAMPLE_RATE``.
+
+    Nested inside an active trace, this opens a child span instead.
+
+    Yields:
+        Span or None: The root span if the request is sampled
+    """
+    parent = _current.get()
+    if parent is not None:
+        with span(name, **attributes) as child:
+            yield child
+        return
+    if random.random() >= settings.TRACING_SAMPLE_RATE:
+        yield None
+        return
+
+    # Connections opened before this module was imported lack the hook
+    _install_query_tracing(None, connection)
+    root = Span(_Trace(secrets.token_hex(16)), name, attributes=attributes)
+    error = None
+    try:
+        with _activate(root):
+            yield root
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        root.finish(error)
+        _export(root.trace)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Open a child of the active span; a no-op outside a sampled trace.
+
+    Yields:
+        Span or None: The new span, if one is recorded
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    error = None
+    try:
+        with _activate(child):
+            yield child
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        child.finish(error)
+
+
+def traced_stream(stream_fn, name, **attributes):
+    """Iterate ``stream_fn()`` inside a root span that spans the stream."""
+    with trace(name, **attributes):
+        yield from stream_fn()
+
+
+async def atraced_stream(stream_fn, name, **attributes):
+    """Async :func:`traced_stream` for an async generator function."""
+    with trace(name, **attributes):
+        async for item in stream_fn():
+            yield item
+
+
+def _trace_query(execute, sql, params, many, context):
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    with span('db.query', statement=sql[:200], many=many):
+        return execute(sql, params, many, context)
+
+
+def _install_query_tracing(sender, connection, **kwargs):
+    if _trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_trace_query)
+
+
+connection_created.connect(_install_query_tracing)
@@ -0,0 +1,112 @@
+"""
+Process warmup for the web server.
+
+The first chat turn in a fresh process imports LangGraph, LangChain and
+FAISS, compiles the graph and builds the AWS clients. Under gunicorn with
+``preload_app`` this runs once in the master, so workers inherit it
+copy-on-write instead of each paying for it on a user's request.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# smaps_rollup fields, in kB, that make up a process's memory footprint
+_MEMORY_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Private_Clean': 'uss',
+    'Private_Dirty': 'uss',
+}
+
+
+def warm_up(recent_runs=0):
+    """
+    Import and build everything a first chat turn would need.
+
+    Nothing here opens a network connection, and database connections are
+    closed again, so it is safe to run before forking.
+
+    Args:
+        recent_runs: Also load the contexts of this many most recently
+            ingested runs, with their indexes where vectors are stored
+
+    Returns:
+        dict: Seconds spent per step
+    """
+    from django.conf import settings
+    from django.urls import get_resolver
+
+    from ..aws.clients import build
+
+    timings = {}
+    started = time.perf_counter()
+
+    def step(name):
+        nonlocal started
+        now = time.perf_counter()
+        timings[name] = round(now - started, 3)
+        started = now
+
+    get_resolver().url_patterns
+    step('urls')
+
+    import faiss  # noqa: F401
+
+    from .agent import agent  # noqa: F401  (compiles the graph)
+
+    step('agent')
+
+    from .agent.config import emb, llm
+
+    build(settings.AWS_S3_CLIENT, settings.AWS_HEALTHOMICS_CLIENT, llm, emb)
+    step('clients')
+
+    if recent_runs:
+        warm_runs(recent_runs)
+        step('runs')
+    logger.info('Warmed up in %.2fs: %s', sum(timings.values()), timings)
+    return timings
+
+
+def warm_runs(count):
+    """Cache the contexts of the ``count`` most recently ingested runs."""
+    from django.db import connections
+
+    from ..models import RunData
+    from .agent import run_context
+    from .agent.nodes.data_loading import warm_index
+
+    run_ids = RunData.objects.order_by('-updated_at').values_list(
+        'run__run_id', flat=True
+    )[:count]
+    try:
+        for run_id in run_ids:
+            warm_index(run_context.load(run_id))
+    finally:
+        # Forked workers must not share the master's connection
+        connections.close_all()
+
+
+def process_memory(pid='self'):
+    """
+    Memory footprint of a process, in bytes.
+
+    ``rss`` counts pages shared with other workers in full, ``pss``
+    splits them between the processes sharing them, and ``uss`` is what
+    only this process uses. Empty where ``/proc`` is unavailable.
+    """
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as handle:
+            for line in handle:
+                name, _, rest = line.partition(':')
+                key = _MEMORY_FIELDS.get(name)
+                if key:
+                    usage[key] = (
+                        usage.get(key, 0) + int(rest.split()[0]) * 1024
+                    )
+    except (OSError, ValueError):
+        return {}
+    return usage
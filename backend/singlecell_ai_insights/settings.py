@@ -8,9 +8,10 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
-import boto3
 from dotenv import load_dotenv
 
+from singlecell_ai_insights.aws.clients import lazy_client
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -58,6 +59,9 @@ INSTALLED_APPS = [
     'singlecell_ai_insights',
 ]
 
+# wsgi (gthread workers) or asgi (uvicorn workers); see gunicorn_conf.py
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -66,9 +70,14 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'singlecell_ai_insights.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if SERVER_MODE == 'asgi':
+    # WhiteNoise is sync-only, and one sync middleware puts every async
+    # view on a thread of its own; asgi.py serves static files instead
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
 
 ROOT_URLCONF = 'singlecell_ai_insights.urls'
 
@@ -225,8 +234,103 @@ CSRF_TRUSTED_ORIGINS = (
 )
 
 
-# AWS clients & configuration
-session = boto3.Session(region_name=os.environ['AWS_REGION'])
-AWS_HEALTHOMICS_CLIENT = session.client('omics')
-AWS_S3_CLIENT = session.client('s3')
+# Background work (ingestion, summaries) runs on a local thread pool
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', '2'))
+INGESTION_MAX_ATTEMPTS = int(os.getenv('INGESTION_MAX_ATTEMPTS', '3'))
+INGESTION_RETRY_BACKOFF_SECONDS = float(
+    os.getenv('INGESTION_RETRY_BACKOFF_SECONDS', '2')
+)
+INGESTION_PRECOMPUTE_EMBEDDINGS = _env_bool(
+    'INGESTION_PRECOMPUTE_EMBEDDINGS', False
+)
+
+# Bulk metrics endpoint limits
+BULK_METRICS_MAX_RUNS = int(os.getenv('BULK_METRICS_MAX_RUNS', '200'))
+BULK_METRICS_WORKERS = int(os.getenv('BULK_METRICS_WORKERS', '4'))
+
+# Serve chat through the async views (requires an ASGI server)
+AGENT_ASYNC_VIEWS = _env_bool('AGENT_ASYNC_VIEWS', SERVER_MODE == 'asgi')
+
+# SSE comment sent while the agent works, so proxies keep the stream open
+AGENT_SSE_HEARTBEAT_SECONDS = float(
+    os.getenv('AGENT_SSE_HEARTBEAT_SECONDS', '15')
+)
+
+# Optional DB-backed queue: chat turns run in `manage.py chat_worker`
+AGENT_JOB_QUEUE = _env_bool('AGENT_JOB_QUEUE', False)
+AGENT_JOB_POLL_SECONDS = float(os.getenv('AGENT_JOB_POLL_SECONDS', '0.5'))
+AGENT_JOB_TIMEOUT_SECONDS = int(os.getenv('AGENT_JOB_TIMEOUT_SECONDS', '600'))
+CHAT_WORKER_PROCESSES = int(os.getenv('CHAT_WORKER_PROCESSES', '2'))
+CHAT_WORKER_THREADS = int(os.getenv('CHAT_WORKER_THREADS', '4'))
+
+# Coalescing of identical concurrent work: local, file or db (PostgreSQL)
+SINGLE_FLIGHT_BACKEND = os.getenv('SINGLE_FLIGHT_BACKEND', 'local')
+SINGLE_FLIGHT_LOCK_DIR = os.getenv(
+    'SINGLE_FLIGHT_LOCK_DIR', '/tmp/singlecell-ai-insights-locks'
+)
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(
+    os.getenv('SINGLE_FLIGHT_TIMEOUT_SECONDS', '300')
+)
+
+# Admission control for agent turns run in this process
+if SERVER_MODE == 'asgi':
+    _DEFAULT_MAX_IN_FLIGHT, _DEFAULT_QUEUE_SIZE = 8, 16
+else:
+    # A gthread worker serves GUNICORN_THREADS requests at once (see
+    # gunicorn_conf.py) and a waiting turn holds one of them: half run
+    # turns, the rest may wait, and one is left for other requests
+    _THREADS = int(os.getenv('GUNICORN_THREADS', '4'))
+    _DEFAULT_MAX_IN_FLIGHT = max(1, _THREADS // 2)
+    _DEFAULT_QUEUE_SIZE = max(0, _THREADS - _DEFAULT_MAX_IN_FLIGHT - 1)
+AGENT_MAX_IN_FLIGHT = int(
+    os.getenv('AGENT_MAX_IN_FLIGHT', str(_DEFAULT_MAX_IN_FLIGHT))
+)
+AGENT_MAX_TURNS_PER_USER = int(os.getenv('AGENT_MAX_TURNS_PER_USER', '2'))
+AGENT_ADMISSION_QUEUE_SIZE = int(
+    os.getenv('AGENT_ADMISSION_QUEUE_SIZE', str(_DEFAULT_QUEUE_SIZE))
+)
+AGENT_ADMISSION_WAIT_SECONDS = float(
+    os.getenv('AGENT_ADMISSION_WAIT_SECONDS', '10')
+)
+AGENT_RETRY_AFTER_SECONDS = int(os.getenv('AGENT_RETRY_AFTER_SECONDS', '5'))
+
+# /api/metrics/: set a shared dir so gunicorn workers report together;
+# scrapers may send "Authorization: Bearer $METRICS_TOKEN" instead of a login
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Tracing of chat turns: share of requests traced, and where spans go
+# (jsonl, otlp, none, or a dotted path to an exporter class)
+TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', '0'))
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'jsonl')
+TRACING_FILE = os.getenv(
+    'TRACING_FILE', '/tmp/singlecell-ai-insights.traces.jsonl'
+)
+TRACING_OTLP_ENDPOINT = os.getenv(
+    'TRACING_OTLP_ENDPOINT', 'http://localhost:4318'
+)
+TRACING_SERVICE_NAME = os.getenv(
+    'TRACING_SERVICE_NAME', 'singlecell-ai-insights'
+)
+
+# Staff may profile a request with "X-Profile: sampling|deterministic";
+# profiles are kept under PROFILING_DIR up to PROFILING_MAX_BYTES in total
+PROFILING_ENABLED = _env_bool('PROFILING_ENABLED', True)
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', '/tmp/singlecell-ai-insights-profiles'
+)
+PROFILING_MAX_BYTES = int(os.getenv('PROFILING_MAX_BYTES', str(200 * 2**20)))
+PROFILING_SAMPLE_INTERVAL = float(
+    os.getenv('PROFILING_SAMPLE_INTERVAL', '0.005')
+)
+PROFILING_MAX_SECONDS = float(os.getenv('PROFILING_MAX_SECONDS', '300'))
+
+
+# AWS clients & configuration; built on first use, as importing boto3
+# would slow down every process start
+AWS_HEALTHOMICS_CLIENT = lazy_client(
+    'omics', region_name=os.environ['AWS_REGION']
+)
+AWS_S3_CLIENT = lazy_client('s3', region_name=os.environ['AWS_REGION'])
 AWS_S3_PRESIGN_TTL = int(os.environ['AWS_S3_PRESIGN_TTL'])
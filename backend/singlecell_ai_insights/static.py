@@ -0,0 +1,42 @@
+"""Static files for ASGI deployments.
+
+WhiteNoise's middleware is sync-only, and Django runs every async view on
+a thread of its own as long as one sync middleware is in the chain. Under
+ASGI the files collected into ``STATIC_ROOT`` are therefore served in
+front of the Django application, so requests for them never reach the
+middleware and API requests never pass through WhiteNoise.
+"""
+
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.views import static
+
+# Names ManifestStaticFilesStorage gives files, e.g. ``base.1a2b3c4d5e6f.css``
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+# As WhiteNoise sends them
+IMMUTABLE_CACHE_CONTROL = 'max-age=315360000, public, immutable'
+CACHE_CONTROL = 'max-age=60, public'
+
+
+class CollectedStaticFilesHandler(ASGIStaticFilesHandler):
+    """
+    Serve ``STATIC_URL`` from ``STATIC_ROOT``, passing other requests on.
+
+    Files are read on a worker thread, away from the event loop. Hashed
+    names are cached for good, others briefly.
+    """
+
+    def serve(self, request):
+        path = self.file_path(request.path)
+        response = static.serve(
+            request, path, document_root=settings.STATIC_ROOT
+        )
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL
+            if _HASHED_NAME.search(path)
+            else CACHE_CONTROL
+        )
+        return response
@@ -0,0 +1,225 @@
+import threading
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights import gunicorn_conf
+from singlecell_ai_insights.models import Message, Run
+from singlecell_ai_insights.services import admission, metrics
+
+LIMITS = {
+    'AGENT_MAX_IN_FLIGHT': 1,
+    'AGENT_MAX_TURNS_PER_USER': 1,
+    'AGENT_ADMISSION_QUEUE_SIZE': 1,
+    'AGENT_ADMISSION_WAIT_SECONDS': 0.05,
+    'AGENT_RETRY_AFTER_SECONDS': 7,
+}
+
+
+class ShippedLimitsTests(SimpleTestCase):
+    @override_settings(AGENT_ADMISSION_WAIT_SECONDS=5)
+    def test_queue_engages_within_one_gthread_worker(self):
+        threads = gunicorn_conf.threads
+        limit = settings.AGENT_MAX_IN_FLIGHT
+        queue_size = settings.AGENT_ADMISSION_QUEUE_SIZE
+        # Waiting turns hold threads too; one is left for other requests
+        self.assertGreaterEqual(queue_size, 1)
+        self.assertLess(limit + queue_size, threads)
+
+        controller = admission.AdmissionController()
+        held = [controller.acquire(f'user-{i}') for i in range(limit)]
+        admitted = []
+        waiters = [
+            threading.Thread(
+                target=lambda i=i: admitted.append(
+                    controller.acquire(f'waiter-{i}')
+                )
+            )
+            for i in range(queue_size)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        for _ in range(100):
+            if controller._waiting == queue_size:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual(admission.QUEUE_DEPTH.value(), queue_size)
+        with self.assertRaises(admission.AdmissionRejected) as ctx:
+            controller.acquire('one-thread-too-many')
+        self.assertEqual(ctx.exception.status_code, 503)
+
+        for ticket in held:
+            ticket.release()
+        for waiter in waiters:
+            waiter.join(5)
+            self.assertFalse(waiter.is_alive())
+        for ticket in admitted:
+            ticket.release()
+        self.assertEqual(controller._in_flight, 0)
+
+
+@override_settings(**LIMITS)
+class AdmissionControllerTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.controller = admission.AdmissionController()
+
+    def test_rejects_user_over_concurrent_limit(self):
+        self.controller.acquire('alice')
+
+        with self.assertRaises(admission.AdmissionRejected) as ctx:
+            self.controller.acquire('alice')
+
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.reason, admission.REASON_USER_LIMIT)
+        self.assertEqual(ctx.exception.retry_after, 7)
+
+    def test_waiting_request_times_out_when_no_slot_frees(self):
+        self.controller.acquire('alice')
+        before = admission.REJECTED.value(
+            reason=admission.REASON_QUEUE_TIMEOUT
+        )
+
+        with self.assertRaises(admission.AdmissionRejected) as ctx:
+            self.controller.acquire('bob')
+
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertEqual(
+            admission.REJECTED.value(reason=admission.REASON_QUEUE_TIMEOUT),
+            before + 1,
+        )
+        # A timed-out waiter does not count against its user
+        self.controller._release('alice')
+        self.controller.acquire('bob').release()
+
+    @override_settings(AGENT_ADMISSION_WAIT_SECONDS=5)
+    def test_rejects_when_wait_queue_is_full(self):
+        held = self.controller.acquire('alice')
+        waiter = threading.Thread(
+            target=self.controller.acquire, args=('bob',)
+        )
+        waiter.start()
+        for _ in range(100):
+            if self.controller._waiting:
+                break
+            threading.Event().wait(0.01)
+
+        with self.assertRaises(admission.AdmissionRejected) as ctx:
+            self.controller.acquire('carol')
+
+        self.assertEqual(ctx.exception.reason, admission.REASON_QUEUE_FULL)
+        held.release()
+        waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(self.controller._in_flight, 1)
+
+    def test_release_is_idempotent_and_frees_the_slot(self):
+        ticket = self.controller.acquire('alice')
+
+        ticket.release()
+        ticket.release()
+
+        self.assertEqual(self.controller._in_flight, 0)
+        with self.controller.acquire('alice'):
+            self.assertEqual(self.controller._in_flight, 1)
+        self.assertEqual(self.controller._in_flight, 0)
+
+    def test_metrics_are_rendered(self):
+        with self.controller.acquire('alice'):
+            rendered = metrics.REGISTRY.render()
+
+        self.assertIn('# TYPE agent_admission_in_flight gauge', rendered)
+        self.assertIn('agent_admission_in_flight 1', rendered)
+
+
+@override_settings(**LIMITS, AGENT_JOB_QUEUE=False)
+class ChatAdmissionViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username='busy-user',
+            password='strong-pass',
+        )
+        self.run = Run.objects.create(run_id='run-1', name='Run')
+        self.client.force_authenticate(self.user)
+        controller = admission.AdmissionController()
+        patcher = patch.object(admission, 'controller', controller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.controller = controller
+
+    def test_turn_over_user_limit_is_rejected_before_storing(self):
+        held = self.controller.acquire(self.user.pk)
+        self.addCleanup(held.release)
+
+        with patch('singlecell_ai_insights.services.agent.chat') as mock_chat:
+            response = self.client.post(
+                f'/api/runs/{self.run.pk}/chat/',
+                {'question': 'Anything?'},
+                format='json',
+            )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response['Retry-After'], '7')
+        mock_chat.assert_not_called()
+        self.assertFalse(Message.objects.exists())
+
+    def test_slot_is_released_after_the_turn(self):
+        with patch(
+            'singlecell_ai_insights.services.agent.chat',
+            return_value={'answer': 'ok', 'citations': []},
+        ):
+            response = self.client.post(
+                f'/api/runs/{self.run.pk}/chat/',
+                {'question': 'Anything?'},
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.controller._in_flight, 0)
+
+    def test_stream_releases_slot_when_response_closes(self):
+        with patch(
+            'singlecell_ai_insights.services.agent.chat_stream',
+            return_value=iter([]),
+        ):
+            response = self.client.post(
+                f'/api/runs/{self.run.pk}/chat/stream/',
+                {'question': 'Anything?'},
+                format='json',
+            )
+            self.assertEqual(self.controller._in_flight, 1)
+            response.close()
+
+        self.assertEqual(self.controller._in_flight, 0)
+
+
+class MetricsEndpointTests(APITestCase):
+    def test_requires_staff(self):
+        user = get_user_model().objects.create_user(
+            username='plain', password='strong-pass'
+        )
+        self.client.force_authenticate(user)
+
+        response = self.client.get('/api/metrics/')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_gets_prometheus_text(self):
+        user = get_user_model().objects.create_user(
+            username='ops', password='strong-pass', is_staff=True
+        )
+        self.client.force_authenticate(user)
+
+        response = self.client.get('/api/metrics/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'agent_admission_rejected_total', response.content)
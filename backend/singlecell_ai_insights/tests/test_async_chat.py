@@ -0,0 +1,224 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from singlecell_ai_insights.api.agent.async_views import (
+    AsyncRunAgentChatStreamView,
+    AsyncRunAgentChatView,
+)
+from singlecell_ai_insights.api.agent.views import RunAgentChatView
+from singlecell_ai_insights.models import Message, Run
+from singlecell_ai_insights.services.agent import AgentServiceError
+from singlecell_ai_insights.static import (
+    IMMUTABLE_CACHE_CONTROL,
+    CollectedStaticFilesHandler,
+)
+
+ANSWER = {
+    'answer': 'Async answer',
+    'citations': ['fastqc'],
+    'metric_key': None,
+    'notes': [],
+    'confidence': 80,
+    'confidence_explanation': 'Clear question',
+}
+
+# Middleware that would make Django run async views on a thread
+SYNC_ONLY_MIDDLEWARE_CODE = (
+    'import django; django.setup(); '
+    'from django.conf import settings; '
+    'from django.utils.module_loading import import_string; '
+    'print(",".join(path for path in settings.MIDDLEWARE '
+    'if not getattr(import_string(path), "async_capable", False)))'
+)
+
+
+class AsyncRunAgentChatTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            username='async-user', password='strong-pass'
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.run = Run.objects.create(run_id='run-async', name='Async Run')
+
+    def request(self, pk, payload, authenticated=True):
+        request = self.factory.post(
+            f'/api/runs/{pk}/chat/',
+            data=json.dumps(payload),
+            content_type='application/json',
+        )
+        if authenticated:
+            request.COOKIES[settings.SIMPLE_JWT['AUTH_COOKIE']] = self.token
+        return request
+
+    def post(self, view_class, pk, payload, authenticated=True):
+        request = self.request(pk, payload, authenticated)
+        return view_class.as_view()(request, pk=pk)
+
+    def sync_post(self, pk, payload, authenticated):
+        request = self.request(pk, payload, authenticated)
+        return RunAgentChatView.as_view()(request, pk=pk).render()
+
+    async def test_requires_authentication(self):
+        response = await self.post(
+            AsyncRunAgentChatView,
+            self.run.pk,
+            {'question': 'How is the run doing?'},
+            authenticated=False,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_rejects_invalid_payload(self):
+        response = await self.post(AsyncRunAgentChatView, self.run.pk, {})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('question', json.loads(response.content))
+
+    async def test_unknown_run_returns_404(self):
+        response = await self.post(
+            AsyncRunAgentChatView, 999999, {'question': 'Anyone there?'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_errors_match_the_sync_view(self):
+        cases = [
+            (self.run.pk, {'question': 'How is the run doing?'}, False),
+            (self.run.pk, {'question': ''}, True),
+            (999999, {'question': 'Anyone there?'}, True),
+        ]
+        for pk, payload, authenticated in cases:
+            with self.subTest(payload=payload, authenticated=authenticated):
+                expected = await sync_to_async(self.sync_post)(
+                    pk, payload, authenticated
+                )
+                response = await self.post(
+                    AsyncRunAgentChatView, pk, payload, authenticated
+                )
+
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(
+                    json.loads(response.content), json.loads(expected.content)
+                )
+
+    async def test_saves_and_returns_answer(self):
+        with patch(
+            'singlecell_ai_insights.services.agent.achat',
+            return_value=ANSWER,
+        ) as mock_achat:
+            response = await self.post(
+                AsyncRunAgentChatView,
+                self.run.pk,
+                {'question': 'Summarize the run', 'metric_key': ''},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(data['content'], 'Async answer')
+        self.assertEqual(data['confidence'], 80)
+        mock_achat.assert_awaited_once_with(
+            'run-async',
+            'Summarize the run',
+            conversation_history=[
+                {'role': 'user', 'content': 'Summarize the run'}
+            ],
+            metric_key=None,
+            conversation_summary='',
+        )
+        roles = [
+            role
+            async for role in Message.objects.values_list('role', flat=True)
+        ]
+        self.assertEqual(sorted(roles), ['assistant', 'user'])
+
+    async def test_agent_failure_returns_bad_gateway(self):
+        with patch(
+            'singlecell_ai_insights.services.agent.achat',
+            side_effect=AgentServiceError('boom'),
+        ):
+            response = await self.post(
+                AsyncRunAgentChatView,
+                self.run.pk,
+                {'question': 'Summarize the run'},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+
+    async def test_stream_emits_progress_answer_and_message_id(self):
+        async def fake_stream(*args, **kwargs):
+            yield {'type': 'status', 'step': 'load', 'message': 'Loading'}
+            yield {'type': 'answer', 'content': ANSWER}
+
+        with patch(
+            'singlecell_ai_insights.services.agent.achat_stream',
+            fake_stream,
+        ):
+            response = await self.post(
+                AsyncRunAgentChatStreamView,
+                self.run.pk,
+                {'question': 'Summarize the run'},
+            )
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        body = b''.join(chunks).decode()
+        events = [
+            line[len('data: ') :]
+            for line in body.split('\n\n')
+            if line.startswith('data: ')
+        ]
+        self.assertEqual(events[-1], '[DONE]')
+        parsed = [json.loads(event) for event in events[:-1]]
+        self.assertEqual(
+            [event['type'] for event in parsed],
+            ['status', 'answer', 'message_id'],
+        )
+        message = await Message.objects.aget(role=Message.ROLE_ASSISTANT)
+        self.assertEqual(parsed[-1]['id'], message.id)
+
+
+class AsgiStackTests(SimpleTestCase):
+    def test_asgi_middleware_is_async_capable(self):
+        result = subprocess.run(
+            [sys.executable, '-c', SYNC_ONLY_MIDDLEWARE_CODE],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'SERVER_MODE': 'asgi'},
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=True,
+        )
+
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_static_files_are_served_from_static_root(self):
+        directory = tempfile.mkdtemp()
+        with open(os.path.join(directory, 'app.0123456789ab.css'), 'w') as f:
+            f.write('body {}')
+        with override_settings(STATIC_ROOT=directory):
+            handler = CollectedStaticFilesHandler(None)
+            response = handler.serve(
+                RequestFactory().get('/static/app.0123456789ab.css')
+            )
+
+        self.assertEqual(b''.join(response), b'body {}')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertFalse(handler._should_handle('/api/health/'))
@@ -0,0 +1,152 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.models import (
+    ChatJob,
+    ChatJobEvent,
+    Message,
+    Run,
+)
+from singlecell_ai_insights.services import agent, jobs
+
+ANSWER = {
+    'answer': 'Queued answer',
+    'citations': [],
+    'metric_key': None,
+    'notes': [],
+}
+
+
+def fake_stream(*args, **kwargs):
+    yield {'type': 'status', 'step': 'load', 'message': 'Loading'}
+    yield {'type': 'answer', 'content': ANSWER}
+
+
+def sse_blocks(response):
+    body = b''.join(response.streaming_content).decode()
+    return [block for block in body.split('\n\n') if block]
+
+
+@override_settings(
+    AGENT_JOB_QUEUE=True,
+    AGENT_JOB_POLL_SECONDS=0.01,
+    AGENT_SSE_HEARTBEAT_SECONDS=0.01,
+)
+class ChatJobQueueTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username='queue-user', password='strong-pass'
+        )
+        self.run = Run.objects.create(run_id='run-queue', name='Queue Run')
+        self.client.force_authenticate(self.user)
+
+    def enqueue(self, question='How did the run go?'):
+        response = self.client.post(
+            f'/api/runs/{self.run.pk}/chat/',
+            {'question': question},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return ChatJob.objects.get(pk=response.json()['job_id'])
+
+    def test_post_enqueues_job_without_running_agent(self):
+        with patch.object(agent, 'chat') as mock_chat:
+            job = self.enqueue()
+
+        mock_chat.assert_not_called()
+        self.assertEqual(job.status, ChatJob.STATUS_QUEUED)
+        self.assertEqual(job.question_message.content, 'How did the run go?')
+        self.assertEqual(job.history[-1]['content'], 'How did the run go?')
+
+    def test_claim_takes_each_job_once(self):
+        job = self.enqueue()
+
+        claimed = jobs.claim_job('worker-1')
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, ChatJob.STATUS_RUNNING)
+        self.assertEqual(claimed.worker, 'worker-1')
+        self.assertIsNone(jobs.claim_job('worker-2'))
+
+    def test_run_job_publishes_events_and_saves_answer(self):
+        self.enqueue()
+        job = jobs.claim_job('worker-1')
+
+        with patch.object(agent, 'chat_stream', fake_stream):
+            jobs.run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ChatJob.STATUS_SUCCEEDED)
+        answer = Message.objects.get(role=Message.ROLE_ASSISTANT)
+        self.assertEqual(answer.content, 'Queued answer')
+        self.assertEqual(
+            [event.payload['type'] for event in job.events.all()],
+            ['status', 'answer', 'message_id'],
+        )
+
+    def test_run_job_records_agent_failure(self):
+        self.enqueue()
+        job = jobs.claim_job('worker-1')
+
+        with patch.object(
+            agent, 'chat_stream', side_effect=agent.AgentServiceError('boom')
+        ):
+            jobs.run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ChatJob.STATUS_FAILED)
+        self.assertEqual(job.events.get().payload['type'], 'error')
+
+    def test_events_endpoint_streams_and_resumes(self):
+        self.enqueue()
+        job = jobs.claim_job('worker-1')
+        with patch.object(agent, 'chat_stream', fake_stream):
+            jobs.run_job(job)
+        url = f'/api/runs/{self.run.pk}/chat/jobs/{job.pk}/events/'
+
+        blocks = sse_blocks(self.client.get(url))
+
+        first_id = job.events.first().pk
+        self.assertEqual(blocks[0].split('\n')[0], f'id: {first_id}')
+        self.assertEqual(len(blocks), 4)
+        self.assertEqual(blocks[-1], 'data: [DONE]')
+
+        resumed = sse_blocks(self.client.get(url, HTTP_LAST_EVENT_ID=first_id))
+        payloads = [
+            json.loads(block.split('data: ', 1)[1]) for block in resumed[:-1]
+        ]
+        self.assertEqual(
+            [payload['type'] for payload in payloads],
+            ['answer', 'message_id'],
+        )
+
+    def test_events_endpoint_is_scoped_to_owner(self):
+        job = self.enqueue()
+        other = get_user_model().objects.create_user(
+            username='other-user', password='strong-pass'
+        )
+        self.client.force_authenticate(other)
+
+        response = self.client.get(
+            f'/api/runs/{self.run.pk}/chat/jobs/{job.pk}/events/'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cancel_job_marks_question_cancelled(self):
+        job = self.enqueue()
+
+        self.assertTrue(jobs.cancel_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ChatJob.STATUS_CANCELLED)
+        self.assertIsNone(jobs.claim_job('worker-1'))
+        question = Message.objects.get(pk=job.question_message_id)
+        self.assertEqual(question.status, Message.STATUS_CANCELLED)
+        self.assertFalse(ChatJobEvent.objects.exists())
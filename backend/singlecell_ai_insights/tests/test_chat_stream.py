@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.models import Message, Run
+from singlecell_ai_insights.services import agent
+
+ANSWER = {
+    'answer': 'Streamed answer',
+    'citations': [],
+    'metric_key': None,
+    'notes': [],
+}
+
+
+def parse_events(body):
+    return [block for block in body.split('\n\n') if block and block != '\n']
+
+
+@override_settings(AGENT_SSE_HEARTBEAT_SECONDS=0.01)
+class RunAgentChatStreamTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username='stream-user', password='strong-pass'
+        )
+        self.run = Run.objects.create(run_id='run-stream', name='Stream Run')
+        self.client.force_authenticate(self.user)
+
+    def post(self):
+        return self.client.post(
+            f'/api/runs/{self.run.pk}/chat/stream/',
+            {'question': 'How did the run go?'},
+            format='json',
+        )
+
+    def test_sends_heartbeats_while_agent_is_busy(self):
+        def slow_stream(*args, **kwargs):
+            time.sleep(0.1)
+            yield {'type': 'answer', 'content': ANSWER}
+
+        with patch.object(agent, 'chat_stream', slow_stream):
+            response = self.post()
+            body = b''.join(response.streaming_content).decode()
+
+        events = parse_events(body)
+        self.assertEqual(events[0], ': keep-alive')
+        self.assertEqual(events[-1], 'data: [DONE]')
+        answer = json.loads(events[-3][len('data: ') :])
+        self.assertEqual(answer['content']['answer'], 'Streamed answer')
+        question = Message.objects.get(role=Message.ROLE_USER)
+        self.assertEqual(question.status, Message.STATUS_COMPLETE)
+
+    def test_timeout_is_reported_as_structured_error(self):
+        def timed_out_stream(*args, **kwargs):
+            yield {'type': 'status', 'step': 'load', 'message': 'Loading'}
+            raise agent.AgentTimeout('too slow', stage='synthesis')
+
+        with patch.object(agent, 'chat_stream', timed_out_stream):
+            response = self.post()
+            body = b''.join(response.streaming_content).decode()
+
+        error = json.loads(parse_events(body)[-1][len('data: ') :])
+        self.assertEqual(
+            error,
+            {
+                'type': 'error',
+                'code': 'timeout',
+                'message': agent.AgentTimeout.public_message,
+                'retryable': True,
+                'stage': 'synthesis',
+            },
+        )
+
+    def test_client_disconnect_cancels_and_records_turn(self):
+        received = {}
+        release = threading.Event()
+
+        def blocking_stream(*args, **kwargs):
+            received['cancel_event'] = kwargs['cancel_event']
+            yield {'type': 'status', 'step': 'load', 'message': 'Loading'}
+            release.wait(5)
+            yield {'type': 'answer', 'content': ANSWER}
+
+        with patch.object(agent, 'chat_stream', blocking_stream):
+            response = self.post()
+            first = next(iter(response.streaming_content)).decode()
+            response.close()
+            release.set()
+
+        self.assertIn('"type": "status"', first)
+        self.assertTrue(received['cancel_event'].is_set())
+        question = Message.objects.get(role=Message.ROLE_USER)
+        self.assertEqual(question.status, Message.STATUS_CANCELLED)
+        self.assertFalse(
+            Message.objects.filter(role=Message.ROLE_ASSISTANT).exists()
+        )
+
+
+class AgentCancellationTests(TestCase):
+    def test_cancelled_turn_stops_before_next_node(self):
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        with patch(
+            'singlecell_ai_insights.services.ingestion.get_run_data'
+        ) as mock_get_run_data:
+            with self.assertRaises(agent.AgentCancelled):
+                list(
+                    agent.chat_stream(
+                        'run-cancelled',
+                        'Anything?',
+                        cancel_event=cancel_event,
+                    )
+                )
+
+        mock_get_run_data.assert_not_called()
@@ -0,0 +1,186 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from singlecell_ai_insights.api.agent.views import _start_turn
+from singlecell_ai_insights.models import Conversation, Message, Run
+from singlecell_ai_insights.services import agent, conversations
+from singlecell_ai_insights.services.agent import memory, resilience
+from singlecell_ai_insights.services.agent.memory import (
+    build_history_context,
+)
+
+
+class BuildHistoryContextTests(TestCase):
+    def test_includes_summary_and_latest_exchange(self):
+        history = [
+            {'role': 'user', 'content': 'Old question'},
+            {'role': 'assistant', 'content': 'Old answer'},
+            {'role': 'user', 'content': 'Current question'},
+        ]
+
+        text = build_history_context('Talked about GC content', history)
+
+        self.assertIn('Talked about GC content', text)
+        self.assertIn('ASSISTANT: Old answer', text)
+        self.assertNotIn('Current question', text)
+
+    def test_size_is_bounded_regardless_of_history_length(self):
+        message = {'role': 'user', 'content': 'x' * 500}
+        short = build_history_context('s' * 5000, [message] * 3, 100)
+        long = build_history_context('s' * 5000, [message] * 300, 100)
+
+        self.assertLessEqual(len(short), 100 * 4 + 100)
+        self.assertEqual(len(short), len(long))
+
+
+class SummarizeConversationTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.breaker = resilience.CircuitBreaker('Test', 1, 60)
+        patcher = patch.object(resilience, 'bedrock_breaker', self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.messages = [{'role': 'user', 'content': 'How is GC content?'}]
+
+    def test_summary_call_is_a_bedrock_call(self):
+        labels = {
+            'stage': resilience.STAGE_SUMMARY,
+            'model': resilience.BEDROCK_MODEL_ID,
+            'outcome': resilience.OUTCOME_SUCCESS,
+        }
+        before = resilience.CALLS.value(**labels)
+
+        with patch.object(memory, 'llm') as llm:
+            llm.invoke.return_value = SimpleNamespace(content=' GC is fine ')
+            summary = memory.summarize_conversation('', self.messages)
+
+        self.assertEqual(summary, 'GC is fine')
+        self.assertEqual(resilience.CALLS.value(**labels), before + 1)
+
+    def test_open_breaker_skips_the_summary_call(self):
+        self.breaker.record_failure()
+
+        with patch.object(memory, 'llm') as llm:
+            with self.assertRaises(agent.AgentUnavailable):
+                memory.summarize_conversation('', self.messages)
+
+        llm.invoke.assert_not_called()
+
+    def test_slow_summary_call_times_out(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        with (
+            patch.object(memory, 'SUMMARY_BUDGET_SECONDS', 0.05),
+            patch.object(memory, 'llm') as llm,
+        ):
+            llm.invoke.side_effect = lambda prompt: release.wait(5)
+            with self.assertRaises(agent.AgentTimeout) as ctx:
+                memory.summarize_conversation('', self.messages)
+
+        self.assertEqual(ctx.exception.stage, resilience.STAGE_SUMMARY)
+
+
+class RefreshSummaryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_user(
+            username='memory-user', password='strong-pass'
+        )
+        run = Run.objects.create(run_id='run-memory')
+        self.conversation = Conversation.objects.create(run=run, user=user)
+
+    def add_exchange(self, index):
+        question = Message.objects.create(
+            conversation=self.conversation,
+            role=Message.ROLE_USER,
+            content=f'Question {index}',
+        )
+        answer = Message.objects.create(
+            conversation=self.conversation,
+            role=Message.ROLE_ASSISTANT,
+            content=f'Answer {index}',
+        )
+        return question, answer
+
+    @patch.object(conversations, 'summarize_conversation')
+    def test_folds_all_but_latest_exchange(self, mock_summarize):
+        mock_summarize.return_value = 'Summary v1'
+        _, first_answer = self.add_exchange(1)
+        self.add_exchange(2)
+
+        conversations.refresh_summary(self.conversation.pk)
+
+        folded = mock_summarize.call_args[0][1]
+        self.assertEqual(
+            [msg['content'] for msg in folded], ['Question 1', 'Answer 1']
+        )
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summary, 'Summary v1')
+        self.assertEqual(self.conversation.summarized_until, first_answer.pk)
+
+    @patch.object(conversations, 'summarize_conversation')
+    def test_failed_summary_leaves_messages_for_next_refresh(
+        self, mock_summarize
+    ):
+        mock_summarize.side_effect = agent.AgentUnavailable('open', 5)
+        self.add_exchange(1)
+        self.add_exchange(2)
+
+        self.assertEqual(
+            conversations.refresh_summary(self.conversation.pk), ''
+        )
+
+        self.conversation.refresh_from_db()
+        self.assertIsNone(self.conversation.summarized_until)
+
+    @patch.object(conversations, 'summarize_conversation')
+    def test_updates_incrementally(self, mock_summarize):
+        mock_summarize.return_value = 'Summary v1'
+        self.add_exchange(1)
+        self.add_exchange(2)
+        conversations.refresh_summary(self.conversation.pk)
+
+        mock_summarize.return_value = 'Summary v2'
+        self.add_exchange(3)
+        conversations.refresh_summary(self.conversation.pk)
+
+        previous, folded = mock_summarize.call_args[0]
+        self.assertEqual(previous, 'Summary v1')
+        self.assertEqual(
+            [msg['content'] for msg in folded], ['Question 2', 'Answer 2']
+        )
+
+    @patch.object(conversations, 'summarize_conversation')
+    def test_folded_turns_are_not_sent_verbatim(self, mock_summarize):
+        mock_summarize.return_value = 'Summary v1'
+        self.add_exchange(1)
+        self.add_exchange(2)
+        conversations.refresh_summary(self.conversation.pk)
+        self.conversation.refresh_from_db()
+
+        _, _, history = _start_turn(
+            self.conversation.run_id, self.conversation.user, 'Question 3'
+        )
+        text = build_history_context(self.conversation.summary, history)
+
+        self.assertEqual(
+            [msg['content'] for msg in history],
+            ['Question 2', 'Answer 2', 'Question 3'],
+        )
+        self.assertIn('Summary v1', text)
+        self.assertIn('ASSISTANT: Answer 2', text)
+        self.assertNotIn('Question 1', text)
+        self.assertNotIn('Answer 1', text)
+
+    @patch.object(conversations, 'summarize_conversation')
+    def test_skips_llm_when_nothing_to_fold(self, mock_summarize):
+        self.add_exchange(1)
+
+        conversations.refresh_summary(self.conversation.pk)
+
+        mock_summarize.assert_not_called()
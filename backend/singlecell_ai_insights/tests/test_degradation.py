@@ -0,0 +1,137 @@
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from singlecell_ai_insights.models import Conversation, Message, Run
+from singlecell_ai_insights.services import admission, conversations
+from singlecell_ai_insights.services.agent import degradation, run_context
+from singlecell_ai_insights.services.agent.config import DEGRADED_MAX_TOKENS
+from singlecell_ai_insights.services.agent.nodes import (
+    ensure_index,
+    synthesize,
+)
+from singlecell_ai_insights.services.agent.tools import default_artifacts
+from singlecell_ai_insights.services.agent.tools.run_metrics import RunMetrics
+
+
+class LoadPolicyTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.policy = degradation.LoadPolicy()
+        self.addCleanup(admission.QUEUE_DEPTH.set, 0)
+
+    def test_full_mode_without_pressure(self):
+        self.policy.record_latency(1.0)
+
+        self.assertEqual(self.policy.mode(), degradation.MODE_FULL)
+
+    def test_slow_bedrock_degrades_until_latency_recovers(self):
+        self.policy.record_latency(60.0)
+        self.assertEqual(self.policy.mode(), degradation.MODE_DEGRADED)
+
+        # Below the entry threshold but above the recovery threshold
+        with patch.object(self.policy, '_latency', 15.0):
+            self.assertEqual(self.policy.mode(), degradation.MODE_DEGRADED)
+        with patch.object(self.policy, '_latency', 2.0):
+            self.assertEqual(self.policy.mode(), degradation.MODE_FULL)
+
+    def test_queue_depth_degrades(self):
+        admission.QUEUE_DEPTH.set(degradation.DEGRADE_QUEUE_DEPTH)
+        self.assertEqual(self.policy.mode(), degradation.MODE_DEGRADED)
+
+        admission.QUEUE_DEPTH.set(0)
+        self.assertEqual(self.policy.mode(), degradation.MODE_FULL)
+
+    def test_turns_are_counted_by_mode(self):
+        before = degradation.TURNS.value(mode=degradation.MODE_FULL)
+
+        self.policy.mode()
+
+        self.assertEqual(
+            degradation.TURNS.value(mode=degradation.MODE_FULL), before + 1
+        )
+
+
+class DegradedNodeTests(SimpleTestCase):
+    def test_default_artifacts_match_keywords(self):
+        selection = default_artifacts('Why is GC content skewed?')
+
+        self.assertEqual(selection['plot_indices'], [3])
+        self.assertEqual(selection['table_indices'], [3, 4])
+
+    def test_default_artifacts_fall_back_for_general_questions(self):
+        selection = default_artifacts('Give me an overview')
+
+        self.assertEqual(selection['plot_indices'], [0, 1, 2])
+        self.assertEqual(selection['table_indices'], [0, 1])
+
+    def test_degraded_index_is_skipped_for_metric_route(self):
+        context = run_context.RunContext(
+            run_id='run-1',
+            version='v1',
+            metrics=RunMetrics.from_dicts({}, {}),
+            metric_meta={},
+            statistics={},
+            panels=('panel',),
+            sample_panels={},
+            embeddings=None,
+        )
+        run_context.cache.put(context)
+        self.addCleanup(run_context.cache.clear)
+        state = {
+            'run_id': 'run-1',
+            'question': 'What is the duplication rate?',
+            'context_key': context.key,
+            'mode': degradation.MODE_DEGRADED,
+        }
+
+        with patch(
+            'singlecell_ai_insights.services.agent.nodes.data_loading.'
+            '_build_index'
+        ) as mock_build:
+            update = ensure_index(state)
+
+        mock_build.assert_not_called()
+        self.assertEqual(update, {})
+        self.assertIsNone(run_context.cache.get('run-1').index)
+
+    def test_degraded_synthesis_lowers_max_tokens(self):
+        llm = MagicMock()
+        llm.invoke.return_value.content = 'Short answer'
+        state = {
+            'question': 'How is the run?',
+            'tabular': [{'sample': f's{i}'} for i in range(10)],
+            'mode': degradation.MODE_DEGRADED,
+        }
+
+        with patch(
+            'singlecell_ai_insights.services.agent.nodes.synthesis.llm', llm
+        ):
+            state = synthesize(state)
+
+        prompt = llm.invoke.call_args.args[0]
+        self.assertEqual(
+            llm.invoke.call_args.kwargs,
+            {'max_tokens': DEGRADED_MAX_TOKENS},
+        )
+        self.assertIn('s4', prompt)
+        self.assertNotIn('s5', prompt)
+        self.assertEqual(state['answer'], 'Short answer')
+
+
+class AnswerModeTests(TestCase):
+    def test_save_answer_records_mode(self):
+        user = get_user_model().objects.create_user(
+            username='mode-user', password='strong-pass'
+        )
+        run = Run.objects.create(run_id='run-1', name='Run')
+        conversation = Conversation.objects.create(run=run, user=user)
+
+        message = conversations.save_answer(
+            conversation,
+            {'answer': 'Quick answer', 'mode': degradation.MODE_DEGRADED},
+        )
+
+        message.refresh_from_db()
+        self.assertEqual(message.answer_mode, Message.MODE_DEGRADED)
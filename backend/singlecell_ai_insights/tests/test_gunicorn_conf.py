@@ -0,0 +1,48 @@
+import os
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.utils.functional import empty
+
+from singlecell_ai_insights import gunicorn_conf
+from singlecell_ai_insights.services import warmup
+from singlecell_ai_insights.services.agent import config
+
+GIB = 1024 * gunicorn_conf.MIB
+
+
+class WorkerCountTests(SimpleTestCase):
+    def test_two_workers_per_cpu_when_memory_allows(self):
+        self.assertEqual(gunicorn_conf.worker_count(2, 8 * GIB, 384, 512), 4)
+
+    def test_memory_caps_the_worker_count(self):
+        # (2048 - 512) // 384 leaves room for four workers, not eight
+        self.assertEqual(gunicorn_conf.worker_count(4, 2 * GIB, 384, 512), 4)
+        self.assertEqual(gunicorn_conf.worker_count(4, 1 * GIB, 384, 512), 1)
+
+    def test_always_at_least_one_worker(self):
+        self.assertEqual(gunicorn_conf.worker_count(1, 256, 384, 512), 1)
+
+
+class WarmupTests(SimpleTestCase):
+    def test_warm_up_builds_lazy_clients(self):
+        timings = warmup.warm_up()
+
+        self.assertEqual(set(timings), {'urls', 'agent', 'clients'})
+        for client in (
+            settings.AWS_S3_CLIENT,
+            settings.AWS_HEALTHOMICS_CLIENT,
+            config.llm,
+            config.emb,
+        ):
+            self.assertIsNot(client._wrapped, empty)
+
+    def test_process_memory_reports_own_footprint(self):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            self.skipTest('smaps_rollup is not available')
+
+        usage = warmup.process_memory()
+
+        self.assertEqual(set(usage), {'rss', 'pss', 'uss'})
+        self.assertGreater(usage['rss'], 0)
+        self.assertLessEqual(usage['uss'], usage['rss'])
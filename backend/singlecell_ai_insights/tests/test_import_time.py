@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from singlecell_ai_insights.aws.clients import lazy
+
+# Packages that only the chat path needs; the web process must not pay for
+# them until a chat turn runs
+HEAVY_MODULES = [
+    'boto3',
+    'faiss',
+    'langchain_aws',
+    'langchain_community',
+    'langchain_core',
+    'langgraph',
+    'matplotlib',
+    'numpy',
+]
+# Cumulative import time of the URLconf (every view and what it imports).
+# It is about 0.15s with the agent stack deferred and 1.7s without, so
+# this leaves room for slow machines while still catching a regression.
+URLS_BUDGET_SECONDS = 1.0
+STARTUP_CODE = (
+    'import django; django.setup(); import singlecell_ai_insights.urls'
+)
+
+
+def _import_times():
+    """Run a fresh interpreter with ``-X importtime``; module -> seconds."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=settings.BASE_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_startup_skips_agent_stack_and_stays_within_budget(self):
+        times = _import_times()
+
+        self.assertIn('singlecell_ai_insights.urls', times)
+        loaded = sorted(
+            name for name in times if name.split('.')[0] in HEAVY_MODULES
+        )
+        self.assertEqual(loaded, [])
+        self.assertLess(
+            times['singlecell_ai_insights.urls'], URLS_BUDGET_SECONDS
+        )
+
+
+class LazyClientTests(SimpleTestCase):
+    def test_factory_runs_once_across_threads(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            calls.append(1)
+            return {'name': 'client'}
+
+        client = lazy(factory)
+        results = []
+
+        def use():
+            barrier.wait()
+            results.append(client['name'])
+
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['client'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_factory_is_not_called_until_used(self):
+        calls = []
+        client = lazy(lambda: calls.append(1) or 'built')
+
+        self.assertEqual(calls, [])
+        self.assertEqual(client.upper(), 'BUILT')
+        self.assertEqual(calls, [1])
@@ -0,0 +1,186 @@
+import json
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import BotoCoreError
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.models import Run, RunData
+from singlecell_ai_insights.services import ingestion
+from singlecell_ai_insights.services.agent import AgentServiceError
+from singlecell_ai_insights.services.agent.config import REPORTS_BUCKET
+
+from .test_runs import MOCK_HEALTHOMICS_CLIENT, MockS3Client
+
+MULTIQC_DATA = {
+    'report_general_stats_data': [
+        {
+            'sample1': {'percent_duplicates': 10.5, 'percent_gc': 42.0},
+            'sample2': {'percent_duplicates': 30.0, 'percent_gc': 43.5},
+        }
+    ],
+    'report_saved_raw_data': {
+        'multiqc_fastqc': {
+            'sample1': {'adapter_content': 'pass'},
+            'sample2': {'adapter_content': 'fail'},
+        }
+    },
+}
+
+
+def s3_body(data):
+    return {'Body': BytesIO(json.dumps(data).encode('utf-8'))}
+
+
+@override_settings(
+    AWS_S3_CLIENT=MockS3Client(),
+    INGESTION_RETRY_BACKOFF_SECONDS=0,
+)
+class IngestRunTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        settings.AWS_S3_CLIENT.get_object.reset_mock(side_effect=True)
+        self.run = Run.objects.create(
+            run_id='run-ingest',
+            name='Ingest Run',
+            status=Run.STATUS_COMPLETED,
+        )
+
+    def test_persists_parsed_data_and_metrics(self):
+        settings.AWS_S3_CLIENT.get_object.return_value = s3_body(MULTIQC_DATA)
+
+        run_data = ingestion.ingest_run(self.run.pk)
+
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.ingestion_status, Run.INGESTION_SUCCEEDED)
+        self.assertIsNotNone(self.run.ingested_at)
+        self.assertEqual(self.run.metrics['total_samples'], 2)
+        self.assertEqual(set(run_data.samples), {'sample1', 'sample2'})
+        self.assertIn('percent_gc', run_data.statistics)
+        self.assertNotIn('sample_values', run_data.statistics['percent_gc'])
+        self.assertEqual(
+            run_data.module_statuses['sample2'], {'adapter_content': 'fail'}
+        )
+        # Overview, one metric family and one FastQC module, then the
+        # general stats and FastQC panel of each sample
+        self.assertEqual(len(run_data.panels), 7)
+        self.assertIsNone(run_data.embeddings)
+        settings.AWS_S3_CLIENT.get_object.assert_called_once_with(
+            Bucket=REPORTS_BUCKET,
+            Key='run-ingest/pubdir/multiqc/multiqc_data/multiqc_data.json',
+        )
+
+    def test_retries_then_marks_failed(self):
+        settings.AWS_S3_CLIENT.get_object.side_effect = BotoCoreError()
+
+        with self.assertRaises(AgentServiceError):
+            ingestion.ingest_run(self.run.pk, attempts=2)
+
+        self.assertEqual(settings.AWS_S3_CLIENT.get_object.call_count, 2)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.ingestion_status, Run.INGESTION_FAILED)
+        self.assertFalse(RunData.objects.filter(run=self.run).exists())
+
+    def test_storing_without_embeddings_keeps_stored_vectors(self):
+        parsed = ingestion.parse_multiqc(MULTIQC_DATA)
+        RunData.objects.create(run=self.run, embeddings=[[0.5]], **parsed)
+
+        ingestion.store_parsed(self.run, {**parsed, 'embeddings': None}, {})
+        kept = RunData.objects.get(run=self.run).embeddings
+        changed = {**parsed, 'panels': [], 'embeddings': None}
+        ingestion.store_parsed(self.run, changed, {})
+
+        self.assertEqual(kept, [[0.5]])
+        # Vectors of other panels would no longer line up with them
+        self.assertIsNone(RunData.objects.get(run=self.run).embeddings)
+
+    def test_get_run_data_reuses_persisted_data(self):
+        settings.AWS_S3_CLIENT.get_object.return_value = s3_body(MULTIQC_DATA)
+
+        first = ingestion.get_run_data(self.run.run_id)
+        second = ingestion.get_run_data(self.run.run_id)
+
+        self.assertEqual(first.pk, second.pk)
+        settings.AWS_S3_CLIENT.get_object.assert_called_once()
+
+    def test_ingest_run_reuses_data_stored_meanwhile(self):
+        settings.AWS_S3_CLIENT.get_object.return_value = s3_body(MULTIQC_DATA)
+        first = ingestion.ingest_run(self.run.pk)
+
+        second = ingestion.ingest_run(self.run.pk)
+
+        self.assertEqual(first.pk, second.pk)
+        settings.AWS_S3_CLIENT.get_object.assert_called_once()
+
+    async def test_aget_run_data_ingests_cold_run(self):
+        settings.AWS_S3_CLIENT.get_object.return_value = s3_body(MULTIQC_DATA)
+
+        run_data = await ingestion.aget_run_data(self.run.run_id)
+
+        self.assertEqual(set(run_data.samples), {'sample1', 'sample2'})
+        run = await Run.objects.aget(pk=self.run.pk)
+        self.assertEqual(run.ingestion_status, Run.INGESTION_SUCCEEDED)
+
+
+@override_settings(
+    AWS_HEALTHOMICS_CLIENT=MOCK_HEALTHOMICS_CLIENT,
+    AWS_S3_CLIENT=MockS3Client(),
+)
+class RunSyncIngestionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        MOCK_HEALTHOMICS_CLIENT.reset()
+        self.user = get_user_model().objects.create_user(
+            username='sync-user', password='strong-pass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def mock_runs(self, run_status):
+        paginator = MagicMock()
+        paginator.paginate.return_value = [
+            {'items': [{'id': 'run-sync', 'status': run_status}]}
+        ]
+        MOCK_HEALTHOMICS_CLIENT.get_paginator.return_value = paginator
+        MOCK_HEALTHOMICS_CLIENT.get_run.return_value = {
+            'run': {'id': 'run-sync', 'status': run_status}
+        }
+
+    def test_schedules_ingestion_when_run_completes(self):
+        Run.objects.create(
+            run_id='run-sync', status='RUNNING', created_at=timezone.now()
+        )
+        self.mock_runs('COMPLETED')
+
+        with patch.object(ingestion, 'schedule_ingestion') as mock_schedule:
+            response = self.client.get('/api/runs/?refresh=true')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_schedule.assert_called_once()
+        self.assertEqual(mock_schedule.call_args[0][0].run_id, 'run-sync')
+
+    def test_does_not_reschedule_ingested_runs(self):
+        Run.objects.create(
+            run_id='run-sync',
+            status=Run.STATUS_COMPLETED,
+            ingestion_status=Run.INGESTION_SUCCEEDED,
+            created_at=timezone.now(),
+        )
+        self.mock_runs('COMPLETED')
+
+        with patch.object(ingestion, 'schedule_ingestion') as mock_schedule:
+            self.client.get('/api/runs/?refresh=true')
+
+        mock_schedule.assert_not_called()
+
+    def test_skips_runs_that_are_not_completed(self):
+        self.mock_runs('RUNNING')
+
+        with patch.object(ingestion, 'schedule_ingestion') as mock_schedule:
+            self.client.get('/api/runs/?refresh=true')
+
+        mock_schedule.assert_not_called()
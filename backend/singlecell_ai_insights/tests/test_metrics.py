@@ -0,0 +1,149 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.api.agent.streaming import (
+    STREAMS_IN_FLIGHT,
+    ClosingStream,
+)
+from singlecell_ai_insights.services import metrics
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class HistogramTests(SimpleTestCase):
+    def test_renders_cumulative_buckets_sum_and_count(self):
+        registry = metrics.Registry()
+        latency = registry.register(
+            metrics.Histogram('op_seconds', 'Op latency', ['op'], [0.1, 1])
+        )
+
+        latency.observe(0.05, op='get')
+        latency.observe(0.5, op='get')
+        latency.observe(5, op='get')
+
+        with override_settings(METRICS_MULTIPROC_DIR=''):
+            rendered = registry.render()
+        self.assertIn('# TYPE op_seconds histogram', rendered)
+        self.assertIn('op_seconds_bucket{op="get",le="0.1"} 1', rendered)
+        self.assertIn('op_seconds_bucket{op="get",le="1"} 2', rendered)
+        self.assertIn('op_seconds_bucket{op="get",le="+Inf"} 3', rendered)
+        self.assertIn('op_seconds_sum{op="get"} 5.55', rendered)
+        self.assertIn('op_seconds_count{op="get"} 3', rendered)
+
+
+class MultiprocessTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.registry = metrics.Registry()
+        self.requests = self.registry.register(
+            metrics.Counter('requests_total', 'Requests')
+        )
+        self.in_flight = self.registry.register(
+            metrics.Gauge('in_flight', 'In flight')
+        )
+        self.requests.inc(2)
+        self.in_flight.set(1)
+
+    def write_foreign(self, pid, requests, in_flight):
+        path = os.path.join(self.directory, f'metrics-{pid}.json')
+        with open(path, 'w') as handle:
+            json.dump(
+                {
+                    'requests_total': [[[], requests]],
+                    'in_flight': [[[], in_flight]],
+                },
+                handle,
+            )
+
+    def render(self):
+        with override_settings(METRICS_MULTIPROC_DIR=self.directory):
+            return self.registry.render()
+
+    def test_counters_include_exited_workers_but_gauges_do_not(self):
+        self.write_foreign(os.getppid(), requests=3, in_flight=4)
+        self.write_foreign(_dead_pid(), requests=5, in_flight=100)
+
+        rendered = self.render()
+
+        self.assertIn('requests_total 10', rendered)
+        self.assertIn('in_flight 5', rendered)
+
+    def test_exited_workers_are_folded_once(self):
+        dead_pid = _dead_pid()
+        self.write_foreign(dead_pid, requests=5, in_flight=100)
+
+        first = self.render()
+        # A new worker reusing the pid must not replace the folded counts
+        self.write_foreign(os.getppid(), requests=1, in_flight=0)
+        second = self.render()
+
+        self.assertIn('requests_total 7', first)
+        self.assertIn('requests_total 8', second)
+        self.assertIn('in_flight 1', second)
+        files = os.listdir(self.directory)
+        self.assertNotIn(f'metrics-{dead_pid}.json', files)
+        with open(
+            os.path.join(self.directory, metrics.EXITED_SNAPSHOT)
+        ) as handle:
+            self.assertEqual(json.load(handle)['requests_total'], [[[], 5]])
+
+    def test_render_writes_own_snapshot(self):
+        self.render()
+
+        with open(
+            os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        ) as handle:
+            snapshot = json.load(handle)
+        self.assertEqual(snapshot['requests_total'], [[[], 2]])
+
+
+class StreamGaugeTests(SimpleTestCase):
+    def test_open_streams_are_counted_until_closed(self):
+        before = STREAMS_IN_FLIGHT.value()
+        released = []
+
+        stream = ClosingStream(iter(['data']), lambda: released.append(1))
+        self.assertEqual(STREAMS_IN_FLIGHT.value(), before + 1)
+
+        stream._stream = (chunk for chunk in ['data'])
+        stream.close()
+        stream.close()
+
+        self.assertEqual(STREAMS_IN_FLIGHT.value(), before)
+        self.assertEqual(released, [1])
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsTokenTests(APITestCase):
+    def test_scraper_token_is_accepted(self):
+        response = self.client.get(
+            '/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'agent_node_duration_seconds', response.content)
+
+    def test_wrong_token_is_rejected(self):
+        user = get_user_model().objects.create_user(
+            username='plain', password='strong-pass'
+        )
+        self.client.force_authenticate(user)
+
+        response = self.client.get(
+            '/api/metrics/', HTTP_AUTHORIZATION='Bearer guess'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
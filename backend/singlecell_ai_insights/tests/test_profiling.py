@@ -0,0 +1,195 @@
+import os
+import pstats
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from singlecell_ai_insights.middleware import ProfilingMiddleware
+from singlecell_ai_insights.models import Run
+from singlecell_ai_insights.services import agent, profiling
+
+TIMING_URL = '/api/agent/timing/'
+
+
+class ProfileDirMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        override = override_settings(PROFILING_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class ProfilingMiddlewareTests(ProfileDirMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = get_user_model().objects.create_user(
+            username='staff', password='strong-pass', is_staff=True
+        )
+
+    def login_api(self, user):
+        token = AccessToken.for_user(user)
+        self.client.cookies[settings.SIMPLE_JWT['AUTH_COOKIE']] = str(token)
+
+    def test_staff_request_is_profiled_deterministically(self):
+        self.login_api(self.staff)
+
+        response = self.client.get(TIMING_URL, HTTP_X_PROFILE='deterministic')
+
+        self.assertEqual(response.status_code, 200)
+        [profile] = profiling.list_profiles()
+        self.assertEqual(response['X-Profile-Id'], profile['id'])
+        self.assertEqual(profile['path'], TIMING_URL)
+        self.assertEqual(profile['user'], 'staff')
+        self.assertEqual(profile['status'], 200)
+        _, path = profiling.get_profile(profile['id'])
+        self.assertTrue(pstats.Stats(path).total_calls > 0)
+
+    def test_admin_session_identifies_staff(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(f'{TIMING_URL}?profile=sampling')
+
+        self.assertIn('X-Profile-Id', response)
+        [profile] = profiling.list_profiles()
+        self.assertEqual(profile['mode'], profiling.MODE_SAMPLING)
+
+    def test_non_staff_requests_are_not_profiled(self):
+        user = get_user_model().objects.create_user(
+            username='regular', password='strong-pass'
+        )
+        self.login_api(user)
+
+        response = self.client.get(TIMING_URL, HTTP_X_PROFILE='sampling')
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    @override_settings(
+        AGENT_SSE_HEARTBEAT_SECONDS=0.01, PROFILING_SAMPLE_INTERVAL=0.001
+    )
+    def test_stream_is_profiled_until_it_closes(self):
+        run = Run.objects.create(run_id='run-profile', name='Run')
+        self.login_api(self.staff)
+
+        def stream(*args, **kwargs):
+            yield {'type': 'status', 'step': 'load', 'message': 'Loading'}
+            yield {'type': 'answer', 'content': {'answer': 'ok'}}
+
+        with patch.object(agent, 'chat_stream', stream):
+            response = self.client.post(
+                f'/api/runs/{run.pk}/chat/stream/',
+                {'question': 'How did it go?'},
+                format='json',
+                HTTP_X_PROFILE='sampling',
+            )
+            self.assertEqual(profiling.list_profiles(), [])
+            b''.join(response.streaming_content)
+            response.close()
+
+        [profile] = profiling.list_profiles()
+        self.assertTrue(profile['streaming'])
+        _, path = profiling.get_profile(profile['id'])
+        with open(path) as handle:
+            lines = handle.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(
+            all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        )
+
+    def test_admin_lists_and_downloads_profiles(self):
+        self.client.force_login(self.staff)
+        profile_id = self.client.get(TIMING_URL, HTTP_X_PROFILE='sampling')[
+            'X-Profile-Id'
+        ]
+
+        listing = self.client.get('/admin/profiles/')
+        download = self.client.get(f'/admin/profiles/{profile_id}/')
+
+        self.assertContains(listing, TIMING_URL)
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+        self.assertEqual(
+            self.client.get('/admin/profiles/..%2Fsecrets/').status_code, 404
+        )
+
+    def test_admin_page_requires_staff(self):
+        response = self.client.get('/admin/profiles/')
+
+        self.assertEqual(response.status_code, 302)
+
+
+def busy_loop_work():
+    return sum(range(1000))
+
+
+async def async_view(request):
+    return HttpResponse(str(busy_loop_work()))
+
+
+class AsyncProfilingMiddlewareTests(ProfileDirMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.middleware = ProfilingMiddleware(async_view)
+        self.request = RequestFactory().get(
+            TIMING_URL, HTTP_X_PROFILE='deterministic'
+        )
+        self.request.user = get_user_model().objects.create_user(
+            username='staff', password='strong-pass', is_staff=True
+        )
+
+    async def test_async_view_is_profiled_on_the_loop_thread(self):
+        self.assertTrue(ProfilingMiddleware.async_capable)
+
+        response = await self.middleware(self.request)
+
+        self.assertEqual(response.status_code, 200)
+        [profile] = profiling.list_profiles()
+        self.assertEqual(response['X-Profile-Id'], profile['id'])
+        _, path = profiling.get_profile(profile['id'])
+        profiled = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn('busy_loop_work', profiled)
+
+    async def test_unprofiled_requests_pass_through(self):
+        del self.request.META['HTTP_X_PROFILE']
+
+        response = await self.middleware(self.request)
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+
+class ProfileStoreTests(ProfileDirMixin, SimpleTestCase):
+    def test_only_one_profile_runs_at_a_time(self):
+        first = profiling.start(profiling.MODE_SAMPLING)
+        try:
+            self.assertIsNone(profiling.start(profiling.MODE_SAMPLING))
+        finally:
+            profiling.finish(first, {})
+        second = profiling.start(profiling.MODE_DETERMINISTIC)
+        profiling.finish(second, {})
+
+    @override_settings(PROFILING_MAX_BYTES=10)
+    def test_oldest_profiles_are_pruned_past_the_cap(self):
+        with patch('time.time', side_effect=[1, 2, 3]):
+            for index in range(3):
+                profiling.save(
+                    f'20260101T00000{index}-0000000{index}', b'1234', 'txt', {}
+                )
+
+        remaining = [profile['id'] for profile in profiling.list_profiles()]
+        self.assertEqual(
+            remaining, ['20260101T000002-00000002', '20260101T000001-00000001']
+        )
+        self.assertEqual(len(os.listdir(settings.PROFILING_DIR)), 4)
@@ -0,0 +1,160 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.models import Run
+from singlecell_ai_insights.services import agent
+from singlecell_ai_insights.services.agent import resilience
+
+
+class DeadlineTests(SimpleTestCase):
+    def test_budget_is_capped_by_turn_deadline(self):
+        state = {'deadline': time.monotonic() + 2}
+
+        self.assertLessEqual(resilience.budget(state, 10), 2)
+        self.assertEqual(resilience.budget({}, 10), 10)
+
+    def test_expired_deadline_raises_timeout(self):
+        state = {'deadline': time.monotonic() - 1}
+
+        with self.assertRaises(agent.AgentTimeout) as ctx:
+            resilience.budget(state, 10, resilience.STAGE_SYNTHESIS)
+
+        self.assertEqual(ctx.exception.stage, resilience.STAGE_SYNTHESIS)
+
+    def test_expired_turn_stops_before_next_node(self):
+        with (
+            patch.object(resilience, 'TURN_DEADLINE_SECONDS', -1),
+            patch(
+                'singlecell_ai_insights.services.ingestion.get_run_data'
+            ) as mock_get_run_data,
+        ):
+            with self.assertRaises(agent.AgentTimeout):
+                agent.chat('run-late', 'Anything?')
+
+        mock_get_run_data.assert_not_called()
+
+
+class BedrockCallTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        breaker = resilience.CircuitBreaker('Test', 2, 60)
+        patcher = patch.object(resilience, 'bedrock_breaker', breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = breaker
+
+    def test_slow_call_times_out(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        labels = {
+            'stage': 'selection',
+            'model': resilience.BEDROCK_MODEL_ID,
+            'outcome': resilience.OUTCOME_TIMEOUT,
+        }
+        before = resilience.CALLS.value(**labels)
+
+        with self.assertRaises(agent.AgentTimeout) as ctx:
+            resilience.bedrock_call(
+                'selection', lambda: release.wait(5), timeout=0.05
+            )
+
+        self.assertEqual(ctx.exception.stage, 'selection')
+        self.assertEqual(resilience.CALLS.value(**labels), before + 1)
+
+    def test_hedged_call_returns_first_result(self):
+        calls = []
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                return 'slow'
+            return 'fast'
+
+        result = resilience.bedrock_call(
+            'selection', call, timeout=2, hedge_after=0.05
+        )
+
+        self.assertEqual(result, 'fast')
+        self.assertEqual(len(calls), 2)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        def fail():
+            raise RuntimeError('throttled')
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                resilience.bedrock_call('synthesis', fail, timeout=1)
+
+        with self.assertRaises(agent.AgentUnavailable) as ctx:
+            resilience.bedrock_call('synthesis', lambda: 'ok', timeout=1)
+        self.assertGreater(ctx.exception.retry_after, 0)
+
+    def test_half_open_trial_closes_breaker(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        with patch.object(self.breaker, 'reset_seconds', 0):
+            result = resilience.bedrock_call(
+                'synthesis', lambda: 'ok', timeout=1
+            )
+
+        self.assertEqual(result, 'ok')
+        self.assertFalse(self.breaker.is_open)
+
+    def test_failed_trial_reopens_breaker(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        def fail():
+            raise RuntimeError('still down')
+
+        with patch.object(self.breaker, 'reset_seconds', 0):
+            with self.assertRaises(RuntimeError):
+                resilience.bedrock_call('synthesis', fail, timeout=1)
+        with self.assertRaises(agent.AgentUnavailable):
+            resilience.bedrock_call('synthesis', lambda: 'ok', timeout=1)
+
+
+class AgentErrorResponseTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username='timeout-user', password='strong-pass'
+        )
+        self.run = Run.objects.create(run_id='run-1', name='Run')
+        self.client.force_authenticate(self.user)
+
+    def post(self, error):
+        with patch(
+            'singlecell_ai_insights.services.agent.chat', side_effect=error
+        ):
+            return self.client.post(
+                f'/api/runs/{self.run.pk}/chat/',
+                {'question': 'Anything?'},
+                format='json',
+            )
+
+    def test_timeout_returns_gateway_timeout(self):
+        response = self.post(agent.AgentTimeout('slow', stage='synthesis'))
+
+        self.assertEqual(response.status_code, status.HTTP_504_GATEWAY_TIMEOUT)
+        self.assertEqual(
+            response.json(), {'detail': agent.AgentTimeout.public_message}
+        )
+
+    def test_open_breaker_returns_unavailable_with_retry_after(self):
+        response = self.post(agent.AgentUnavailable('open', retry_after=12))
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(response['Retry-After'], '12')
@@ -0,0 +1,231 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from singlecell_ai_insights.services import ingestion
+from singlecell_ai_insights.services.agent import run_context
+from singlecell_ai_insights.services.agent.nodes import analysis, data_loading
+from singlecell_ai_insights.services.agent.tools import (
+    build_cohort_panels,
+    calculate_sample_statistics,
+    find_named_samples,
+)
+from singlecell_ai_insights.services.agent.tools.lexical import (
+    BM25Index,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+from .test_ingestion import MULTIQC_DATA
+
+
+def cohort(sample_count):
+    samples = {
+        f'sample{i}': {'percent_gc': 40.0 + i % 3, 'percent_duplicates': i}
+        for i in range(sample_count)
+    }
+    samples['sample0']['percent_gc'] = 90.0
+    statuses = {
+        sample: {
+            'adapter_content': 'fail' if i % 2 else 'pass',
+            'per_base_n_content': 'pass',
+        }
+        for i, sample in enumerate(samples)
+    }
+    statistics = {
+        key: calculate_sample_statistics(samples, key)
+        for key in ('percent_gc', 'percent_duplicates')
+    }
+    return build_cohort_panels(samples, {}, statuses, statistics)
+
+
+class CohortPanelTests(SimpleTestCase):
+    def test_panel_count_does_not_grow_with_samples(self):
+        self.assertEqual(len(cohort(20)), len(cohort(500)))
+
+    def test_summaries_name_outliers_and_failing_samples(self):
+        panels = cohort(50)
+        by_module = {
+            panel.metadata.get('fastqc_module'): panel for panel in panels
+        }
+
+        overview = panels[0].page_content
+        self.assertIn('Run overview: 50 samples', overview)
+        self.assertIn('Adapter Content (25)', overview)
+        stats = next(
+            p.page_content
+            for p in panels
+            if p.metadata.get('family') == 'General Stats'
+        )
+        self.assertIn('Outliers (>2 stdev): sample0 (90.0, high)', stats)
+        adapter = by_module['adapter_content'].page_content
+        self.assertIn('Passed: 25, Warned: 0, Failed: 25', adapter)
+        self.assertIn('and 15 more', adapter)
+        self.assertNotIn(
+            'Failed samples', by_module['per_base_n_content'].page_content
+        )
+        for panel in panels:
+            self.assertEqual(panel.metadata['level'], 'cohort')
+
+
+class NamedSampleTests(SimpleTestCase):
+    def test_matches_whole_sample_names(self):
+        names = ['sample1', 'sample10', 'S-2.R1']
+
+        self.assertEqual(
+            find_named_samples('How does Sample10 compare?', names),
+            ['sample10'],
+        )
+        self.assertEqual(
+            find_named_samples('Explain s-2.r1.', names), ['S-2.R1']
+        )
+        self.assertEqual(find_named_samples('Any failures?', names), [])
+
+
+class RetrievalTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.parsed = ingestion.parse_multiqc(MULTIQC_DATA)
+        context = run_context.RunContext.from_run_data(
+            'run-rag',
+            SimpleNamespace(updated_at=None, embeddings=None, **self.parsed),
+        )
+        run_context.cache.put(context)
+        self.addCleanup(run_context.cache.clear)
+        self.state = {'run_id': 'run-rag', 'context_key': context.key}
+        patcher = patch.object(
+            data_loading, 'emb', DeterministicFakeEmbedding(size=8)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_cohort_panels_are_indexed(self):
+        with patch.object(
+            ingestion, 'emb', DeterministicFakeEmbedding(size=8)
+        ):
+            embeddings = ingestion._embed_panels(self.parsed['panels'])
+
+        self.assertEqual(len(embeddings), 3)
+        index = data_loading.search_index(self.state)
+        self.assertEqual(index.index.ntotal, 3)
+
+    def test_named_samples_are_matched_without_embedding(self):
+        self.state['question'] = 'Why did sample2 fail?'
+
+        with patch.object(analysis, 'record_embeddings') as mock_record:
+            retrieved = analysis.rag(self.state)['retrieved']
+
+        mock_record.assert_not_called()
+        self.assertEqual(
+            [doc.metadata.get('sample') for doc in retrieved],
+            ['sample2', 'sample2'],
+        )
+        self.assertIsNone(run_context.cache.get('run-rag').index)
+
+    def test_exact_name_turn_on_cold_context_embeds_nothing(self):
+        self.state.update(question='Why did sample2 fail?', notes=[])
+        emb = MagicMock()
+
+        with patch.object(data_loading, 'emb', emb):
+            data_loading.ensure_index(self.state)
+            retrieved = analysis.rag(self.state)['retrieved']
+
+        emb.embed_documents.assert_not_called()
+        emb.embed_query.assert_not_called()
+        self.assertTrue(retrieved)
+        context = run_context.cache.get('run-rag')
+        self.assertIsNone(context.index)
+        self.assertIsNotNone(context.lexical)
+
+    def test_named_modules_select_their_cohort_panel(self):
+        self.state['question'] = 'How did adapter content look?'
+
+        retrieved = analysis.rag(self.state)['retrieved']
+
+        self.assertEqual(len(retrieved), 1)
+        self.assertEqual(
+            retrieved[0].metadata['fastqc_module'], 'adapter_content'
+        )
+
+    def test_open_questions_fuse_lexical_and_vector_hits(self):
+        self.state['question'] = 'Explain the duplication across the run'
+
+        with patch.object(analysis, 'record_embeddings') as mock_record:
+            retrieved = analysis.rag(self.state)['retrieved']
+
+        mock_record.assert_called_once_with(1)
+        self.assertLessEqual(len(retrieved), 4)
+        # Sample panels can only come from BM25, cohort ones from both
+        contents = [doc.page_content for doc in retrieved]
+        self.assertEqual(len(set(contents)), len(contents))
+        self.assertTrue(
+            any(doc.metadata['level'] == 'cohort' for doc in retrieved)
+        )
+
+
+class LexicalIndexTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.documents = [
+            Document(
+                page_content='Sample: s_01.R1\nAdapter Content: fail',
+                metadata={'sample': 's_01.R1'},
+            ),
+            Document(
+                page_content='Sample: s_02.R1\nAdapter Content: pass',
+                metadata={'sample': 's_02.R1'},
+            ),
+            Document(
+                page_content='FastQC module: Adapter Content\nFailed: 1',
+                metadata={'fastqc_module': 'adapter_content'},
+            ),
+        ]
+        self.index = BM25Index(self.documents)
+
+    def test_tokenize_keeps_joined_names_and_their_parts(self):
+        self.assertEqual(
+            tokenize('Is s_01.R1 OK?'),
+            ['is', 's_01.r1', 's', 'r1', 'ok'],
+        )
+
+    def test_rare_terms_rank_first(self):
+        hits = self.index.search('adapter content of s_02.r1', 3)
+
+        self.assertIs(hits[0][0], self.documents[1])
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(self.index.search('unrelated words', 3), [])
+
+    def test_prefilter_restricts_candidates(self):
+        candidates = self.index.matching(
+            sample=['s_01.R1'], fastqc_module=['adapter_content']
+        )
+        hits = self.index.search('adapter content', 3, candidates)
+
+        self.assertEqual(candidates, {0, 2})
+        self.assertEqual(
+            {id(document) for document, _ in hits},
+            {id(self.documents[0]), id(self.documents[2])},
+        )
+
+    def test_candidates_are_kept_without_matching_terms(self):
+        numeric = Document(
+            page_content='Sample: 1234\nAdapter Content: pass',
+            metadata={'sample': '1234'},
+        )
+        index = BM25Index([*self.documents, numeric])
+        candidates = index.matching(sample=['1234'])
+
+        hits = index.search('how is 1234 doing?', 4, candidates)
+
+        self.assertEqual([document for document, _ in hits], [numeric])
+        self.assertEqual(index.search('how is 1234 doing?', 4), [])
+
+    def test_rank_fusion_favours_documents_in_both_rankings(self):
+        first, second, third = self.documents
+
+        fused = reciprocal_rank_fusion([[first, second], [third, second]], 2)
+
+        self.assertEqual(fused, [second, first])
@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from singlecell_ai_insights.models import Conversation, Message, Run
+from singlecell_ai_insights.services import conversations
 from singlecell_ai_insights.services.agent import AgentServiceError
 
 
@@ -69,6 +70,7 @@ class RunAgentChatTests(APITestCase):
                 {'role': 'user', 'content': 'Show me details'}
             ],
             metric_key=None,
+            conversation_summary='',
         )
 
     def test_agent_error_returns_bad_gateway(self):
@@ -163,6 +165,132 @@ class ConversationHistoryTests(APITestCase):
         self.assertEqual(data['messages'][1]['citations'], ['module1'])
         self.assertEqual(data['messages'][2]['id'], msg3.id)
 
+    def test_get_returns_not_modified_for_matching_etag(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_USER,
+            content='First question',
+        )
+
+        first = self.client.get(f'/api/runs/{run.pk}/chat/')
+        second = self.client.get(
+            f'/api/runs/{run.pk}/chat/', HTTP_IF_NONE_MATCH=first['ETag']
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_etag_changes_when_message_added(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_USER,
+            content='First question',
+        )
+        etag = self.client.get(f'/api/runs/{run.pk}/chat/')['ETag']
+
+        Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_ASSISTANT,
+            content='First answer',
+        )
+        response = self.client.get(
+            f'/api/runs/{run.pk}/chat/', HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['messages']), 2)
+
+    def test_get_etag_changes_when_message_cancelled(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        question = Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_USER,
+            content='First question',
+        )
+        first = self.client.get(f'/api/runs/{run.pk}/chat/')
+
+        conversations.mark_cancelled(question)
+        response = self.client.get(
+            f'/api/runs/{run.pk}/chat/', HTTP_IF_NONE_MATCH=first['ETag']
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['messages'][0]['status'], Message.STATUS_CANCELLED
+        )
+
+    def test_get_etag_differs_per_field_subset(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_USER,
+            content='First question',
+        )
+        url = f'/api/runs/{run.pk}/chat/'
+        ids = self.client.get(url, {'fields': 'id'})
+
+        same = self.client.get(
+            url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=ids['ETag']
+        )
+        contents = self.client.get(
+            url, {'fields': 'content'}, HTTP_IF_NONE_MATCH=ids['ETag']
+        )
+
+        self.assertEqual(same.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(contents.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(contents['ETag'], ids['ETag'])
+        self.assertEqual(
+            contents.json()['messages'][0]['content'], 'First question'
+        )
+
+    def test_get_paginates_newest_first_with_cursor(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        messages = [
+            Message.objects.create(
+                conversation=conversation,
+                role=Message.ROLE_USER,
+                content=f'Question {i}',
+            )
+            for i in range(5)
+        ]
+
+        first = self.client.get(
+            f'/api/runs/{run.pk}/chat/', {'limit': 2}
+        ).json()
+        second = self.client.get(first['next']).json()
+
+        self.assertEqual(
+            [msg['id'] for msg in first['messages']],
+            [messages[4].id, messages[3].id],
+        )
+        self.assertEqual(
+            [msg['id'] for msg in second['messages']],
+            [messages[2].id, messages[1].id],
+        )
+        self.assertIsNotNone(second['previous'])
+
+    def test_get_returns_requested_field_subset(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_USER,
+            content='Question',
+        )
+
+        response = self.client.get(
+            f'/api/runs/{run.pk}/chat/', {'fields': 'id,role,unknown'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.json()['messages'][0]), {'id', 'role'})
+
     def test_post_creates_user_message(self):
         run = self.create_run()
 
@@ -291,6 +419,76 @@ class ConversationHistoryTests(APITestCase):
         self.assertEqual(history[0]['content'], 'Answer 7')
         self.assertEqual(history[-1]['content'], 'Latest question')
 
+    def test_post_turn_uses_minimal_queries(self):
+        run = self.create_run()
+        conversation = Conversation.objects.create(run=run, user=self.user)
+        Message.objects.create(
+            conversation=conversation,
+            role=Message.ROLE_USER,
+            content='Previous question',
+        )
+
+        with patch(
+            'singlecell_ai_insights.services.agent.chat',
+            return_value={
+                'answer': 'Response',
+                'citations': [],
+                'notes': [],
+            },
+        ):
+            # savepoint, conversation + run, history, insert, release,
+            # assistant insert
+            with self.assertNumQueries(6):
+                response = self.client.post(
+                    f'/api/runs/{run.pk}/chat/',
+                    {'question': 'Question'},
+                    format='json',
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_post_to_unknown_run_returns_404(self):
+        response = self.client.post(
+            '/api/runs/99999/chat/',
+            {'question': 'Question'},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Message.objects.count(), 0)
+
+    def test_post_passes_summary_and_schedules_refresh(self):
+        run = self.create_run()
+        Conversation.objects.create(
+            run=run, user=self.user, summary='Earlier we discussed GC'
+        )
+
+        with (
+            patch(
+                'singlecell_ai_insights.services.agent.chat',
+                return_value={
+                    'answer': 'Response',
+                    'citations': [],
+                    'notes': [],
+                },
+            ) as mock_chat,
+            patch(
+                'singlecell_ai_insights.services.conversations.'
+                'schedule_summary_refresh'
+            ) as mock_schedule,
+        ):
+            self.client.post(
+                f'/api/runs/{run.pk}/chat/',
+                {'question': 'Question'},
+                format='json',
+            )
+
+        call_kwargs = mock_chat.call_args[1]
+        self.assertEqual(
+            call_kwargs['conversation_summary'], 'Earlier we discussed GC'
+        )
+        mock_schedule.assert_called_once()
+
     def test_post_creates_conversation_if_not_exists(self):
         run = self.create_run()
         self.assertEqual(Conversation.objects.filter(run=run).count(), 0)
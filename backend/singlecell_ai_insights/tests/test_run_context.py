@@ -0,0 +1,137 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from singlecell_ai_insights.models import Run, RunData
+from singlecell_ai_insights.services import ingestion, warmup
+from singlecell_ai_insights.services.agent import agent, run_context
+from singlecell_ai_insights.services.agent.nodes import data_loading
+
+from .test_ingestion import MULTIQC_DATA
+
+NODES = 'singlecell_ai_insights.services.agent.nodes'
+HEAVY_KEYS = {'samples', 'panels', 'embeddings', 'metric_meta', 'vs'}
+
+
+class RunContextTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(run_context.cache.clear)
+        run = Run.objects.create(run_id='run-ctx', name='Context Run')
+        self.run_data = RunData.objects.create(
+            run=run, **ingestion.parse_multiqc(MULTIQC_DATA)
+        )
+
+    def test_context_is_loaded_once_per_version(self):
+        with patch.object(
+            ingestion, 'get_run_data', wraps=ingestion.get_run_data
+        ) as mock_get:
+            first = run_context.load('run-ctx')
+            second = run_context.load('run-ctx')
+
+        self.assertIs(first, second)
+        mock_get.assert_called_once_with('run-ctx')
+        self.assertEqual(set(first.samples), {'sample1', 'sample2'})
+        self.assertEqual(len(first.panels), 3)
+        self.assertEqual(set(first.sample_panels), {'sample1', 'sample2'})
+
+    async def test_concurrent_async_loads_fetch_once(self):
+        fetch = ingestion.aget_run_data
+        calls = []
+
+        async def counting_fetch(run_id):
+            calls.append(run_id)
+            # Let the second load find the first one in flight
+            await asyncio.sleep(0)
+            return await fetch(run_id)
+
+        with patch.object(ingestion, 'aget_run_data', counting_fetch):
+            first, second = await asyncio.gather(
+                run_context.aload('run-ctx'), run_context.aload('run-ctx')
+            )
+
+        self.assertIs(first, second)
+        self.assertEqual(calls, ['run-ctx'])
+
+    def test_rewritten_run_data_is_reloaded(self):
+        first = run_context.load('run-ctx')
+        self.run_data.samples = {'sample3': {'percent_gc': 50.0}}
+        self.run_data.save()
+
+        second = run_context.load('run-ctx')
+
+        self.assertNotEqual(first.key, second.key)
+        self.assertEqual(set(second.samples), {'sample3'})
+
+    def test_warmup_caches_recent_runs(self):
+        warmup.warm_runs(1)
+
+        context = run_context.cache.get('run-ctx')
+        self.assertIsNotNone(context)
+        # No stored vectors, so the index waits for the first turn
+        self.assertIsNone(context.index)
+        self.assertEqual(len(context.lexical), 7)
+
+    def test_cache_evicts_least_recently_used_run(self):
+        cache = run_context.ContextCache(size=2)
+        contexts = [
+            run_context.RunContext(
+                f'run-{index}', 'v1', None, {}, {}, (), {}, None
+            )
+            for index in range(3)
+        ]
+        cache.put(contexts[0])
+        cache.put(contexts[1])
+        cache.get('run-0')
+        cache.put(contexts[2])
+
+        self.assertIsNone(cache.get('run-1'))
+        self.assertIs(cache.get('run-0'), contexts[0])
+        self.assertEqual(len(cache), 2)
+
+    def test_stream_carries_only_updates_and_reuses_the_index(self):
+        llm = MagicMock()
+        llm.invoke.return_value.content = 'Answer'
+        llm.invoke.return_value.usage_metadata = None
+        no_artifacts = {'table_indices': [], 'plot_indices': []}
+        updates = []
+
+        def recording_stream(*args, **kwargs):
+            for event in agent.APP_GRAPH.stream(*args, **kwargs):
+                updates.append(event)
+                yield event
+
+        with (
+            patch(f'{NODES}.synthesis.llm', llm),
+            patch.object(
+                data_loading, 'emb', DeterministicFakeEmbedding(size=8)
+            ),
+            patch(
+                f'{NODES}.artifacts.select_artifacts_with_llm',
+                return_value=no_artifacts,
+            ),
+            patch.object(
+                agent,
+                'build_streaming_graph',
+                return_value=MagicMock(stream=recording_stream),
+            ),
+            patch.object(
+                data_loading,
+                '_build_index',
+                wraps=data_loading._build_index,
+            ) as mock_build,
+        ):
+            for _ in range(2):
+                events = list(
+                    agent.chat_stream('run-ctx', 'Explain the run quality')
+                )
+
+        answer = next(e for e in events if e['type'] == 'answer')
+        self.assertEqual(answer['content']['answer'], 'Answer')
+        self.assertEqual(mock_build.call_count, 1)
+        for event in updates:
+            for update in event.values():
+                self.assertFalse(HEAVY_KEYS & set(update or {}))
+        self.assertIsNotNone(run_context.cache.get('run-ctx').index)
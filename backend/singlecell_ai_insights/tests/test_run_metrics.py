@@ -0,0 +1,142 @@
+from django.test import SimpleTestCase
+
+from singlecell_ai_insights.services.agent import run_context
+from singlecell_ai_insights.services.agent.nodes import analysis
+from singlecell_ai_insights.services.agent.tools import (
+    calculate_sample_statistics,
+)
+from singlecell_ai_insights.services.agent.tools.run_metrics import (
+    RunMetrics,
+)
+
+SAMPLES = {
+    'sample1': {
+        'picard.percent_duplication': 0.12,
+        'star.uniquely_mapped': 5_000_000,
+    },
+    'sample2': {
+        'picard.percent_duplication': 0.75,
+        'star.uniquely_mapped': 9_000_000,
+        'fastqc.percent_gc': 41.5,
+    },
+    'sample3': {'star.uniquely_mapped': 20_000},
+}
+MODULE_STATUSES = {
+    'sample1': {'adapter_content': 'pass', 'per_base_n_content': 'warn'},
+    'sample3': {'adapter_content': 'fail'},
+    # FastQC only, not in general stats
+    'sample4': {'adapter_content': 'fail'},
+}
+
+
+class RunMetricsTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.metrics = RunMetrics.from_dicts(SAMPLES, MODULE_STATUSES)
+
+    def test_views_match_the_parsed_dicts(self):
+        self.assertEqual(self.metrics.samples, SAMPLES)
+        self.assertEqual(self.metrics.module_statuses, MODULE_STATUSES)
+        self.assertEqual(list(self.metrics.samples), list(SAMPLES))
+        self.assertEqual(self.metrics.sample_count(), 3)
+
+    def test_integer_metrics_stay_integers(self):
+        value = self.metrics.samples['sample1']['star.uniquely_mapped']
+
+        self.assertIsInstance(value, int)
+        self.assertIsInstance(
+            self.metrics.samples['sample1']['picard.percent_duplication'],
+            float,
+        )
+
+    def test_missing_cells_are_not_in_the_views(self):
+        row = self.metrics.samples['sample3']
+
+        self.assertNotIn('picard.percent_duplication', row)
+        self.assertIsNone(row.get('fastqc.percent_gc'))
+        self.assertNotIn('sample4', self.metrics.samples)
+        self.assertNotIn('sample2', self.metrics.module_statuses)
+        with self.assertRaises(KeyError):
+            self.metrics.samples['sample4']
+
+    def test_column_reads_one_metric(self):
+        self.assertEqual(
+            self.metrics.samples.column('picard.percent_duplication'),
+            {'sample1': 0.12, 'sample2': 0.75},
+        )
+        self.assertEqual(self.metrics.samples.column('unknown'), {})
+
+    def test_row_max_defaults_samples_without_the_metric(self):
+        dup = self.metrics.row_max(lambda key: 'dup' in key)
+
+        self.assertEqual(dup.tolist(), [0.12, 0.75, 0.0, 0.0])
+
+    def test_views_are_read_only(self):
+        with self.assertRaises(ValueError):
+            self.metrics.values[0, 0] = 1.0
+        with self.assertRaises(TypeError):
+            self.metrics.samples['sample1']['star.uniquely_mapped'] = 1
+
+    def test_statistics_match_the_dicts(self):
+        for key in ('picard.percent_duplication', 'star.uniquely_mapped'):
+            self.assertEqual(
+                calculate_sample_statistics(self.metrics.samples, key),
+                calculate_sample_statistics(SAMPLES, key),
+            )
+
+
+class LookupSamplesTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        context = run_context.RunContext(
+            run_id='run-metrics',
+            version='v1',
+            metrics=RunMetrics.from_dicts(SAMPLES, MODULE_STATUSES),
+            metric_meta={},
+            statistics={},
+            panels=(),
+            sample_panels={},
+            embeddings=None,
+        )
+        run_context.cache.put(context)
+        self.addCleanup(run_context.cache.clear)
+        self.state = {
+            'run_id': 'run-metrics',
+            'context_key': context.key,
+            'question': 'Which samples failed QC?',
+            'notes': [],
+        }
+
+    def test_flags_duplication_low_mapping_and_failed_modules(self):
+        update = analysis.lookup_samples(self.state)
+
+        self.assertEqual(
+            update['tabular'],
+            [
+                {
+                    'sample': 'sample2',
+                    'duplication': 0.75,
+                    'mapped': 9_000_000,
+                    'flag': True,
+                },
+                {
+                    'sample': 'sample3',
+                    'duplication': 0.0,
+                    'mapped': 20_000,
+                    'failed_modules': 'adapter_content',
+                    'flag': True,
+                },
+            ],
+        )
+        self.assertIn('FastQC module failures', update['notes'][-1])
+
+    def test_metric_lookup_lists_reporting_samples(self):
+        self.state['question'] = 'What is the duplication rate?'
+
+        update = analysis.lookup_metric(self.state)
+
+        self.assertEqual(update['metric_key'], 'picard.percent_duplication')
+        self.assertEqual(
+            [(hit['sample'], hit['value']) for hit in update['tabular']],
+            [('sample1', 0.12), ('sample2', 0.75)],
+        )
@@ -2,7 +2,7 @@ import json
 from datetime import datetime
 from datetime import timezone as dt_timezone
 from io import BytesIO
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from botocore.exceptions import BotoCoreError
 from django.conf import settings
@@ -13,6 +13,8 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from singlecell_ai_insights.models import Run
+from singlecell_ai_insights.services import ingestion
+from singlecell_ai_insights.services.agent import AgentBusy
 
 
 class MockHealthOmicsClient:
@@ -304,6 +306,28 @@ class RunEndpointTests(APITestCase):
             response.data['detail'], 'MultiQC data not available for this run.'
         )
 
+    def test_run_metrics_asks_to_retry_while_ingested_elsewhere(self):
+        self.authenticate()
+        run = Run.objects.create(
+            run_id='run-busy',
+            name='Busy Run',
+            status='COMPLETED',
+            pipeline='wf',
+            created_at=timezone.now(),
+            output_dir_bucket='bucket',
+            output_dir_key='prefix',
+        )
+
+        with patch.object(
+            ingestion, 'ingest_run', side_effect=AgentBusy('busy', 5)
+        ):
+            response = self.client.get(f'/api/runs/{run.pk}/metrics/')
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(response['Retry-After'], '5')
+
     def test_run_metrics_fetches_and_caches_on_first_call(self):
         self.authenticate()
         run = Run.objects.create(
@@ -349,6 +373,188 @@ class RunEndpointTests(APITestCase):
         self.assertIsNotNone(run.metrics)
         self.assertEqual(run.metrics['total_samples'], 2)
 
+    def test_list_returns_not_modified_for_matching_etag(self):
+        self.authenticate()
+        Run.objects.create(
+            run_id='run-etag',
+            name='ETag Run',
+            status='COMPLETED',
+            created_at=timezone.now(),
+        )
+
+        first = self.client.get('/api/runs/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first['ETag']
+
+        second = self.client.get('/api/runs/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+
+    def test_list_etag_changes_when_runs_change(self):
+        self.authenticate()
+        run = Run.objects.create(
+            run_id='run-etag',
+            name='ETag Run',
+            status='RUNNING',
+            created_at=timezone.now(),
+        )
+        etag = self.client.get('/api/runs/')['ETag']
+
+        run.status = 'COMPLETED'
+        run.save()
+        response = self.client.get('/api/runs/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['status'], 'COMPLETED')
+
+    def test_list_etag_survives_a_refresh_that_changes_nothing(self):
+        self.authenticate()
+        MOCK_HEALTHOMICS_CLIENT.paginator.paginate.return_value = [
+            {'items': [{'id': 'run-sync', 'name': 'Sync Run'}]}
+        ]
+        MOCK_HEALTHOMICS_CLIENT.get_run.return_value = {
+            'run': {
+                'id': 'run-sync',
+                'name': 'Sync Run',
+                'status': 'RUNNING',
+                'creationTime': datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+                'runOutputUri': 's3://bucket/run-sync/',
+            }
+        }
+        etag = self.client.get('/api/runs/?refresh=true')['ETag']
+        stored = Run.objects.get(run_id='run-sync').updated_at
+
+        unchanged = self.client.get(
+            '/api/runs/?refresh=true', HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(Run.objects.get(run_id='run-sync').updated_at, stored)
+
+        MOCK_HEALTHOMICS_CLIENT.get_run.return_value['run']['status'] = (
+            'COMPLETED'
+        )
+        changed = self.client.get(
+            '/api/runs/?refresh=true', HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data[0]['status'], 'COMPLETED')
+
+    def test_run_metrics_returns_not_modified_for_matching_etag(self):
+        self.authenticate()
+        run = Run.objects.create(
+            run_id='run-metrics-etag',
+            name='Metrics ETag Run',
+            status='COMPLETED',
+            created_at=timezone.now(),
+            output_dir_bucket='bucket',
+            output_dir_key='run-123/',
+            metrics={'total_samples': 0, 'samples': []},
+        )
+
+        first = self.client.get(f'/api/runs/{run.pk}/metrics/')
+        second = self.client.get(
+            f'/api/runs/{run.pk}/metrics/',
+            HTTP_IF_NONE_MATCH=first['ETag'],
+        )
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        settings.AWS_S3_CLIENT.get_object.assert_not_called()
+
+    def test_bulk_metrics_streams_cached_and_fetched_runs(self):
+        self.authenticate()
+        cached = Run.objects.create(
+            run_id='run-bulk-cached',
+            status='COMPLETED',
+            created_at=timezone.now(),
+            metrics={'total_samples': 1, 'samples': []},
+        )
+        missing = Run.objects.create(
+            run_id='run-bulk-missing',
+            status='COMPLETED',
+            created_at=timezone.now(),
+            output_dir_bucket='bucket',
+            output_dir_key='run-bulk-missing/',
+        )
+        unavailable = Run.objects.create(
+            run_id='run-bulk-unavailable',
+            status='COMPLETED',
+            created_at=timezone.now(),
+        )
+        Run.objects.create(run_id='run-bulk-other', created_at=timezone.now())
+        mock_multiqc_data = {
+            'report_general_stats_data': [
+                {'sample1': {'percent_duplicates': 10.5}}
+            ]
+        }
+        settings.AWS_S3_CLIENT.get_object.return_value = {
+            'Body': BytesIO(json.dumps(mock_multiqc_data).encode('utf-8'))
+        }
+
+        response = self.client.get(
+            '/api/runs/metrics/',
+            {'pks': f'{cached.pk},{missing.pk},{unavailable.pk}'},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        payload = json.loads(b''.join(response.streaming_content))
+        rows = {row['pk']: row for row in payload['results']}
+        self.assertEqual(set(rows), {cached.pk, missing.pk, unavailable.pk})
+        self.assertEqual(rows[cached.pk]['metrics']['total_samples'], 1)
+        self.assertEqual(rows[missing.pk]['metrics']['total_samples'], 1)
+        self.assertIsNone(rows[unavailable.pk]['metrics'])
+        settings.AWS_S3_CLIENT.get_object.assert_called_once()
+        missing.refresh_from_db()
+        self.assertEqual(missing.metrics['total_samples'], 1)
+
+    def test_bulk_metrics_leaves_ingesting_runs_to_background_ingestion(self):
+        self.authenticate()
+        output = {'output_dir_bucket': 'bucket', 'output_dir_key': 'key/'}
+        pending = Run.objects.create(
+            run_id='run-bulk-pending',
+            created_at=timezone.now(),
+            ingestion_status=Run.INGESTION_PENDING,
+            **output,
+        )
+        running = Run.objects.create(
+            run_id='run-bulk-running',
+            created_at=timezone.now(),
+            ingestion_status=Run.INGESTION_RUNNING,
+            **output,
+        )
+        empty = Run.objects.create(
+            run_id='run-bulk-empty',
+            created_at=timezone.now(),
+            ingestion_status=Run.INGESTION_SUCCEEDED,
+            **output,
+        )
+
+        response = self.client.get(
+            '/api/runs/metrics/',
+            {'pks': f'{pending.pk},{running.pk},{empty.pk}'},
+        )
+
+        payload = json.loads(b''.join(response.streaming_content))
+        rows = {row['pk']: row for row in payload['results']}
+        settings.AWS_S3_CLIENT.get_object.assert_not_called()
+        for run in (pending, running):
+            self.assertTrue(rows[run.pk]['pending'])
+            self.assertIsNone(rows[run.pk]['metrics'])
+        self.assertNotIn('pending', rows[empty.pk])
+        detail = self.client.get(f'/api/runs/{empty.pk}/metrics/')
+        self.assertEqual(rows[empty.pk]['detail'], detail.data['detail'])
+
+    def test_bulk_metrics_rejects_invalid_pks(self):
+        self.authenticate()
+
+        response = self.client.get('/api/runs/metrics/', {'pks': '1,abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_run_metrics_requires_authentication(self):
         run = Run.objects.create(
             run_id='run-auth-test',
@@ -0,0 +1,174 @@
+import asyncio
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase, override_settings
+
+from singlecell_ai_insights.services.agent import AgentBusy
+from singlecell_ai_insights.services.singleflight import (
+    SingleFlight,
+    _file_lock,
+)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def run_concurrently(self, flight, key, fn, callers=5, check=None):
+        barrier = threading.Barrier(callers)
+
+        def call():
+            barrier.wait()
+            return flight.do(key, fn, check=check)
+
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            futures = [pool.submit(call) for _ in range(callers)]
+        return futures
+
+    def test_concurrent_callers_share_one_result(self):
+        flight = SingleFlight('test')
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'value': 42}
+
+        futures = self.run_concurrently(flight, 'run-1', work)
+
+        results = [future.result() for future in futures]
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_failure_is_shared_and_not_cached(self):
+        flight = SingleFlight('test')
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            raise ValueError('boom')
+
+        futures = self.run_concurrently(flight, 'run-1', work)
+
+        for future in futures:
+            self.assertIsInstance(future.exception(), ValueError)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.do('run-1', lambda: 'retried'), 'retried')
+
+    def test_different_keys_run_independently(self):
+        flight = SingleFlight('test')
+
+        self.assertEqual(flight.do('a', lambda: 1), 1)
+        self.assertEqual(flight.do('b', lambda: 2), 2)
+
+    def test_check_returns_stored_result_without_work(self):
+        flight = SingleFlight('test')
+
+        result = flight.do(
+            'run-1', lambda: self.fail('work ran'), check=lambda: 'stored'
+        )
+
+        self.assertEqual(result, 'stored')
+
+    def test_file_backend_serializes_work_across_groups(self):
+        # Two groups stand in for two processes sharing the lock directory
+        first, second = SingleFlight('test'), SingleFlight('test')
+        store = {}
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            store['run-1'] = 'parsed'
+            return 'parsed'
+
+        with tempfile.TemporaryDirectory() as lock_dir:
+            with override_settings(
+                SINGLE_FLIGHT_BACKEND='file', SINGLE_FLIGHT_LOCK_DIR=lock_dir
+            ):
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    futures = [
+                        pool.submit(
+                            flight.do,
+                            'run-1',
+                            work,
+                            lambda: store.get('run-1'),
+                        )
+                        for flight in (first, second)
+                    ]
+
+        self.assertEqual([f.result() for f in futures], ['parsed', 'parsed'])
+        self.assertEqual(len(calls), 1)
+
+    def test_lock_timeout_never_runs_the_work(self):
+        flight = SingleFlight('test')
+        store = {}
+
+        with tempfile.TemporaryDirectory() as lock_dir:
+            with override_settings(
+                SINGLE_FLIGHT_BACKEND='file',
+                SINGLE_FLIGHT_LOCK_DIR=lock_dir,
+                SINGLE_FLIGHT_TIMEOUT_SECONDS=0.1,
+            ):
+                # Another process is ingesting the run
+                with _file_lock('test:run-1', 1) as locked:
+                    self.assertTrue(locked)
+                    with self.assertRaises(AgentBusy) as caught:
+                        flight.do(
+                            'run-1',
+                            lambda: self.fail('work ran'),
+                            lambda: store.get('run-1'),
+                        )
+                    store['run-1'] = 'parsed'
+                    result = flight.do(
+                        'run-1',
+                        lambda: self.fail('work ran'),
+                        lambda: store.get('run-1'),
+                    )
+
+        self.assertTrue(caught.exception.retryable)
+        self.assertIsNotNone(caught.exception.retry_after)
+        self.assertEqual(result, 'parsed')
+
+    @override_settings(SINGLE_FLIGHT_TIMEOUT_SECONDS=0.05)
+    def test_timed_out_follower_does_not_run_the_work(self):
+        flight = SingleFlight('test')
+        release = threading.Event()
+        started = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'slow'
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(flight.do, 'run-1', work)
+            started.wait(5)
+            try:
+                with self.assertRaises(AgentBusy):
+                    flight.do('run-1', work)
+            finally:
+                release.set()
+
+        self.assertEqual(leader.result(), 'slow')
+        self.assertEqual(len(calls), 1)
+
+    def test_async_callers_share_one_result(self):
+        flight = SingleFlight('test')
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'shared'
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.ado('run-1', work) for _ in range(5))
+            )
+
+        self.assertEqual(asyncio.run(main()), ['shared'] * 5)
+        self.assertEqual(len(calls), 1)
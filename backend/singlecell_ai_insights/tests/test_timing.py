@@ -0,0 +1,131 @@
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.models import Conversation, Message, Run
+from singlecell_ai_insights.services import conversations
+from singlecell_ai_insights.services.agent import accounting
+from singlecell_ai_insights.services.agent.aio import run_blocking
+from singlecell_ai_insights.services.agent.tools import load_json_from_s3
+
+
+class TurnStatsTests(SimpleTestCase):
+    def test_node_records_wall_time_and_nested_counters(self):
+        stats = accounting.TurnStats()
+        state = {'stats': stats}
+
+        with accounting.node(state, 'synthesize'):
+            accounting.record_embeddings(3)
+            accounting.record_cache('run_data', hit=True)
+
+        timing = stats.as_dict()
+        self.assertIn('synthesize', timing['nodes'])
+        self.assertEqual(timing['embeddings'], 3)
+        self.assertEqual(timing['cache_hits'], 1)
+        self.assertEqual(timing['cache_misses'], 0)
+
+    def test_recording_outside_a_turn_is_a_no_op(self):
+        accounting.record_s3_bytes(10)
+
+        with accounting.node({}, 'rag'):
+            accounting.record_embeddings(1)
+
+    def test_llm_usage_is_read_from_usage_metadata(self):
+        class Response:
+            usage_metadata = {'input_tokens': 120, 'output_tokens': 30}
+
+        stats = accounting.TurnStats()
+        with accounting.node({'stats': stats}, 'synthesize'):
+            accounting.record_llm_call()
+            accounting.record_llm_usage(Response())
+
+        timing = stats.as_dict()
+        self.assertEqual(timing['llm_calls'], 1)
+        self.assertEqual(timing['input_tokens'], 120)
+        self.assertEqual(timing['output_tokens'], 30)
+
+    async def test_s3_bytes_are_recorded_across_the_io_pool(self):
+        body = json.dumps({'report': 'ok'}).encode()
+        client = type(
+            'Client',
+            (),
+            {'get_object': lambda self, **kw: {'Body': io.BytesIO(body)}},
+        )()
+        stats = accounting.TurnStats()
+
+        with (
+            patch('django.conf.settings.AWS_S3_CLIENT', client, create=True),
+            accounting.node({'stats': stats}, 'load_multiqc'),
+        ):
+            data = await run_blocking(load_json_from_s3, 'bucket', 'key')
+
+        self.assertEqual(data, {'report': 'ok'})
+        self.assertEqual(stats.as_dict()['s3_bytes'], len(body))
+
+
+class AgentTimingViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_user(
+            username='ops', password='strong-pass', is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            username='analyst', password='strong-pass'
+        )
+        self.run = Run.objects.create(run_id='run-1', name='Run')
+        conversation = Conversation.objects.create(
+            run=self.run, user=self.user
+        )
+        for total, tokens in [(1000, 100), (3000, 300)]:
+            conversations.save_answer(
+                conversation,
+                {
+                    'answer': 'Answer',
+                    'timing': {
+                        'total_ms': total,
+                        'nodes': {'synthesize': total // 2},
+                        'input_tokens': tokens,
+                    },
+                },
+            )
+        Message.objects.create(
+            conversation=conversation, role=Message.ROLE_USER, content='Q'
+        )
+
+    def test_save_answer_stores_timing(self):
+        message = Message.objects.filter(role=Message.ROLE_ASSISTANT).first()
+
+        self.assertEqual(message.timing['total_ms'], 1000)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get('/api/agent/timing/')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_aggregates_by_run(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get('/api/agent/timing/?group_by=run')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [row] = response.json()['results']
+        self.assertEqual(row['run'], 'run-1')
+        self.assertEqual(row['turns'], 2)
+        self.assertEqual(row['avg_total_ms'], 2000)
+        self.assertEqual(row['max_total_ms'], 3000)
+        self.assertEqual(row['input_tokens'], 400)
+        self.assertEqual(row['nodes'], {'synthesize': 1000})
+
+    def test_rejects_unknown_grouping(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get('/api/agent/timing/?group_by=model')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from singlecell_ai_insights.api.agent.streaming import with_heartbeats
+from singlecell_ai_insights.models import Run
+from singlecell_ai_insights.services import tracing
+from singlecell_ai_insights.services.agent.aio import run_blocking
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(list(spans))
+
+    def names(self):
+        return [span.name for spans in self.traces for span in spans]
+
+
+class TracingTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.exporter = MemoryExporter()
+        patcher = patch.object(tracing, '_exporter', self.exporter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(TRACING_SAMPLE_RATE=1.0)
+class TraceTests(TracingTestMixin, SimpleTestCase):
+    def test_children_attach_to_parent_and_trace_is_exported_once(self):
+        with tracing.trace('chat', run_id='run-1') as root:
+            with tracing.span('node.synthesize') as node:
+                with tracing.span('bedrock.synthesis'):
+                    pass
+
+        [spans] = self.exporter.traces
+        by_name = {span.name: span for span in spans}
+        self.assertIsNone(by_name['chat'].parent_id)
+        self.assertEqual(by_name['node.synthesize'].parent_id, root.span_id)
+        self.assertEqual(by_name['bedrock.synthesis'].parent_id, node.span_id)
+        self.assertEqual(
+            {span.trace.trace_id for span in spans}, {root.trace.trace_id}
+        )
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(ValueError):
+            with tracing.trace('chat'):
+                with tracing.span('s3.get_object'):
+                    raise ValueError('missing')
+
+        [spans] = self.exporter.traces
+        self.assertTrue(all('ValueError' in span.error for span in spans))
+
+    async def test_context_follows_work_onto_the_io_pool(self):
+        def blocking():
+            with tracing.span('s3.get_object'):
+                return tracing.current_span().parent_id
+
+        with tracing.trace('chat') as root:
+            parent_id = await run_blocking(blocking)
+
+        self.assertEqual(parent_id, root.span_id)
+
+    def test_context_follows_stream_pump_thread(self):
+        def events():
+            with tracing.span('node.load_multiqc'):
+                yield {'type': 'status'}
+
+        with tracing.trace('chat.stream') as root:
+            list(with_heartbeats(events(), 1))
+
+        [spans] = self.exporter.traces
+        node = next(s for s in spans if s.name == 'node.load_multiqc')
+        self.assertEqual(node.parent_id, root.span_id)
+
+    @override_settings(TRACING_SAMPLE_RATE=0)
+    def test_unsampled_requests_record_nothing(self):
+        with tracing.trace('chat') as root:
+            with tracing.span('node.rag') as child:
+                pass
+
+        self.assertIsNone(root)
+        self.assertIsNone(child)
+        self.assertEqual(self.exporter.traces, [])
+
+
+@override_settings(TRACING_SAMPLE_RATE=1.0)
+class QueryTracingTests(TracingTestMixin, TestCase):
+    def test_db_queries_become_spans(self):
+        with tracing.trace('chat'):
+            Run.objects.filter(run_id='missing').exists()
+
+        [spans] = self.exporter.traces
+        query = next(span for span in spans if span.name == 'db.query')
+        self.assertIn('SELECT', query.attributes['statement'])
+
+
+@override_settings(TRACING_SAMPLE_RATE=1.0)
+class ChatViewTracingTests(TracingTestMixin, APITestCase):
+    def test_chat_request_opens_root_span(self):
+        user = get_user_model().objects.create_user(
+            username='traced', password='strong-pass'
+        )
+        run = Run.objects.create(run_id='run-1', name='Run')
+        self.client.force_authenticate(user)
+
+        with patch(
+            'singlecell_ai_insights.services.agent.chat',
+            return_value={'answer': 'ok'},
+        ):
+            self.client.post(
+                f'/api/runs/{run.pk}/chat/', {'question': 'Hi'}, format='json'
+            )
+
+        [spans] = self.exporter.traces
+        root = next(span for span in spans if span.parent_id is None)
+        self.assertEqual(root.name, 'chat')
+        self.assertIn('db.query', self.exporter.names())
+
+
+class ExporterTests(SimpleTestCase):
+    def finished_span(self):
+        span = tracing.Span(tracing._Trace('a' * 32), 'chat', None, {'n': 1})
+        span.finish()
+        return span
+
+    def test_json_lines_exporter_appends_spans(self):
+        path = os.path.join(tempfile.mkdtemp(), 'traces.jsonl')
+
+        tracing.JsonLinesExporter(path).export([self.finished_span()])
+
+        with open(path) as handle:
+            record = json.loads(handle.readline())
+        self.assertEqual(record['name'], 'chat')
+        self.assertEqual(record['trace_id'], 'a' * 32)
+
+    def test_otlp_payload_uses_json_encoding(self):
+        with patch('threading.Thread.start'):
+            exporter = tracing.OtlpHttpExporter('http://collector:4318', 'svc')
+
+        payload = exporter._payload([self.finished_span()])
+
+        [span] = payload['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(exporter.url, 'http://collector:4318/v1/traces')
+        self.assertEqual(span['traceId'], 'a' * 32)
+        self.assertEqual(span['status'], {'code': 1})
+        self.assertEqual(
+            span['attributes'], [{'key': 'n', 'value': {'intValue': '1'}}]
+        )
@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
+from singlecell_ai_insights.admin import profile_download, profile_list
+from singlecell_ai_insights.api.agent.async_views import (
+    AsyncRunAgentChatStreamView,
+    AsyncRunAgentChatView,
+)
+from singlecell_ai_insights.api.agent.timing import AgentTimingView
 from singlecell_ai_insights.api.agent.views import (
+    RunAgentChatJobEventsView,
     RunAgentChatStreamView,
     RunAgentChatView,
 )
@@ -12,14 +20,34 @@ from singlecell_ai_insights.api.auth import (
     MeView,
 )
 from singlecell_ai_insights.api.health import health_check
+from singlecell_ai_insights.api.metrics import metrics_view
 from singlecell_ai_insights.api.runs import RunViewSet
 
 run_list = RunViewSet.as_view({'get': 'list'})
 run_detail = RunViewSet.as_view({'get': 'retrieve'})
 run_multiqc_report = RunViewSet.as_view({'get': 'multiqc_report'})
 run_metrics = RunViewSet.as_view({'get': 'metrics'})
+run_bulk_metrics = RunViewSet.as_view({'get': 'bulk_metrics'})
+
+# Queued turns only enqueue and tail, so they keep the sync views
+if settings.AGENT_ASYNC_VIEWS and not settings.AGENT_JOB_QUEUE:
+    run_chat = AsyncRunAgentChatView.as_view()
+    run_chat_stream = AsyncRunAgentChatStreamView.as_view()
+else:
+    run_chat = RunAgentChatView.as_view()
+    run_chat_stream = RunAgentChatStreamView.as_view()
 
 urlpatterns = [
+    path(
+        'admin/profiles/',
+        admin.site.admin_view(profile_list),
+        name='admin-profiles',
+    ),
+    path(
+        'admin/profiles/<str:profile_id>/',
+        admin.site.admin_view(profile_download),
+        name='admin-profile-download',
+    ),
     path('admin/', admin.site.urls),
     # Auth urls
     path(
@@ -36,7 +64,10 @@ urlpatterns = [
     path('api/auth/me/', MeView.as_view(), name='auth_me'),
     # API urls
     path('api/health/', health_check, name='health'),
+    path('api/metrics/', metrics_view, name='metrics'),
+    path('api/agent/timing/', AgentTimingView.as_view(), name='agent-timing'),
     path('api/runs/', run_list, name='run-list'),
+    path('api/runs/metrics/', run_bulk_metrics, name='run-bulk-metrics'),
     path('api/runs/<int:pk>/', run_detail, name='run-detail'),
     path(
         'api/runs/<int:pk>/multiqc-report/',
@@ -50,12 +81,17 @@ urlpatterns = [
     ),
     path(
         'api/runs/<int:pk>/chat/',
-        RunAgentChatView.as_view(),
+        run_chat,
         name='run-chat',
     ),
     path(
         'api/runs/<int:pk>/chat/stream/',
-        RunAgentChatStreamView.as_view(),
+        run_chat_stream,
         name='run-chat-stream',
     ),
+    path(
+        'api/runs/<int:pk>/chat/jobs/<int:job_pk>/events/',
+        RunAgentChatJobEventsView.as_view(),
+        name='run-chat-job-events',
+    ),
 ]
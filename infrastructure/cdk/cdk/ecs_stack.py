@@ -143,7 +143,9 @@ class EcsStack(Construct):
             retention=logs.RetentionDays.ONE_WEEK,
         )
 
-        # Task definition
+        # Task definition; gunicorn sizes its workers from this CPU and
+        # memory (singlecell_ai_insights/gunicorn_conf.py). Measure capacity
+        # per task with backend/benchmarks/http_load.py
         task_definition = ecs.FargateTaskDefinition(
             self,
             'TaskDefinition',
@@ -1,20 +1,24 @@
 #!/bin/bash
 set -e
 
+if [ "${SERVER_MODE:-wsgi}" = "worker" ]; then
+    echo "Starting chat workers..."
+    exec python manage.py chat_worker
+fi
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput --clear
 
 echo "Running database migrations..."
 python manage.py migrate --noinput
 
-echo "Starting gunicorn..."
-exec gunicorn \
-    --bind 0.0.0.0:8000 \
-    --workers 2 \
-    --threads 4 \
-    --worker-class gthread \
-    --worker-tmp-dir /dev/shm \
-    --access-logfile - \
-    --error-logfile - \
-    --log-level info \
-    singlecell_ai_insights.wsgi:application
+# Gunicorn workers merge their metrics through snapshots in this dir;
+# start empty so counters from a previous container do not carry over
+export METRICS_MULTIPROC_DIR="${METRICS_MULTIPROC_DIR:-/dev/shm/metrics}"
+rm -rf "$METRICS_MULTIPROC_DIR"
+mkdir -p "$METRICS_MULTIPROC_DIR"
+
+# Worker class, sizing, preload/warmup and recycling live in the config;
+# SERVER_MODE=asgi switches to uvicorn workers
+echo "Starting gunicorn (${SERVER_MODE:-wsgi})..."
+exec gunicorn --config python:singlecell_ai_insights.gunicorn_conf